@@ -1442,4 +1442,24 @@ Otherwise, proceed with normal formatting and analytics.
 - Never summarize or describe full finance_data unless user asked for detailed overview.
 </PRUNING-RULES>
 
-"""
\ No newline at end of file
+"""
+
+# Appended to SYSTEM_PROMPT when the report is streamed; charts are generated while the text streams.
+STREAMING_CHART_PROMPT = """
+<STREAMING-CHART-INSTRUCTIONS>
+These instructions override every instruction above about calling `graph_generation_tool` and writing ```graph blocks.
+- You cannot call tools in this response. Charts are generated for you from tables you write.
+- Wherever a chart should appear, write the markdown table that you would have passed to `graph_generation_tool` inside a code block labeled `chart-data`:
+
+```chart-data
+| Year | Revenue (₹ Billion) | Net Income (₹ Billion) |
+|------|---------------------|------------------------|
+| FY24 | 950 | 150 |
+| FY25 | 1020 | 165 |
+```
+
+- The chart-data block is replaced by the generated chart, so put it exactly where the chart belongs, with 1 line space above and below, and one chart per block.
+- All chart selection rules above still apply to which chart-data blocks you write.
+- Never write ```graph blocks, chart JSON or <END_OF_GRAPH> yourself.
+</STREAMING-CHART-INSTRUCTIONS>
+"""
@@ -1,10 +1,15 @@
 from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.prebuilt import create_react_agent
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from src.ai.llm.model import get_llm, get_llm_alt
+import threading
 
 
 class BaseAgent:
+    # Compiled ReAct executors shared by all instances of an agent class, keyed by (class, model).
+    _react_agents: Dict[Tuple[type, int], Tuple[Any, Any]] = {}
+    _react_agents_lock = threading.Lock()
+
     def __init__(
         self,
         tools: Optional[List] = None,
@@ -27,3 +32,53 @@ class BaseAgent:
 
     def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
         raise NotImplementedError("Subclasses must implement __call__")
+
+    def build_react_agent(self, model):
+        return create_react_agent(model=model, tools=self.tools, prompt=SystemMessage(content=self.system_prompt))
+
+    def react_agent(self, model):
+        """Returns the prebuilt ReAct executor for this agent class and model, compiling it on first use."""
+        key = (type(self), id(model))
+        cached = BaseAgent._react_agents.get(key)
+        if cached is not None:
+            return cached[1]
+
+        with BaseAgent._react_agents_lock:
+            cached = BaseAgent._react_agents.get(key)
+            if cached is None:
+                # Keep a reference to the model so its id cannot be reused by another object.
+                cached = (model, self.build_react_agent(model))
+                BaseAgent._react_agents[key] = cached
+        return cached[1]
+
+    async def acall(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        raise NotImplementedError("Subclasses must implement acall")
+
+    def invoke_with_fallback(self, *args, runnable_for=None, **kwargs):
+        """
+        Invokes runnable_for(self.model) (the model itself by default) and retries
+        once with self.model_alt on failure.
+        """
+        runnable_for = runnable_for or (lambda model: model)
+        try:
+            return runnable_for(self.model).invoke(*args, **kwargs)
+        except Exception as e:
+            print(f"Falling back to alternate model: {str(e)}")
+            try:
+                return runnable_for(self.model_alt).invoke(*args, **kwargs)
+            except Exception as e:
+                print(f"Error occurred in fallback model: {str(e)}")
+                raise e
+
+    async def ainvoke_with_fallback(self, *args, runnable_for=None, **kwargs):
+        """Async counterpart of invoke_with_fallback using ainvoke."""
+        runnable_for = runnable_for or (lambda model: model)
+        try:
+            return await runnable_for(self.model).ainvoke(*args, **kwargs)
+        except Exception as e:
+            print(f"Falling back to alternate model: {str(e)}")
+            try:
+                return await runnable_for(self.model_alt).ainvoke(*args, **kwargs)
+            except Exception as e:
+                print(f"Error occurred in fallback model: {str(e)}")
+                raise e
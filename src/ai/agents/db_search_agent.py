@@ -1,11 +1,11 @@
 from .base_agent import BaseAgent
 from src.ai.ai_schemas.structured_responses import DBSearchOutput
-# from src.ai.tools.internal_db_tools import  search_qdrant_tool
+from src.ai.tools.internal_db_tools import search_qdrant_tool
 from src.ai.agent_prompts.db_search_agent import SYSTEM_PROMPT
 from typing import Dict, Any, Literal
 from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.prebuilt import create_react_agent
-from .utils import get_context_based_answer_prompt, get_context_messages
+from .utils import get_context_based_answer_prompt, get_context_messages, exclude_messages
 from langgraph.types import Command
 from src.ai.llm.model import get_llm, get_llm_alt
 from src.ai.llm.config import DBSearchConfig
@@ -18,8 +18,7 @@ class DBSearchAgent(BaseAgent):
         super().__init__()
         self.model = get_llm(dbc.MODEL, dbc.TEMPERATURE)
         self.model_alt = get_llm_alt(dbc.ALT_MODEL, dbc.ALT_TEMPERATURE)
-        # self.tools = [search_qdrant_tool]
-        self.tools = []
+        self.tools = [search_qdrant_tool]
         self.response_schema = DBSearchOutput
         self.system_prompt = SYSTEM_PROMPT
 
@@ -39,9 +38,8 @@ class DBSearchAgent(BaseAgent):
 
         return input_prompt
 
-    def __call__(self, state: Dict[str, Any]) -> Command[Literal["Planner Agent", "Manager Agent", "Validation Agent"]]:
+    def prepare_input(self, state: Dict[str, Any]):
         input_prompt = self.format_input_prompt(state)
-        system_message = SystemMessage(content=self.system_prompt)
         human_message = HumanMessage(content=input_prompt)
         task = state['current_task'].copy()
         
@@ -50,23 +48,12 @@ class DBSearchAgent(BaseAgent):
             context_messages = get_context_messages(task['required_context'], state['task_list'])
         
         input = {"messages": context_messages + [human_message]}
-        try:
-            agent = create_react_agent(model=self.model, tools=self.tools, prompt=system_message)
-            communication_log = agent.invoke(input)
-
-        except Exception as e:
-            print(f"Falling back to alternate model: {str(e)}")
-            try:
-                agent = create_react_agent(model=self.model_alt, tools=self.tools, prompt=system_message)
-                communication_log = agent.invoke(input)
 
-            except Exception as e:
-                print(f"Error occurred in fallback model: {str(e)}")
-                raise e
+        return task, context_messages, input
 
+    def build_update(self, state: Dict[str, Any], task: Dict[str, Any], context_messages: list, communication_log: Dict[str, Any]) -> Command[Literal["Planner Agent", "Manager Agent", "Validation Agent"]]:
         message_history = communication_log['messages']
-        filtered_message_history = [
-            msg for msg in message_history if msg not in context_messages]
+        filtered_message_history = exclude_messages(message_history, context_messages)
         task['task_messages'] = filtered_message_history
 
         agent_name = "Task Router"
@@ -81,3 +68,18 @@ class DBSearchAgent(BaseAgent):
             }
         )
 
+    def __call__(self, state: Dict[str, Any]) -> Command[Literal["Planner Agent", "Manager Agent", "Validation Agent"]]:
+        task, context_messages, input = self.prepare_input(state)
+
+        communication_log = self.invoke_with_fallback(
+            input, runnable_for=self.react_agent)
+
+        return self.build_update(state, task, context_messages, communication_log)
+
+    async def acall(self, state: Dict[str, Any]) -> Command[Literal["Planner Agent", "Manager Agent", "Validation Agent"]]:
+        task, context_messages, input = self.prepare_input(state)
+
+        communication_log = await self.ainvoke_with_fallback(
+            input, runnable_for=self.react_agent)
+
+        return self.build_update(state, task, context_messages, communication_log)
@@ -36,23 +36,24 @@ class ExecutorAgent(BaseAgent):
         print("----Executor Input----\n", input_prompt, "\n----Executor Input End----")
         return input_prompt
 
-    def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    def prepare_input(self, state: Dict[str, Any]):
         input_prompt = self.format_input_prompt(state)
         system_message = SystemMessage(content=self.system_prompt)
         human_message = HumanMessage(content=input_prompt)
 
-        try:
-            response = self.model.invoke(
-                input=[system_message, human_message], response_format=self.response_schema)
-        except Exception as e:
-            print(f"Falling back to alternate model: {str(e)}")
-            try:
-                response = self.model_alt.invoke(
-                    input=[system_message, human_message], response_format=self.response_schema)
-            except Exception as e:
-                print(f"Error occurred in fallback model: {str(e)}")
-                raise e
+        return human_message, [system_message, human_message]
+
+    def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        human_message, messages = self.prepare_input(state)
+        response = self.invoke_with_fallback(input=messages, response_format=self.response_schema)
+        return self.build_update(human_message, response)
+
+    async def acall(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        human_message, messages = self.prepare_input(state)
+        response = await self.ainvoke_with_fallback(input=messages, response_format=self.response_schema)
+        return self.build_update(human_message, response)
 
+    def build_update(self, human_message: HumanMessage, response) -> Dict[str, Any]:
         task_list = json.loads(response.content)
 
         # map_task = {
@@ -7,12 +7,19 @@ from langgraph.prebuilt import create_react_agent
 from src.ai.llm.model import get_llm, get_llm_alt
 from src.ai.llm.config import FastAgentConfig, CountUsageMetricsPricingConfig
 from langgraph.types import Command
-from src.backend.utils.utils import get_date_time, format_fast_agent_update, PRICING, get_user_metadata
+from src.backend.utils.utils import get_date_time, format_fast_agent_update, get_user_metadata, get_unique_response_id
 import asyncio
+import hashlib
+import json
+import os
+import re
 import src.backend.db.mongodb as mongodb
 import time
-from src.backend.utils.api_utils import check_stop_conversation
+from src.backend.utils.api_utils import check_stop_conversation, redis_manager
+from src.backend.utils.metrics import latency_callback
+from src.backend.utils.usage import UsageTracker
 from src.ai.agents.utils import get_related_queries_util
+from src.ai.agents.history import HISTORY_TOKEN_BUDGETS, attach_turn_summaries, compact_history, summarize_turn_later
 import traceback
 from src.ai.agent_prompts.fast_agent import SYSTEM_PROMPT
 
@@ -22,6 +29,52 @@ cmp = CountUsageMetricsPricingConfig()
 llm = get_llm(fc.MODEL, fc.TEMPERATURE, fc.MAX_TOKENS)
 llm_alt = get_llm_alt(fc.ALT_MODEL, fc.ALT_TEMPERATURE, fc.ALT_MAX_TOKENS)
 
+FAST_AGENT_TOOLS = [advanced_internet_search, get_stock_data, search_company_info]
+
+# Compiled once at import and reused by every fast-mode request.
+fast_agent = create_react_agent(model=llm, tools=FAST_AGENT_TOOLS, prompt=SystemMessage(content=SYSTEM_PROMPT))
+
+
+FAST_AGENT_CACHE_ENABLED = os.getenv("FAST_AGENT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+FAST_AGENT_CACHE_WINDOW = int(os.getenv("FAST_AGENT_CACHE_WINDOW", "300"))
+
+
+def normalize_fast_query(user_query: str) -> str:
+    query = re.sub(r"\s+", " ", user_query.strip().lower())
+    return query.rstrip("?!. ")
+
+
+def fast_agent_cache_key(user_query: str, timezone: str) -> str:
+    """
+    Key on the normalized query, the user's location bucket and the current
+    freshness window, so an entry is only shared within FAST_AGENT_CACHE_WINDOW seconds.
+    """
+    window = int(time.time() // FAST_AGENT_CACHE_WINDOW)
+    digest = hashlib.sha256(f"{normalize_fast_query(user_query)}|{timezone}".encode("utf-8")).hexdigest()
+    return f"fast_agent_cache:{window}:{digest}"
+
+
+def is_fast_query_cacheable(prev_message_id: str, doc_ids: Optional[list[str]], realtime_info: bool) -> bool:
+    # Follow-ups and document questions depend on per-user context, realtime queries must stay fresh.
+    return FAST_AGENT_CACHE_ENABLED and not realtime_info and not prev_message_id and not doc_ids
+
+
+async def get_cached_fast_response(cache_key: str) -> Optional[dict]:
+    try:
+        cached = await redis_manager.safe_execute("get", cache_key)
+        return json.loads(cached) if cached else None
+    except Exception as e:
+        print(f"Error reading fast agent cache: {str(e)}")
+        return None
+
+
+async def cache_fast_response(cache_key: str, events: list, custom_sources: list):
+    try:
+        payload = json.dumps({"events": events, "custom_sources": custom_sources}, default=str)
+        await redis_manager.safe_execute("set", cache_key, payload, ex=FAST_AGENT_CACHE_WINDOW)
+    except Exception as e:
+        print(f"Error writing fast agent cache: {str(e)}")
+
 
 async def format_fast_agent_input_prompt(user_query: str, session_id: str, prev_message_id: str, timezone: str, ip_address: str = "", doc_ids: Optional[list[str]] = None) -> str:
     input_prompt = ""
@@ -39,7 +92,7 @@ async def format_fast_agent_input_prompt(user_query: str, session_id: str, prev_
     input_prompt += f"\n{await asyncio.to_thread(get_user_metadata, timezone, ip_address)}\n\n"
 
     if prev_message_id:
-        previous_message_pairs = prev_session_data.get('messages', [])
+        previous_message_pairs = compact_history(await attach_turn_summaries(prev_session_data.get('messages', [])), HISTORY_TOKEN_BUDGETS['fast_agent'])
         if previous_message_pairs != []:
             for msg in previous_message_pairs:
                 history.append(HumanMessage(content="### User Query: " + msg[0]))
@@ -49,13 +102,13 @@ async def format_fast_agent_input_prompt(user_query: str, session_id: str, prev_
     return history
 
 
-async def process_fast_agent_input(user_id: str, session_id: str, user_query: str, message_id: str, prev_message_id: str, timezone: str = "UTC", ip_address: str = "", doc_ids: Optional[list[str]] = []):
+async def process_fast_agent_input(user_id: str, session_id: str, user_query: str, message_id: str, prev_message_id: str, timezone: str = "UTC", ip_address: str = "", doc_ids: Optional[list[str]] = [], realtime_info: bool = False):
     """
     Process the user's input and generate a response using the Insight Agent.
     """
     start_time = time.monotonic()
     sources_for_message = []
-    query_metadata = {'input_tokens': 0, 'output_tokens': 0, 'total_tokens': 0, 'token_cost': 0.0}
+    usage_tracker = UsageTracker(agent_name="Fast Agent")
     final_response_content = ""
     stopTime = time.time()
 
@@ -77,30 +130,20 @@ async def process_fast_agent_input(user_id: str, session_id: str, user_query: st
 
 
     def count_usage_metrics(token_usage):
-
-
-        model = token_usage.get(get_llm(cmp.MODEL))
-        pricing = PRICING.get(model, PRICING.get[cmp.MODEL])
-
-        input_cost = pricing["input"] * token_usage.get("input_tokens", 0)
-        output_cost = pricing["output"] * token_usage.get("output_tokens", 0)
-        total_cost = input_cost + output_cost
-
-        query_metadata["input_tokens"] += token_usage.get("input_tokens", 0)
-        query_metadata["output_tokens"] += token_usage.get("output_tokens", 0)
-        query_metadata["total_tokens"] += token_usage.get("total_tokens", 0)
-        query_metadata["token_cost"] += total_cost
-
+        usage_tracker.record(
+            "Fast Agent",
+            token_usage.get('model', fc.MODEL),
+            token_usage.get("input_tokens", 0),
+            token_usage.get("output_tokens", 0),
+            token_usage.get("total_tokens"),
+        )
 
     yield {"start_stream": str(message_id)}
     
     try:
-        system_msg = SystemMessage(content=SYSTEM_PROMPT)
-        input_messages = await format_fast_agent_input_prompt(user_query, session_id, prev_message_id, timezone, ip_address, doc_ids)
-        
-        # agent = create_react_agent(model=llm, tools=[advanced_internet_search, get_stock_data, search_qdrant_tool, search_company_info], prompt=system_msg)
-        agent = create_react_agent(model=llm, tools=[advanced_internet_search, get_stock_data, search_company_info], prompt=system_msg)
-        
+        cache_key = fast_agent_cache_key(user_query, timezone) if is_fast_query_cacheable(prev_message_id, doc_ids, realtime_info) else None
+        cached_response = await get_cached_fast_response(cache_key) if cache_key else None
+
         input_data = {
             'user_query': user_query,
             'doc_ids': doc_ids if doc_ids else [],
@@ -110,41 +153,72 @@ async def process_fast_agent_input(user_id: str, session_id: str, user_query: st
         yield {"message_logs": message_logs}
         await mongodb.store_user_query(user_id, session_id, message_id, user_query, timezone, doc_ids)
 
-        async for stream_mode, update in agent.astream(input={"messages": input_messages}, stream_mode=['updates', 'messages', 'custom'], config={'recursion_limit': 50}):
-            if stream_mode == 'updates':
-                print("---\n", update, "\n---")
-                message_logs = f"AGENT UPDATE\n{str((stream_mode, update))}\n\n"
-                yield {"message_logs": message_logs}
-            
-            if stream_mode == 'custom':
-                print("---\n", update, "\n---")
-                if 'source_update' in update:
-                    sources_for_message.extend(update['source_update'])
-            # if stopTime + 3 < time.time():
-            #     stop_processing = await check_stop_conversation(session_id, message_id)
-            #     if stop_processing:
-            #         raise RuntimeError("User stopped query processing.")
-            #     stopTime = time.time()
-            
-            msg_to_yield = await format_fast_agent_update(stream_mode, update)
-
-            if msg_to_yield:
-                message_logs = f"FORMATTED MESSAGE\n{str(msg_to_yield)}\n\n"
-                yield {"message_logs": message_logs}
-
-            if isinstance(msg_to_yield, list):
-                for m_item in msg_to_yield:
-                    if 'token_usage' in m_item:
-                        count_usage_metrics(m_item['token_usage'])
-                    else:
-                        yield m_item
-
-                        yield {"enriched_content": store_current_message(m_item)}
-                        if 'sources' in m_item:
-                            sources_for_message.extend(m_item['sources'])
-                            
-                        if 'response' in m_item:
-                            final_response_content = m_item['response']
+        if cached_response:
+            print(f"Fast agent cache hit: {cache_key}")
+            yield {"message_logs": f"CACHE HIT\n{cache_key}\n\n"}
+            sources_for_message.extend(cached_response.get('custom_sources', []))
+
+            for m_item in cached_response.get('events', []):
+                if 'id' in m_item:
+                    m_item = {**m_item, 'id': get_unique_response_id()}
+                if 'response' in m_item:
+                    # The live answer reaches the client as response-chunk events; replay it the same way.
+                    yield {'type': 'response-chunk', 'agent_name': m_item.get('agent_name'), 'content': m_item['response'], 'id': m_item['id']}
+                    final_response_content = m_item['response']
+                else:
+                    yield m_item
+
+                yield {"enriched_content": store_current_message(m_item)}
+
+        else:
+            input_messages = await format_fast_agent_input_prompt(user_query, session_id, prev_message_id, timezone, ip_address, doc_ids)
+            agent = fast_agent
+            streamed_events = []
+            custom_sources = []
+
+            async for stream_mode, update in agent.astream(input={"messages": input_messages}, stream_mode=['updates', 'messages', 'custom'], config={'recursion_limit': 50, 'callbacks': [latency_callback, usage_tracker]}):
+                if stream_mode == 'updates':
+                    print("---\n", update, "\n---")
+                    message_logs = f"AGENT UPDATE\n{str((stream_mode, update))}\n\n"
+                    yield {"message_logs": message_logs}
+                
+                if stream_mode == 'custom':
+                    print("---\n", update, "\n---")
+                    if 'source_update' in update:
+                        sources_for_message.extend(update['source_update'])
+                        custom_sources.extend(update['source_update'])
+                # if stopTime + 3 < time.time():
+                #     stop_processing = await check_stop_conversation(session_id, message_id)
+                #     if stop_processing:
+                #         raise RuntimeError("User stopped query processing.")
+                #     stopTime = time.time()
+                
+                msg_to_yield = await format_fast_agent_update(stream_mode, update)
+
+                if msg_to_yield:
+                    message_logs = f"FORMATTED MESSAGE\n{str(msg_to_yield)}\n\n"
+                    yield {"message_logs": message_logs}
+
+                if isinstance(msg_to_yield, list):
+                    for m_item in msg_to_yield:
+                        if 'token_usage' in m_item:
+                            count_usage_metrics(m_item['token_usage'])
+                        else:
+                            yield m_item
+                            # Replayable on a cache hit: typed events (research, stock_data) and the final
+                            # answer. Chunks are replaced by the answer; raw tool output is not sent to clients.
+                            if ('type' in m_item and not m_item['type'].endswith('chunk')) or 'response' in m_item:
+                                streamed_events.append(m_item)
+
+                            yield {"enriched_content": store_current_message(m_item)}
+                            if 'sources' in m_item:
+                                sources_for_message.extend(m_item['sources'])
+                                
+                            if 'response' in m_item:
+                                final_response_content = m_item['response']
+
+            if cache_key and final_response_content:
+                await cache_fast_response(cache_key, streamed_events, custom_sources)
 
         end_time = time.monotonic()
         duration_seconds = end_time - start_time
@@ -157,6 +231,7 @@ async def process_fast_agent_input(user_id: str, session_id: str, user_query: st
         yield time_event
 
         await mongodb.update_session_history_in_db(session_id, user_id, message_id, user_query, final_response_content, doc_ids, local_time, timezone)
+        summarize_turn_later(user_query, final_response_content)
 
         final_data_event = {'state': "completed_from_graph"}
 
@@ -171,7 +246,7 @@ async def process_fast_agent_input(user_id: str, session_id: str, user_query: st
 
         yield final_data_event
 
-        yield {"store_data": {}, 'notification': True, 'suggestions': True, 'retry': True}
+        yield {"store_data": {"metadata": usage_tracker.summary(), "usage": usage_tracker.client_summary()}, 'notification': True, 'suggestions': True, 'retry': True}
 
     except Exception as e:
         error_msg = f"Error in agent processing: {traceback.format_exc()}"
@@ -185,7 +260,7 @@ async def process_fast_agent_input(user_id: str, session_id: str, user_query: st
             await mongodb.update_session_history_in_db(session_id, user_id, message_id, user_query, final_response_content or error_msg, doc_ids, local_time, timezone)
 
         yield {"enriched_content": store_current_message(error_event)}
-        yield {"store_data": {}, 'notification': False, 'suggestions': False, 'retry': True}
+        yield {"store_data": {"metadata": usage_tracker.summary(), "usage": usage_tracker.client_summary()}, 'notification': False, 'suggestions': False, 'retry': True}
 
     finally:
         pass
@@ -0,0 +1,162 @@
+"""
+Token-budgeted conversation history for agent prompts.
+
+previous_messages holds [user_query, response] pairs (optionally with a cached
+summary as a third element). compact_history keeps the latest HISTORY_KEEP_RECENT
+turns verbatim (each capped to a share of the budget) and replaces older turns
+with their summary, dropping the oldest
+turns once an agent's budget is spent, so prompt size stays bounded however long
+the session runs.
+
+Summaries are produced once per turn, in the background right after a response is
+stored (summarize_turn_later), and cached in Redis by a hash of the turn. A turn
+whose summary is not ready yet falls back to a cheap extractive summary.
+"""
+import asyncio
+import hashlib
+import os
+import re
+from typing import Dict, List, Optional
+
+from src.ai.llm.config import HistorySummaryConfig
+from src.ai.llm.model import get_llm
+from src.backend.utils.api_utils import redis_manager
+
+hsc = HistorySummaryConfig()
+
+HISTORY_KEEP_RECENT = int(os.getenv("HISTORY_KEEP_RECENT", "2"))
+HISTORY_SUMMARY_TOKENS = int(os.getenv("HISTORY_SUMMARY_TOKENS", "250"))
+HISTORY_SUMMARY_TTL = int(os.getenv("HISTORY_SUMMARY_TTL", str(30 * 24 * 3600)))
+# Responses shorter than this are cheaper to keep than to summarize.
+HISTORY_SUMMARY_MIN_TOKENS = int(os.getenv("HISTORY_SUMMARY_MIN_TOKENS", "400"))
+
+HISTORY_TOKEN_BUDGETS: Dict[str, int] = {
+    "intent_detector": int(os.getenv("HISTORY_BUDGET_INTENT_DETECTOR", "1500")),
+    "planner": int(os.getenv("HISTORY_BUDGET_PLANNER", "3000")),
+    "manager": int(os.getenv("HISTORY_BUDGET_MANAGER", "3000")),
+    "response_generator": int(os.getenv("HISTORY_BUDGET_RESPONSE_GENERATOR", "5000")),
+    "fast_agent": int(os.getenv("HISTORY_BUDGET_FAST_AGENT", "3000")),
+}
+
+_BLOCK_PATTERN = re.compile(r"```.*?(```|<END_OF_GRAPH>)|<iframe.*?</iframe>|^\|.*\|$", re.DOTALL | re.MULTILINE)
+_pending_summaries = set()
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting and needs no tokenizer.
+    return (len(text or "") + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[:max(max_tokens - 1, 0) * 4]
+    return cut[:cut.rfind(" ")] + " ..." if " " in cut else cut
+
+
+def extractive_summary(response: str, max_tokens: int = HISTORY_SUMMARY_TOKENS) -> str:
+    """Headings and leading sentences of the response with charts, code and tables removed."""
+    text = _BLOCK_PATTERN.sub("", response or "")
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line)
+        if used + cost > max_tokens:
+            if not kept:
+                kept.append(truncate_to_tokens(line, max_tokens))
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+def turn_key(user_query: str, response: str) -> str:
+    digest = hashlib.sha256(f"{user_query}\x00{response}".encode("utf-8")).hexdigest()
+    return f"history_summary:{digest}"
+
+
+def compact_history(previous_messages: list, budget: int, keep_recent: int = HISTORY_KEEP_RECENT) -> List[list]:
+    """Returns [user_query, response] pairs, oldest first, that fit in `budget` estimated tokens."""
+    compacted = []
+    remaining = budget
+    # A single long recent answer must not crowd out every older turn.
+    recent_cap = budget // (keep_recent + 1)
+    for age, message in enumerate(reversed(previous_messages or [])):
+        user_query, response = message[0], message[1]
+        summary = message[2] if len(message) > 2 else None
+        query_cost = estimate_tokens(user_query)
+        if remaining <= query_cost:
+            break
+
+        if age < keep_recent:
+            text = truncate_to_tokens(response, recent_cap)
+        elif estimate_tokens(response) <= HISTORY_SUMMARY_MIN_TOKENS:
+            text = response
+        else:
+            text = summary or extractive_summary(response)
+            text = f"(summary of an earlier response) {text}"
+
+        text = truncate_to_tokens(text, remaining - query_cost)
+        compacted.append([user_query, text])
+        remaining -= query_cost + estimate_tokens(text)
+
+    compacted.reverse()
+    return compacted
+
+
+def history_for(state: dict, agent: str) -> List[list]:
+    return compact_history(state.get('previous_messages') or [], HISTORY_TOKEN_BUDGETS[agent])
+
+
+async def attach_turn_summaries(messages: list) -> List[list]:
+    """Adds the cached summary (or None) of each turn as a third element."""
+    if not messages:
+        return []
+    try:
+        summaries = await redis_manager.safe_execute("mget", [turn_key(m[0], m[1]) for m in messages])
+    except Exception as e:
+        print(f"Error reading history summaries: {str(e)}")
+        summaries = [None] * len(messages)
+    return [[m[0], m[1], summary] for m, summary in zip(messages, summaries)]
+
+
+async def summarize_turn(user_query: str, response: str) -> Optional[str]:
+    if estimate_tokens(response) <= HISTORY_SUMMARY_MIN_TOKENS:
+        return None
+    key = turn_key(user_query, response)
+    if await redis_manager.safe_execute("exists", key):
+        return None
+
+    prompt = f"""Summarize the assistant's answer below so it can serve as conversation history for follow-up questions.
+Keep every concrete fact a follow-up may refer to: company names, tickers, figures, dates, conclusions and recommendations.
+Drop charts, formatting and filler. Answer in at most {HISTORY_SUMMARY_TOKENS} words of plain text.
+
+User question: {user_query}
+
+Assistant answer:
+{response}
+"""
+    try:
+        model = get_llm(model_name=hsc.MODEL, temperature=hsc.TEMPERATURE, max_tokens=hsc.MAX_TOKENS)
+        output = await model.ainvoke(input=prompt)
+    except Exception as e:
+        print(f"Falling back to alternate model: {str(e)}")
+        model = get_llm(model_name=hsc.ALT_MODEL, temperature=hsc.ALT_TEMPERATURE, max_tokens=hsc.MAX_TOKENS)
+        output = await model.ainvoke(input=prompt)
+
+    summary = truncate_to_tokens(str(output.content).strip(), HISTORY_SUMMARY_TOKENS * 2)
+    await redis_manager.safe_execute("set", key, summary, ex=HISTORY_SUMMARY_TTL)
+    return summary
+
+
+def summarize_turn_later(user_query: str, response: str):
+    """Schedules summarize_turn off the response path; failures only cost the extractive fallback."""
+    async def run():
+        try:
+            await summarize_turn(user_query, response)
+        except Exception as e:
+            print(f"Error summarizing conversation turn: {str(e)}")
+
+    task = asyncio.create_task(run())
+    _pending_summaries.add(task)
+    task.add_done_callback(_pending_summaries.discard)
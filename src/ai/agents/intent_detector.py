@@ -1,16 +1,77 @@
 from .base_agent import BaseAgent
 from src.ai.ai_schemas.structured_responses import IntentDetection
 from src.ai.agent_prompts.intent_detector import SYSTEM_PROMPT
-from typing import Dict, Any, Literal
+from typing import Dict, Any, Literal, Optional
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 from langgraph.types import Command
 from langgraph.graph import END
+from collections import OrderedDict
+import hashlib
 import json
+import os
+import re
+import threading
+import time
 from src.ai.llm.model import get_llm, get_llm_alt
 from src.ai.llm.config import IntentDetectionConfig
+from src.ai.agents.history import history_for
 
 cfg = IntentDetectionConfig()
 
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", "2048"))
+INTENT_CACHE_TTL = float(os.getenv("INTENT_CACHE_TTL", "900"))
+
+
+class IntentCache:
+    """
+    In-process TTL/LRU cache of IntentDetection JSON for standalone queries
+    (no conversation history, uploaded documents or files).
+    """
+
+    def __init__(self, max_size: int = INTENT_CACHE_SIZE, ttl: float = INTENT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def metadata_bucket(user_metadata: str) -> str:
+        # The metadata block embeds the current datetime; only the location part is stable.
+        match = re.search(r"location details:\s*(\{.*?\})", user_metadata or "")
+        return match.group(1) if match else ""
+
+    def key_for(self, state: Dict[str, Any]) -> Optional[str]:
+        if any(state.get(field) for field in ('previous_messages', 'doc_ids', 'prev_doc_ids', 'file_path', 'file_content')):
+            return None
+        raw = f"{state['user_query'].strip()}|{self.metadata_bucket(state.get('user_metadata', ''))}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: Optional[str]) -> Optional[str]:
+        if key is None or self.max_size <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, content = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return content
+
+    def put(self, key: Optional[str], content: str):
+        if key is None or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), content)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+intent_cache = IntentCache()
+
 
 class IntentDetector(BaseAgent):
     def __init__(self):
@@ -38,7 +99,7 @@ class IntentDetector(BaseAgent):
         input_prompt += f"\n{state['user_metadata']}\n\n"
 
         if state.get('previous_messages'):
-            for msg in state['previous_messages'] :
+            for msg in history_for(state, 'intent_detector'):
                 history.append(HumanMessage(content="### User Query: " + msg[0]))
                 history.append(AIMessage(content=msg[1]))
 
@@ -47,23 +108,42 @@ class IntentDetector(BaseAgent):
         history.append(HumanMessage(content=input_prompt))
         return history
 
-    def __call__(self, state: Dict[str, Any]) -> Command[Literal["Manager Agent", "Planner Agent", "DB Search Agent", "__end__"]]:
+    def prepare_input(self, state: Dict[str, Any]) -> list:
         history = self.format_input_prompt(state)
-        messages = [SystemMessage(content=self.system_prompt)] + history
-
-        try:
-            output = self.model.invoke(input=messages, response_format=self.response_schema)
-            # print("From Inside Intent Detector")
-            # print(f"input to llm = \n{messages}\n")
-            # print(f"output of llm = \n{output}\n")
-        except Exception as e:
-            print(f"Falling back to alternate model: {str(e)}")
-            try:
-                output = self.model_alt.invoke(input=messages, response_format=self.response_schema)
-            except Exception as e:
-                print(f"Error occurred in fallback model: {str(e)}")
-                raise e
+        return [SystemMessage(content=self.system_prompt)] + history
+
+    def cached_output(self, cache_key: Optional[str]) -> Optional[AIMessage]:
+        content = intent_cache.get(cache_key)
+        if content is None:
+            return None
+        print(f"Intent detection cache hit: {cache_key}")
+        return AIMessage(content=content)
+
+    def __call__(self, state: Dict[str, Any]) -> Command[Literal["Manager Agent", "Planner Agent", "DB Search Agent", "__end__"]]:
+        cache_key = intent_cache.key_for(state)
+        output = self.cached_output(cache_key)
+        if output is not None:
+            return self.build_update(state, output)
+
+        output = self.invoke_with_fallback(input=self.prepare_input(state), response_format=self.response_schema)
+        update = self.build_update(state, output)
+        # Only cache outputs that parsed cleanly in build_update.
+        intent_cache.put(cache_key, output.content)
+        return update
+
+    async def acall(self, state: Dict[str, Any]) -> Command[Literal["Manager Agent", "Planner Agent", "DB Search Agent", "__end__"]]:
+        cache_key = intent_cache.key_for(state)
+        output = self.cached_output(cache_key)
+        if output is not None:
+            return self.build_update(state, output)
+
+        output = await self.ainvoke_with_fallback(input=self.prepare_input(state), response_format=self.response_schema)
+        update = self.build_update(state, output)
+        # Only cache outputs that parsed cleanly in build_update.
+        intent_cache.put(cache_key, output.content)
+        return update
 
+    def build_update(self, state: Dict[str, Any], output) -> Command[Literal["Manager Agent", "Planner Agent", "DB Search Agent", "__end__"]]:
         response = json.loads(output.content)
         print(f"response from llm (json.loads(output.content)) = \n{response}\n")
 
@@ -5,6 +5,7 @@ from langchain_core.messages import HumanMessage, SystemMessage, AIMessage, Base
 import json
 from src.ai.llm.model import get_llm, get_llm_groq
 from src.ai.llm.config import ManagerConfig
+from src.ai.agents.history import history_for
 from langgraph.types import Command
 from langgraph.graph import END
 import re
@@ -32,7 +33,7 @@ class ManagerAgent(BaseAgent):
        if state.get('previous_messages') and not state.get('current_task'):
            input_prompt += f"The Latest User Query may be based on the previous queries and their responses generated by collaboration of Agents. So use these Q&A as context to generate latest tasks.\n"
            # input_prompt += f"The Latest User Query may be based on the previous queries. So use them as context to handle the latest query.\n"
-           msg_hist = "\n".join([f"- Query: {msg[0]}\n- Response: {msg[1]}\n" for msg in state['previous_messages']])
+           msg_hist = "\n".join([f"- Query: {msg[0]}\n- Response: {msg[1]}\n" for msg in history_for(state, 'manager')])
            input_prompt += f"Here is the list of messages from oldest to latest:\n{msg_hist}\n\n"
 
 
@@ -152,23 +153,27 @@ class ManagerAgent(BaseAgent):
        return thinking_process, json_dict
 
 
-   def __call__(self, state: Dict[str, Any]) -> Dict[str, Any] | Command[Literal["Web Search Agent", "Social Media Scrape Agent", "Finance Data Agent", "Coding Agent", "Response Generator Agent", "__end__"]]:
+   def prepare_input(self, state: Dict[str, Any]):
        input_prompt = self.format_input_prompt(state)
        system_message = SystemMessage(content=self.system_prompt)
        human_message = HumanMessage(content=input_prompt)
 
+       return human_message, [system_message, human_message]
 
-       try:
-           response = self.model.invoke(input=[system_message, human_message])
-       except Exception as e:
-           print(f"Falling back to alternate model: {str(e)}")
-           try:
-               response = self.model_alt.invoke(input=[system_message, human_message])
-           except Exception as e:
-               print(f"Error occurred in fallback model: {str(e)}")
-               raise e
+
+   def __call__(self, state: Dict[str, Any]) -> Dict[str, Any] | Command[Literal["Web Search Agent", "Social Media Scrape Agent", "Finance Data Agent", "Coding Agent", "Response Generator Agent", "__end__"]]:
+       human_message, messages = self.prepare_input(state)
+       response = self.invoke_with_fallback(input=messages)
+       return self.build_update(state, human_message, response)
+
+
+   async def acall(self, state: Dict[str, Any]) -> Dict[str, Any] | Command[Literal["Web Search Agent", "Social Media Scrape Agent", "Finance Data Agent", "Coding Agent", "Response Generator Agent", "__end__"]]:
+       human_message, messages = self.prepare_input(state)
+       response = await self.ainvoke_with_fallback(input=messages)
+       return self.build_update(state, human_message, response)
 
 
+   def build_update(self, state: Dict[str, Any], human_message: HumanMessage, response) -> Dict[str, Any] | Command[Literal["Web Search Agent", "Social Media Scrape Agent", "Finance Data Agent", "Coding Agent", "Response Generator Agent", "__end__"]]:
        thinking, task_json = self.extract_thinking_and_json(response.content)
 
 
@@ -32,30 +32,18 @@ class MapAgent(BaseAgent):
 
         return input_prompt
 
-    def __call__(self, state: Dict[str, Any]) -> Command[Literal["Manager Agent", "Task Router"]]:
+    def prepare_input(self, state: Dict[str, Any]):
         task = state['current_task'].copy()
 
         input_prompt = self.format_input_prompt(state)
-        system_message = SystemMessage(content=self.system_prompt)
         human_message = HumanMessage(content=input_prompt)
 
 
         agent_input = {"messages": [human_message]}
 
-        try:
-            agent = create_react_agent(model=self.model, tools=self.tools, response_format=self.response_schema, prompt=system_message)
-            communication_log = agent.invoke(agent_input)
-
-        except Exception as e:
-            print(f"Falling back to alternate model: {str(e)}")
-            try:
-                agent = create_react_agent(model=self.model_alt, tools=self.tools, response_format=self.response_schema, prompt=system_message)
-                communication_log = agent.invoke(agent_input)
-
-            except Exception as e:
-                print(f"Error occurred in fallback model: {str(e)}")
-                raise e
+        return task, agent_input
 
+    def build_update(self, state: Dict[str, Any], task: Dict[str, Any], communication_log: Dict[str, Any]) -> Command[Literal["Manager Agent", "Task Router"]]:
         message_history = communication_log['messages']
         task['task_messages'] = communication_log['structured_response'].model_dump()
 
@@ -71,3 +59,22 @@ class MapAgent(BaseAgent):
                 "current_task": task
             }
         )
+
+    def build_react_agent(self, model):
+        return create_react_agent(model=model, tools=self.tools, response_format=self.response_schema, prompt=SystemMessage(content=self.system_prompt))
+
+    def __call__(self, state: Dict[str, Any]) -> Command[Literal["Manager Agent", "Task Router"]]:
+        task, agent_input = self.prepare_input(state)
+
+        communication_log = self.invoke_with_fallback(
+            agent_input, runnable_for=self.react_agent)
+
+        return self.build_update(state, task, communication_log)
+
+    async def acall(self, state: Dict[str, Any]) -> Command[Literal["Manager Agent", "Task Router"]]:
+        task, agent_input = self.prepare_input(state)
+
+        communication_log = await self.ainvoke_with_fallback(
+            agent_input, runnable_for=self.react_agent)
+
+        return self.build_update(state, task, communication_log)
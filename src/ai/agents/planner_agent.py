@@ -8,6 +8,7 @@ import json
 import re
 from src.ai.llm.model import get_llm, get_llm_alt
 from src.ai.llm.config import PlannerConfig
+from src.ai.agents.history import history_for
 
 pac = PlannerConfig()
 
@@ -33,7 +34,7 @@ class PlannerAgent(BaseAgent):
 
         if state.get('previous_messages'):
             input_prompt += f"The Latest User Query may be based on the previous queries and their responses. So use these Q&A as context to generate latest tasks.\n"
-            msg_hist = "\n".join([f"Usery Query: {msg[0]}\nAI Response: ```{msg[1]}```\n" for msg in state['previous_messages']])
+            msg_hist = "\n".join([f"Usery Query: {msg[0]}\nAI Response: ```{msg[1]}```\n" for msg in history_for(state, 'planner')])
             input_prompt += f"**Q&A Context**:\n\nHere is the list of messages from oldest to latest:\n{msg_hist}\n--- END of Q&A Context---\n\n"
 
         # input_prompt += f"- {state['currency_rates']}\n"
@@ -66,21 +67,24 @@ class PlannerAgent(BaseAgent):
 
         return thinking_process, json_dict
 
-    def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    def prepare_input(self, state: Dict[str, Any]):
         input_prompt = self.format_input_prompt(state)
         system_message = SystemMessage(content=self.system_prompt)
         human_message = HumanMessage(content=input_prompt)
 
-        try:
-            response = self.model.invoke(input=[system_message, human_message])
-        except Exception as e:
-            print(f"Falling back to alternate model: {str(e)}")
-            try:
-                response = self.model_alt.invoke(input=[system_message, human_message])
-            except Exception as e:
-                print(f"Error occurred in fallback model: {str(e)}")
-                raise e
-            
+        return human_message, [system_message, human_message]
+
+    def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        human_message, messages = self.prepare_input(state)
+        response = self.invoke_with_fallback(input=messages)
+        return self.build_update(state, human_message, response)
+
+    async def acall(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        human_message, messages = self.prepare_input(state)
+        response = await self.ainvoke_with_fallback(input=messages)
+        return self.build_update(state, human_message, response)
+
+    def build_update(self, state: Dict[str, Any], human_message: HumanMessage, response) -> Dict[str, Any]:
         print("========\n", response.content, "\n++++++++")
         thinking, task_json = self.extract_thinking_and_json(response.content)
         print(thinking)
@@ -1,17 +1,89 @@
 from .base_agent import BaseAgent
-from src.ai.agent_prompts.response_generator_agent import SYSTEM_PROMPT
-from typing import Dict, Any
-from langchain_core.messages import HumanMessage, SystemMessage
+from src.ai.agent_prompts.response_generator_agent import SYSTEM_PROMPT, STREAMING_CHART_PROMPT
+from typing import Dict, Any, List, Tuple
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langgraph.config import get_stream_writer
+from langgraph.constants import TAG_NOSTREAM
 from .utils import get_context_messages_for_response
 from src.ai.llm.model import get_llm, get_llm_alt
 from src.ai.llm.config import ReportGenerationConfig
-from src.ai.tools.graph_gen_tool import graph_tool_list
+from src.ai.tools.graph_gen_tool import graph_generation_tool, graph_tool_list
+from src.ai.agents.history import history_for
 from langgraph.prebuilt import create_react_agent
 from datetime import date
+import asyncio
+import os
+import uuid
 
 
 rgc = ReportGenerationConfig()
 
+AGENT_NAME = "Response Generator Agent"
+REPORT_CHART_CONCURRENCY = int(os.getenv("REPORT_CHART_CONCURRENCY", "4"))
+CHART_BLOCK_OPEN = "```chart-data"
+CHART_BLOCK_CLOSE = "```"
+NO_CHART_PREFIX = "No chart generated"
+
+
+def chart_placeholder(chart_id: str) -> str:
+    # An HTML comment renders as nothing until the chart arrives.
+    return f"<!-- chart:{chart_id} -->"
+
+
+def chart_block(tool_output: str) -> str:
+    if not tool_output or tool_output.startswith(NO_CHART_PREFIX):
+        return ""
+    return f"```graph\n{tool_output}\n<END_OF_GRAPH>\n```"
+
+
+class ChartRequestStream:
+    """
+    Splits streamed report text into text and ```chart-data table blocks. Text that
+    could be the start of a block marker is held back until the next chunk decides it.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._in_block = False
+
+    def _held_back(self, marker: str) -> int:
+        for size in range(min(len(marker) - 1, len(self._buffer)), 0, -1):
+            if self._buffer.endswith(marker[:size]):
+                return size
+        return 0
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        self._buffer += text
+        segments = []
+        while True:
+            if not self._in_block:
+                start = self._buffer.find(CHART_BLOCK_OPEN)
+                if start == -1:
+                    keep = self._held_back(CHART_BLOCK_OPEN)
+                    ready = self._buffer[:len(self._buffer) - keep]
+                    if ready:
+                        segments.append(("text", ready))
+                    self._buffer = self._buffer[len(ready):]
+                    return segments
+                if start:
+                    segments.append(("text", self._buffer[:start]))
+                self._buffer = self._buffer[start + len(CHART_BLOCK_OPEN):]
+                self._in_block = True
+            else:
+                end = self._buffer.find(CHART_BLOCK_CLOSE)
+                if end == -1:
+                    return segments
+                segments.append(("chart", self._buffer[:end].strip()))
+                self._buffer = self._buffer[end + len(CHART_BLOCK_CLOSE):]
+                self._in_block = False
+
+    def flush(self) -> List[Tuple[str, str]]:
+        rest, self._buffer = self._buffer, ""
+        if not rest:
+            return []
+        # An unterminated block at the end of the report is still a table to chart.
+        return [("chart" if self._in_block else "text", rest.strip() if self._in_block else rest)]
+
 
 class ReportGenerationAgent(BaseAgent):
     def __init__(self):
@@ -45,7 +117,7 @@ class ReportGenerationAgent(BaseAgent):
         
         if state.get('previous_messages'):
             input_prompt += f"The Latest User Query may be based on the previous queries and their responses.\n"
-            msg_hist = "\n".join([f"Query: {msg[0]}\nResponse: ```{msg[1]}```\n" for msg in state['previous_messages']])
+            msg_hist = "\n".join([f"Query: {msg[0]}\nResponse: ```{msg[1]}```\n" for msg in history_for(state, 'response_generator')])
             input_prompt += f"**Q&A Context**:\n\nHere is the list of messages from oldest to latest:\n{msg_hist}\n--- END of Q&A Context---\n\n"
 
         if state.get('initial_info'):
@@ -55,33 +127,111 @@ class ReportGenerationAgent(BaseAgent):
 
         return input_prompt
 
-    def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        task = state['current_task'].copy()
+    def prepare_input(self, state: Dict[str, Any]):
         # print("--- Start of ReportGenerationAgent ---") #
         # print(f"\n state inside ReportGenerationAgent = {state}\n") #
 
         input_prompt = self.format_input_prompt(state)
-        system_message = SystemMessage(content=self.system_prompt)
         human_message = HumanMessage(content=input_prompt)
 
         input = {"messages": [human_message]}
 
-        try:
-            # response = self.model.invoke(input=[system_message, human_message])
-            agent = create_react_agent(model=self.model, tools=self.tools, prompt=system_message)            
-            response = agent.invoke(input)
-            # print(f"response of report generation agent = {response}.") #
+        return human_message, input
+
+    def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        human_message, input = self.prepare_input(state)
 
-        except Exception as e:
-            print(f"Falling back to alternate model: {str(e)}")
+        response = self.invoke_with_fallback(
+            input, runnable_for=self.react_agent)
+
+        return self.build_update(state, human_message, response)
+
+    async def acall(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        human_message, input = self.prepare_input(state)
+
+        final_response = await self.stream_report(human_message)
+
+        return self.build_update(state, human_message, {"messages": [AIMessage(content=final_response)]})
+
+    async def stream_report(self, human_message: HumanMessage) -> str:
+        """
+        Streams the report to the client as it is generated. Tables the model marks
+        for charting are sent to graph_generation_tool concurrently; each leaves a
+        placeholder in the stream that a later response-chart event fills, and the
+        returned report has every chart in place.
+        """
+        writer = get_stream_writer()
+        stream_id = str(uuid.uuid4())
+        messages = [SystemMessage(content=self.system_prompt + STREAMING_CHART_PROMPT), human_message]
+        semaphore = asyncio.Semaphore(REPORT_CHART_CONCURRENCY)
+        charts: Dict[str, asyncio.Task] = {}
+        filled = set()
+        parts = []
+
+        def emit(payload: Dict[str, Any]):
+            writer({AGENT_NAME: {**payload, "id": stream_id}})
+
+        async def generate_chart(table: str) -> str:
+            async with semaphore:
+                try:
+                    return chart_block(await graph_generation_tool.ainvoke({"table": table}, config={"tags": [TAG_NOSTREAM]}))
+                except Exception as e:
+                    print(f"Error generating chart for report: {str(e)}")
+                    return ""
+
+        def emit_ready_charts():
+            for chart_id, task in charts.items():
+                if chart_id not in filled and task.done():
+                    filled.add(chart_id)
+                    emit({"response_chart": task.result(), "placeholder": chart_placeholder(chart_id)})
+
+        def handle(segments: List[Tuple[str, str]]):
+            for kind, value in segments:
+                if kind == "text":
+                    parts.append(value)
+                    emit({"response_chunk": value})
+                elif value:
+                    chart_id = f"{stream_id}-{len(charts) + 1}"
+                    charts[chart_id] = asyncio.create_task(generate_chart(value))
+                    parts.append(chart_placeholder(chart_id))
+                    emit({"response_chunk": chart_placeholder(chart_id)})
+            emit_ready_charts()
+
+        async def run(model):
+            splitter = ChartRequestStream()
+            async for chunk in model.astream(messages, config={"tags": [TAG_NOSTREAM]}):
+                if isinstance(chunk.content, str) and chunk.content:
+                    handle(splitter.feed(chunk.content))
+            handle(splitter.flush())
+
+        try:
             try:
-                agent = create_react_agent(
-                    model=self.model_alt, tools=self.tools, prompt=system_message)
-                response = agent.invoke(input)
+                await run(self.model)
             except Exception as e:
-                print(f"Error occurred in fallback model: {str(e)}")
-                raise e
+                # Once text has reached the client a retry would repeat it; only fall back before that.
+                if parts:
+                    raise e
+                print(f"Falling back to alternate model: {str(e)}")
+                await run(self.model_alt)
+
+            if charts:
+                await asyncio.gather(*charts.values())
+                emit_ready_charts()
+
+            report = "".join(parts)
+            for chart_id, task in charts.items():
+                report = report.replace(chart_placeholder(chart_id), task.result())
+            report = report.strip()
+
+            emit({"response": report})
+            return report
+        finally:
+            # A failed stream or a disconnected client must not leave chart LLM calls running.
+            for task in charts.values():
+                if not task.done():
+                    task.cancel()
 
+    def build_update(self, state: Dict[str, Any], human_message: HumanMessage, response) -> Dict[str, Any]:
         # final_response = response.content.strip()
         # Safely extract final response from the last message
         messages = response.get("messages", [])
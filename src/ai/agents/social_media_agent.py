@@ -4,7 +4,7 @@ from src.ai.agent_prompts.social_media_agent import SYSTEM_PROMPT
 from typing import Dict, Any, Literal
 from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.prebuilt import create_react_agent
-from .utils import get_context_messages
+from .utils import get_context_messages, exclude_messages
 from langgraph.prebuilt import create_react_agent
 from src.ai.llm.model import get_llm, get_llm_alt
 from src.ai.llm.config import SocialMediaConfig
@@ -33,11 +33,10 @@ Address any identified issues and enhance the overall quality of the output.\n""
 
         return input_prompt
 
-    def __call__(self, state: Dict[str, Any]) ->  Command[Literal["Manager Agent", "Task Router"]]:
+    def prepare_input(self, state: Dict[str, Any]):
         task = state['current_task'].copy()
 
         input_prompt = self.format_input_prompt(state)
-        system_message = SystemMessage(content=self.system_prompt)
         human_message = HumanMessage(content=input_prompt)
 
         context_messages = []
@@ -47,23 +46,11 @@ Address any identified issues and enhance the overall quality of the output.\n""
 
         input = {"messages": context_messages + [human_message]}
 
-        try:
-            agent = create_react_agent(model=self.model, tools=self.tools, prompt=system_message)
-            communication_log = agent.invoke(input)
-
-        except Exception as e:
-            print(f"Falling back to alternate model: {str(e)}")
-            try:
-                agent = create_react_agent(model=self.model_alt, tools=self.tools, prompt=system_message)
-                communication_log = agent.invoke(input)
-
-            except Exception as e:
-                print(f"Error occurred in fallback model: {str(e)}")
-                raise e
+        return task, context_messages, input
 
+    def build_update(self, state: Dict[str, Any], task: Dict[str, Any], context_messages: list, communication_log: Dict[str, Any]) -> Command[Literal["Manager Agent", "Task Router"]]:
         message_history = communication_log['messages']
-        filtered_message_history = [
-            msg for msg in message_history if msg not in context_messages]
+        filtered_message_history = exclude_messages(message_history, context_messages)
         task['task_messages'] = filtered_message_history
 
         if state['reasoning']:
@@ -78,3 +65,19 @@ Address any identified issues and enhance the overall quality of the output.\n""
                 "current_task": task
             }
         )
+
+    def __call__(self, state: Dict[str, Any]) -> Command[Literal["Manager Agent", "Task Router"]]:
+        task, context_messages, input = self.prepare_input(state)
+
+        communication_log = self.invoke_with_fallback(
+            input, runnable_for=self.react_agent)
+
+        return self.build_update(state, task, context_messages, communication_log)
+
+    async def acall(self, state: Dict[str, Any]) -> Command[Literal["Manager Agent", "Task Router"]]:
+        task, context_messages, input = self.prepare_input(state)
+
+        communication_log = await self.ainvoke_with_fallback(
+            input, runnable_for=self.react_agent)
+
+        return self.build_update(state, task, context_messages, communication_log)
@@ -3,30 +3,75 @@ from litellm import acompletion
 import src.backend.db.mongodb as mongodb
 import json
 import src.backend.utils as utils
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 from datetime import datetime
 import json
 from dotenv import load_dotenv
 import time
 from src.ai.llm.config import SummarizerConfig
 from src.backend.utils.utils import get_unique_response_id
+from src.backend.utils.api_utils import redis_manager
+import os
 
 load_dotenv()
 smc = SummarizerConfig()
 
-async def stream_summary(user_id: str, session_id: str, message_id: str, prev_message_id: str, user_query: str, local_time: datetime, timezone: str, is_elaborate: bool = False, give_examples: bool = True) -> AsyncGenerator[str, None]:
-    start_time = time.monotonic()
-    last_message = await mongodb.get_response_by_message_id(prev_message_id)
+# Keyed by message_id; a retry rewrites that message, so query-stream drops its summaries
+# with invalidate_summary_cache once the new answer is stored.
+SUMMARY_CACHE_TTL = int(os.getenv("SUMMARY_CACHE_TTL", str(7 * 24 * 3600)))
+
+
+def summary_cache_key(prev_message_id: str, is_elaborate: bool, give_examples: bool, model: str) -> str:
+    return f"summary_cache:{prev_message_id}:{int(bool(is_elaborate))}:{int(bool(give_examples))}:{model}"
+
+
+async def invalidate_summary_cache(message_id: str):
+    try:
+        cursor = 0
+        while True:
+            cursor, keys = await redis_manager.safe_execute("scan", cursor, match=f"summary_cache:{message_id}:*", count=100)
+            if keys:
+                await redis_manager.safe_execute("delete", *keys)
+            if not cursor:
+                break
+    except Exception as e:
+        print(f"Error invalidating summary cache: {str(e)}")
+
+
+async def get_cached_summary(cache_key: str) -> Optional[list]:
+    try:
+        cached = await redis_manager.safe_execute("get", cache_key)
+        return json.loads(cached) if cached else None
+    except Exception as e:
+        print(f"Error reading summary cache: {str(e)}")
+        return None
+
 
-    if 'error' in last_message:
-        yield f"data: {json.dumps({'type': 'error', 'content': 'No message found for this session', 'message_id': message_id})}\n\n"
-        return
+async def cache_summary(cache_key: str, chunks: list):
+    try:
+        await redis_manager.safe_execute("set", cache_key, json.dumps(chunks), ex=SUMMARY_CACHE_TTL)
+    except Exception as e:
+        print(f"Error writing summary cache: {str(e)}")
 
-    text_to_summarize = last_message.get('response')
 
+async def stream_summary(user_id: str, session_id: str, message_id: str, prev_message_id: str, user_query: str, local_time: datetime, timezone: str, is_elaborate: bool = False, give_examples: bool = True) -> AsyncGenerator[str, None]:
+    start_time = time.monotonic()
     operation_title = "Elaborating response" if is_elaborate else "Summarizing response"
     agent_name = "Elaborating Agent" if is_elaborate else "Summarizing Agent"
 
+    cache_key = summary_cache_key(prev_message_id, is_elaborate, give_examples, smc.MODEL)
+    cached_chunks = await get_cached_summary(cache_key)
+
+    text_to_summarize = None
+    if cached_chunks is None:
+        last_message = await mongodb.get_response_by_message_id(prev_message_id)
+
+        if 'error' in last_message:
+            yield f"data: {json.dumps({'type': 'error', 'content': 'No message found for this session', 'message_id': message_id})}\n\n"
+            return
+
+        text_to_summarize = last_message.get('response')
+
     base_prompt = f"""Below is a response from an AI assistant:
 
 {text_to_summarize}
@@ -56,25 +101,34 @@ Your task:
     try:
         yield f"data: {json.dumps({'type': 'research', 'agent_name': agent_name, 'title': operation_title, 'id': get_unique_response_id(), 'created_at': local_time.isoformat(), 'message_id': message_id})}\n\n"
         
-        stream = await acompletion(
-            model=smc.MODEL,
-            messages=[{
-                "role": "user",
-                "content": base_prompt
-            }],
-            temperature=smc.TEMPERATURE,
-            stream=smc.STREAM
-        )
-
         summary_chunks = []
         response_id = get_unique_response_id()
-        async for chunk in stream:
-            if chunk.choices and len(chunk.choices) > 0:
-                delta = chunk.choices[0].delta
-                if hasattr(delta, 'content') and delta.content:
-                    content_piece = delta.content
-                    summary_chunks.append(content_piece)
-                    yield f"data: {json.dumps({'type': 'response-chunk', 'agent_name': agent_name, 'message_id': message_id, 'id': response_id, 'content': content_piece})}\n\n"
+        if cached_chunks is not None:
+            # Replay a finished summary of the same message with the same options as the original chunks.
+            for content_piece in cached_chunks:
+                summary_chunks.append(content_piece)
+                yield f"data: {json.dumps({'type': 'response-chunk', 'agent_name': agent_name, 'message_id': message_id, 'id': response_id, 'content': content_piece})}\n\n"
+        else:
+            stream = await acompletion(
+                model=smc.MODEL,
+                messages=[{
+                    "role": "user",
+                    "content": base_prompt
+                }],
+                temperature=smc.TEMPERATURE,
+                stream=smc.STREAM
+            )
+
+            async for chunk in stream:
+                if chunk.choices and len(chunk.choices) > 0:
+                    delta = chunk.choices[0].delta
+                    if hasattr(delta, 'content') and delta.content:
+                        content_piece = delta.content
+                        summary_chunks.append(content_piece)
+                        yield f"data: {json.dumps({'type': 'response-chunk', 'agent_name': agent_name, 'message_id': message_id, 'id': response_id, 'content': content_piece})}\n\n"
+
+            if summary_chunks:
+                await cache_summary(cache_key, summary_chunks)
 
         full_summary = ''.join(summary_chunks)
         
@@ -37,22 +37,24 @@ class TaskValidation(BaseAgent):
 
         return input_prompt
 
-    def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    def prepare_input(self, state: Dict[str, Any]) -> list:
         input_prompt = self.format_input_prompt(state)
         system_message = SystemMessage(content=self.system_prompt)
         human_message = HumanMessage(content=input_prompt)
 
-        try:
-            response = self.model.invoke(
-                input=[system_message, human_message], response_format=self.response_schema)
-        except Exception as e:
-            print(f"Falling back to alternate model: {str(e)}")
-            try:
-                response = self.model_alt.invoke(
-                    input=[system_message, human_message], response_format=self.response_schema)
-            except Exception as e:
-                print(f"Error occurred in fallback model: {str(e)}")
-                raise e
+        return [system_message, human_message]
+
+    def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.invoke_with_fallback(
+            input=self.prepare_input(state), response_format=self.response_schema)
+
+        validation_result = json.loads(response.content)
+
+        return validation_result
+
+    async def acall(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self.ainvoke_with_fallback(
+            input=self.prepare_input(state), response_format=self.response_schema)
 
         validation_result = json.loads(response.content)
 
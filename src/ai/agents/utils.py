@@ -1,5 +1,5 @@
 from typing import List, Dict, Any, Literal
-from langgraph.types import Command
+from langgraph.types import Command, Send
 from langgraph.graph import END
 from langchain_core.messages import AIMessage, ToolMessage
 from src.ai.llm.model import get_llm, get_llm_alt
@@ -14,23 +14,48 @@ load_dotenv()
 gstc = GenerateSessionTitleConfig()
 grqc = GetRelatedQueriesConfig()
 
+def index_tasks_by_name(task_list: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    tasks_by_name = {}
+    for subtask in task_list:
+        tasks_by_name.setdefault(subtask['task_name'], []).append(subtask)
+    return tasks_by_name
+
+
+def get_required_tasks(required_context: List[str], task_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Tasks named in required_context, in required_context order, with one pass over task_list."""
+    if not required_context:
+        return []
+    tasks_by_name = index_tasks_by_name(task_list)
+    return [subtask for task_name in required_context for subtask in tasks_by_name.get(task_name, [])]
+
+
+def exclude_messages(messages: List, excluded: List) -> List:
+    """
+    Drops the messages in `excluded` by identity (same object or same message id)
+    instead of comparing whole messages pairwise.
+    """
+    if not excluded:
+        return list(messages)
+    excluded_objects = {id(msg) for msg in excluded}
+    excluded_ids = {msg.id for msg in excluded if getattr(msg, 'id', None)}
+    return [msg for msg in messages
+            if id(msg) not in excluded_objects and not (getattr(msg, 'id', None) and msg.id in excluded_ids)]
+
+
 def get_context_messages(required_context: List[str], task_list: List[Dict[str, Any]]) -> List:
     context_messages = []
     required_tool_names = [
         'get_webpage_info', 'get_reddit_post_text_tool', 'db_search_tool', 'code_execution_tool']
 
-    if required_context:
-        for task_name in required_context:
-            for subtask in task_list:
-                if subtask['task_name'] == task_name:
-                    for msg in subtask['task_messages']:
-                        # if isinstance(msg, ToolMessage):
-                        #     if msg.name in required_tool_names:
-                        #         msg = AIMessage(content=msg.content)
-                        #         context_messages.append(msg)
-                        if isinstance(msg, AIMessage):
-                            if msg.content and (not msg.tool_calls):
-                                context_messages.append(msg)
+    for subtask in get_required_tasks(required_context, task_list):
+        for msg in subtask['task_messages']:
+            # if isinstance(msg, ToolMessage):
+            #     if msg.name in required_tool_names:
+            #         msg = AIMessage(content=msg.content)
+            #         context_messages.append(msg)
+            if isinstance(msg, AIMessage):
+                if msg.content and (not msg.tool_calls):
+                    context_messages.append(msg)
 
     return context_messages
 
@@ -38,31 +63,30 @@ def get_context_messages(required_context: List[str], task_list: List[Dict[str,
 def get_context_messages_for_response(required_context: List[str], task_list: List[Dict[str, Any]]) -> List:
     context_messages = []
     required_tool_names = ['get_webpage_info', 'get_reddit_post_text_tool', 'db_search_tool']
-    if required_context:
-        for task_name in required_context:
-            for subtask in task_list:
-                if subtask['task_name'] == task_name:
-                    if subtask.get('task_messages'):
-                        for msg in subtask['task_messages']:
-                            if subtask['agent_name'] == 'Coding Agent':
-                                if isinstance(msg, ToolMessage):
-                                    context_messages.append(
-                                        "Response from generated code:\n\n" + msg.content)
-                                if isinstance(msg, AIMessage):
-                                    if msg.content and (not msg.tool_calls):
-                                        context_messages.append(msg.content)
-                                    elif msg.tool_calls:
-                                        tool_msg = "Generated code:\n"
-                                        for tool_call in msg.tool_calls:
-                                            tool_msg += f"{tool_call['args']}\n"
-                                        context_messages.append(tool_msg)
-                            else:
-                                # if isinstance(msg, ToolMessage):
-                                #     if msg.name in required_tool_names:
-                                #         context_messages.append(msg.content)
-                                if isinstance(msg, AIMessage):
-                                    if msg.content and (not msg.tool_calls):
-                                        context_messages.append(msg.content)
+    for subtask in get_required_tasks(required_context, task_list):
+        if not subtask.get('task_messages'):
+            continue
+        is_coding_agent = subtask['agent_name'] == 'Coding Agent'
+        for msg in subtask['task_messages']:
+            if is_coding_agent:
+                if isinstance(msg, ToolMessage):
+                    context_messages.append(
+                        "Response from generated code:\n\n" + msg.content)
+                if isinstance(msg, AIMessage):
+                    if msg.content and (not msg.tool_calls):
+                        context_messages.append(msg.content)
+                    elif msg.tool_calls:
+                        tool_msg = "Generated code:\n"
+                        for tool_call in msg.tool_calls:
+                            tool_msg += f"{tool_call['args']}\n"
+                        context_messages.append(tool_msg)
+            else:
+                # if isinstance(msg, ToolMessage):
+                #     if msg.name in required_tool_names:
+                #         context_messages.append(msg.content)
+                if isinstance(msg, AIMessage):
+                    if msg.content and (not msg.tool_calls):
+                        context_messages.append(msg.content)
 
     return "\n\n---\n\n".join(context_messages)
 
@@ -141,62 +165,128 @@ def get_context_messages_for_response(required_context: List[str], task_list: Li
 #     )
 
 
+def _ready_tasks(task_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Pending tasks whose required_context tasks are all completed, in plan order."""
+    task_names = {task['task_name'] for task in task_list}
+    completed = {task['task_name'] for task in task_list if task.get('status') == 'completed'}
+    pending = [task for task in task_list if task.get('status') not in ('completed', 'running')]
+
+    ready = []
+    for task in pending:
+        if task['agent_name'] == 'Response Generator Agent':
+            # The report always waits for every other task.
+            if len(pending) == 1 and not any(t.get('status') == 'running' for t in task_list):
+                ready.append(task)
+            continue
+        dependencies = [name for name in (task.get('required_context') or []) if name in task_names]
+        if all(name in completed for name in dependencies):
+            ready.append(task)
+
+    if not ready and pending and not any(t.get('status') == 'running' for t in task_list):
+        # Unsatisfiable dependencies (cycle / unknown task): fall back to plan order.
+        ready = [pending[0]]
+
+    return ready
+
+
 def task_router_node(state: Dict[str, Any]) -> Command[Literal["Web Search Agent", "Social Media Scrape Agent", "Finance Data Agent",
                                                                "Sentiment Analysis Agent", "Data Comparison Agent", "Coding Agent",
                                                                "Response Generator Agent", "__end__"]]:
-    task_list = state['task_list'].copy()
-    current_task = state.get('current_task')
+    """
+    Treats the planner's task list as a dependency DAG (edges from required_context)
+    and dispatches every ready task at once with Send. Finished tasks come back
+    through the completed_tasks channel and are merged into task_list in plan order.
+    """
+    task_list = [task.copy() for task in state['task_list']]
     TOTAL_PROGRESS = 70.0
 
-    if current_task is None:
-        # First task
-        next_task = task_list[0]
-        
-        num_tasks = len(task_list) - 1
-        progress_per_task = TOTAL_PROGRESS / num_tasks if num_tasks > 0 else 0.0
-        
-        new_progress = state.get("progress_bar", 0.0)  # no increment here
-        # print("====Inside Executor agent (initial task)====")
-        # print(f"===Progress in Executor Agent: {new_progress}===")
-        # print(f"===Progress in Executor Agent: {new_progress+10}===")
-    else:
-        # Continuing task list
-        current_task_index = next((index for index, task in enumerate(task_list) if task['task_name'] == current_task['task_name']), -1)
-        task_list[current_task_index] = current_task
-
-        num_tasks = len(task_list) - 1
-        progress_per_task = TOTAL_PROGRESS / num_tasks if num_tasks > 0 else 0.0
-        
+    num_tasks = len(task_list) - 1
+    progress_per_task = TOTAL_PROGRESS / num_tasks if num_tasks > 0 else 0.0
+    new_progress = state.get("progress_bar", 0.0) or 0.0
+
+    finished = {task['task_name']: task for task in (state.get('completed_tasks') or []) if task}
+    newly_completed = 0
+    for index, task in enumerate(task_list):
+        if task.get('status') == 'completed':
+            continue
+        if task['task_name'] in finished:
+            task_list[index] = {**finished[task['task_name']], 'status': 'completed'}
+            newly_completed += 1
+        elif task.get('status') == 'running':
+            # Every task dispatched in the previous step has run by now, even if it reported nothing.
+            task_list[index] = {**task, 'status': 'completed'}
+            newly_completed += 1
+
+    if newly_completed:
+        new_progress = min(new_progress + progress_per_task * newly_completed, 100.0)
         print(f"\n====Progress per task: {progress_per_task}====\n")
-        current_progress = state.get("progress_bar", 0.0)
-        new_progress = min(current_progress + progress_per_task, 100.0)
+        print(f"===Progress in Task Router: {new_progress}===")
 
-        print("====Inside Executor agent====")
-        print(f"===Progress in Executor Agent: {new_progress}===")
+    ready = _ready_tasks(task_list)
 
-        if current_task_index == len(task_list) - 1:
-            return Command(
-                goto=END,
-                update={
-                    'task_list': task_list,
-                    'progress_bar': new_progress
-                }
-            )
+    if not ready:
+        return Command(
+            goto=END,
+            update={
+                'task_list': task_list,
+                'progress_bar': new_progress
+            }
+        )
 
-        next_task = task_list[current_task_index + 1]
+    ready_names = {task['task_name'] for task in ready}
+    for index, task in enumerate(task_list):
+        if task['task_name'] in ready_names:
+            task_list[index] = {**task, 'status': 'running'}
 
-    target_agent = next_task['agent_name']
+    print(f"===Task Router dispatching in parallel: {[(task['task_name'], task['agent_name']) for task in ready]}===")
 
     return Command(
-        goto=target_agent,
+        goto=[
+            Send(task['agent_name'], {**state, 'current_task': {k: v for k, v in task.items() if k != 'status'}, 'task_list': task_list, 'progress_bar': new_progress})
+            for task in ready
+        ],
         update={
-            'current_task': next_task,
             'task_list': task_list,
             'progress_bar': new_progress
         }
     )
 
 
+class PlannedTaskNode:
+    """
+    Wraps a task agent node. In planner mode the finished task is reported via
+    the completed_tasks reducer instead of current_task, so agents running in
+    the same step do not conflict. Manager (reasoning) mode is left unchanged.
+    """
+
+    def __init__(self, agent):
+        self.agent = agent
+
+    def _to_completed_task(self, state: Dict[str, Any], result):
+        if state.get('reasoning'):
+            return result
+
+        if isinstance(result, Command):
+            update = dict(result.update or {})
+            if 'current_task' in update:
+                task = update.pop('current_task')
+                update['completed_tasks'] = [task] if task else []
+            return Command(graph=result.graph, update=update, resume=result.resume, goto=result.goto)
+
+        if isinstance(result, dict) and 'current_task' in result:
+            result = dict(result)
+            task = result.pop('current_task')
+            result['completed_tasks'] = [task] if task else []
+
+        return result
+
+    def __call__(self, state: Dict[str, Any]):
+        return self._to_completed_task(state, self.agent(state))
+
+    async def acall(self, state: Dict[str, Any]):
+        return self._to_completed_task(state, await self.agent.acall(state))
+
+
 def get_context_based_answer_prompt(context: str, query: str) -> str:
     prompt = (
         f"You are a helpful assistant. Your task is to answer the `User Query` based only on the given `Context`.\n",
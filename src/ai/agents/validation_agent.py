@@ -29,10 +29,10 @@ class ValidationAgent(BaseAgent):
         return "\n".join(input_prompt)
 
   
-    def __call__(self, state: Dict[str, Any]) -> Command[Literal["Planner Agent", "Manager Agent", "__end__"]]:
-        FEEDBACK_CYCLE_LIMIT = 3
+    FEEDBACK_CYCLE_LIMIT = 3
 
-        if state.get('feedback_cycle', 0) >= FEEDBACK_CYCLE_LIMIT:
+    def feedback_limit_update(self, state: Dict[str, Any]) -> Command[Literal["__end__"]] | None:
+        if state.get('feedback_cycle', 0) >= self.FEEDBACK_CYCLE_LIMIT:
             return Command(
                 goto=END,
                 update={
@@ -41,27 +41,38 @@ class ValidationAgent(BaseAgent):
                     "current_task": None
                 }
             )
+        return None
 
+    def prepare_input(self, state: Dict[str, Any]) -> list:
         input_prompt = self.format_input_prompt(state)
         system_message = SystemMessage(content=self.system_prompt)
         human_message = HumanMessage(content=input_prompt)
 
-        try:
-            response = self.model.invoke(
-                input=[system_message, human_message],
-                response_format=self.response_schema
-            )
-        except Exception as e:
-            print(f"Falling back to alternate model: {str(e)}")
-            try:
-                response = self.model_alt.invoke(
-                    input=[system_message, human_message],
-                    response_format=self.response_schema
-                )
-            except Exception as e:
-                print(f"Error occurred in fallback model: {str(e)}")
-                raise e
+        return [system_message, human_message]
+
+    def __call__(self, state: Dict[str, Any]) -> Command[Literal["Planner Agent", "Manager Agent", "__end__"]]:
+        limit_update = self.feedback_limit_update(state)
+        if limit_update:
+            return limit_update
+
+        response = self.invoke_with_fallback(
+            input=self.prepare_input(state),
+            response_format=self.response_schema
+        )
+        return self.build_update(state, response)
+
+    async def acall(self, state: Dict[str, Any]) -> Command[Literal["Planner Agent", "Manager Agent", "__end__"]]:
+        limit_update = self.feedback_limit_update(state)
+        if limit_update:
+            return limit_update
+
+        response = await self.ainvoke_with_fallback(
+            input=self.prepare_input(state),
+            response_format=self.response_schema
+        )
+        return self.build_update(state, response)
 
+    def build_update(self, state: Dict[str, Any], response) -> Command[Literal["Planner Agent", "Manager Agent", "__end__"]]:
         validation_result = json.loads(response.content)
 
         new_cycle = state.get('feedback_cycle', 0) + (1 if validation_result['is_valid'] == "Incorrect Response" else 0)
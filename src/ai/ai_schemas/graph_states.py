@@ -1,4 +1,5 @@
 from typing import Annotated, Sequence, Optional, List
+import operator
 from datetime import datetime
 from langchain_core.messages import BaseMessage
 from typing_extensions import TypedDict
@@ -22,6 +23,7 @@ class InsightAgentState(TypedDict):
     subtasks: list
     task_list: list
     current_task: dict
+    completed_tasks: Annotated[list, operator.add]
     final_response: str
     validation_result: Optional[dict]
     feedback_cycle: int
@@ -1,5 +1,6 @@
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
+from langchain_core.runnables import RunnableLambda
 from src.ai.ai_schemas.graph_states import InsightAgentState
 from src.ai.agents.db_search_agent import DBSearchAgent
 from src.ai.agents.intent_detector import IntentDetector
@@ -12,14 +13,33 @@ from src.ai.agents.coding_agent import CodingAgent
 from src.ai.agents.response_generator_agent import ReportGenerationAgent
 from src.ai.agents.planner_agent import PlannerAgent
 from src.ai.agents.executor_agent import ExecutorAgent
-from src.ai.agents.utils import task_router_node
+from src.ai.agents.utils import task_router_node, PlannedTaskNode
 from src.ai.agents.sentiment_analysis_agent import SentimentAnalysisAgent
 from src.ai.agents.data_comparison_agent import DataComparisonAgent
 from src.ai.agents.map_agent import MapAgent
+from src.backend.utils.metrics import NODE_LATENCY
 from IPython.display import Markdown, Image, display
 import os
 
 
+def agent_node(agent, name: str) -> RunnableLambda:
+    """Registers an agent with both its sync __call__ and native async acall, timed per node."""
+    def call(state):
+        with NODE_LATENCY.time(node=name):
+            return agent(state)
+
+    async def acall(state):
+        with NODE_LATENCY.time(node=name):
+            return await agent.acall(state)
+
+    return RunnableLambda(call, afunc=acall, name=name)
+
+
+def timed_router(state):
+    with NODE_LATENCY.time(node="Task Router"):
+        return task_router_node(state)
+
+
 class InsightAgentGraph:
     def __init__(self):
         self.state = InsightAgentState
@@ -32,7 +52,7 @@ class InsightAgentGraph:
         self.db_search_agent = DBSearchAgent()
         self.planner_agent = PlannerAgent()
         self.executor_agent = ExecutorAgent()
-        self.task_router = task_router_node
+        self.task_router = timed_router
 
         self.manager_agent = ManagerAgent()
 
@@ -51,21 +71,21 @@ class InsightAgentGraph:
 
     def _create_graph(self):
         graph = StateGraph(self.state)
-        graph.add_node("Query Intent Detector", self.intent_detector)
-        graph.add_node("DB Search Agent", self.db_search_agent)
-        graph.add_node("Planner Agent", self.planner_agent)
-        graph.add_node("Manager Agent", self.manager_agent)
-        graph.add_node("Executor Agent", self.executor_agent)
+        graph.add_node("Query Intent Detector", agent_node(self.intent_detector, "Query Intent Detector"))
+        graph.add_node("DB Search Agent", agent_node(self.db_search_agent, "DB Search Agent"))
+        graph.add_node("Planner Agent", agent_node(self.planner_agent, "Planner Agent"))
+        graph.add_node("Manager Agent", agent_node(self.manager_agent, "Manager Agent"))
+        graph.add_node("Executor Agent", agent_node(self.executor_agent, "Executor Agent"))
         graph.add_node("Task Router", self.task_router)
-        graph.add_node("Web Search Agent", self.web_search_agent)
-        graph.add_node("Social Media Scrape Agent", self.social_media_agent)
-        graph.add_node("Finance Data Agent", self.finance_data_agent)
-        graph.add_node("Sentiment Analysis Agent", self.sentiment_analysis_agent)
-        graph.add_node("Data Comparison Agent", self.data_comparison_agent)
-        graph.add_node("Coding Agent", self.coding_agent)
-        graph.add_node("Map Agent", self.map_agent)
-        graph.add_node("Response Generator Agent", self.response_generator_agent)
-        graph.add_node("Validation Agent", self.validation_agent)
+        graph.add_node("Web Search Agent", agent_node(PlannedTaskNode(self.web_search_agent), "Web Search Agent"))
+        graph.add_node("Social Media Scrape Agent", agent_node(PlannedTaskNode(self.social_media_agent), "Social Media Scrape Agent"))
+        graph.add_node("Finance Data Agent", agent_node(PlannedTaskNode(self.finance_data_agent), "Finance Data Agent"))
+        graph.add_node("Sentiment Analysis Agent", agent_node(PlannedTaskNode(self.sentiment_analysis_agent), "Sentiment Analysis Agent"))
+        graph.add_node("Data Comparison Agent", agent_node(PlannedTaskNode(self.data_comparison_agent), "Data Comparison Agent"))
+        graph.add_node("Coding Agent", agent_node(PlannedTaskNode(self.coding_agent), "Coding Agent"))
+        graph.add_node("Map Agent", agent_node(PlannedTaskNode(self.map_agent), "Map Agent"))
+        graph.add_node("Response Generator Agent", agent_node(self.response_generator_agent, "Response Generator Agent"))
+        graph.add_node("Validation Agent", agent_node(self.validation_agent, "Validation Agent"))
 
         graph.add_edge(START, "Query Intent Detector")
         graph.add_edge("Planner Agent", "Executor Agent")
@@ -424,3 +424,11 @@ class WebSearchConfig:
 #     STREAM = True
 
 
+
+
+class HistorySummaryConfig:
+    MODEL = "gemini/gemini-2.0-flash-lite"
+    ALT_MODEL = "gemini/gemini-2.5-flash"
+    TEMPERATURE = 0.1
+    ALT_TEMPERATURE = 0.1
+    MAX_TOKENS = 400
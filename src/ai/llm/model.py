@@ -1,7 +1,10 @@
 from langchain_community.chat_models import ChatLiteLLM
 # from langchain_litellm import ChatLiteLLM
 from dotenv import dotenv_values
-from typing import List, Optional, Any
+from typing import List, Optional, Any, Dict, Tuple
+import threading
+import litellm
+import httpx
 import os
 
 
@@ -26,17 +29,71 @@ if groq_api_key and not os.getenv("GROQ_API_KEY"):
     os.environ["GROQ_API_KEY"] = groq_api_key
 
 
+LLM_SHARED_HTTP_SESSION = os.getenv("LLM_SHARED_HTTP_SESSION", "true").lower() in ("1", "true", "yes")
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+LLM_HTTP_KEEPALIVE = int(os.getenv("LLM_HTTP_KEEPALIVE", "20"))
+LLM_HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "600"))
+
+
+class LLMClientRegistry:
+    """
+    Process-wide cache of chat model clients keyed by (factory, model, temperature,
+    provider options). Clients are stateless between calls, so agents created per
+    request share the same instance, and litellm is pointed at one pooled httpx
+    session so TLS connections are reused across graph runs.
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple, ChatLiteLLM] = {}
+        self._lock = threading.Lock()
+        self._http_configured = False
+
+    def _configure_http(self):
+        if self._http_configured or not LLM_SHARED_HTTP_SESSION:
+            return
+        limits = httpx.Limits(max_connections=LLM_HTTP_MAX_CONNECTIONS, max_keepalive_connections=LLM_HTTP_KEEPALIVE)
+        if litellm.client_session is None:
+            litellm.client_session = httpx.Client(limits=limits, timeout=LLM_HTTP_TIMEOUT)
+        if litellm.aclient_session is None:
+            litellm.aclient_session = httpx.AsyncClient(limits=limits, timeout=LLM_HTTP_TIMEOUT)
+        self._http_configured = True
+
+    @staticmethod
+    def _key(factory: str, options: Dict[str, Any]) -> Tuple:
+        return (factory,) + tuple(sorted((k, repr(v)) for k, v in options.items()))
+
+    def get(self, factory: str, **options) -> ChatLiteLLM:
+        key = self._key(factory, options)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                self._configure_http()
+                client = ChatLiteLLM(**options)
+                self._clients[key] = client
+        return client
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+
+llm_registry = LLMClientRegistry()
+
+
 def get_llm(model_name: str, temperature: float = None, max_tokens: int = None):
-    model = ChatLiteLLM(model_name=model_name, temperature=temperature, max_tokens=max_tokens, max_retries=2)
+    model = llm_registry.get("primary", model_name=model_name, temperature=temperature, max_tokens=max_tokens, max_retries=2)
     # model = ChatLiteLLM(model=model_name, temperature=temperature, max_tokens=max_tokens, max_retries=2)
     return model
 
 
 def get_llm_groq(model_name: str , temperature: float = None, top_p: float = None, top_k: int = None) -> ChatLiteLLM:
-    return ChatLiteLLM(model=model_name, temperature=temperature, top_p=top_p, top_k=top_k)
+    return llm_registry.get("groq", model=model_name, temperature=temperature, top_p=top_p, top_k=top_k)
 
 
 def get_llm_alt(model_name: str, temperature: float = None, max_tokens: int = None):
-    model = ChatLiteLLM(model= model_name, temperature=temperature, max_tokens=max_tokens)
+    model = llm_registry.get("alt", model=model_name, temperature=temperature, max_tokens=max_tokens)
     return model
-
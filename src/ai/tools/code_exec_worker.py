@@ -0,0 +1,172 @@
+"""
+Worker process entry point for the code execution pool.
+
+Kept free of project imports so that spawned workers only pay for the
+data-science stack they warm up, not for the API/agent modules.
+"""
+import ast
+import contextlib
+import io
+import signal
+import time
+import traceback
+
+WARM_MODULES = ["numpy", "pandas", "sklearn", "matplotlib", "seaborn", "plotly.graph_objects", "plotly.io"]
+
+
+class CellCPUTimeExceeded(Exception):
+    pass
+
+
+class CellTimeExceeded(BaseException):
+    # BaseException so a bare `except Exception` in the cell cannot swallow it.
+    pass
+
+
+def _on_cpu_limit(signum, frame):
+    raise CellCPUTimeExceeded("CPU time limit exceeded for this cell")
+
+
+def _on_time_limit(signum, frame):
+    raise CellTimeExceeded()
+
+
+def _apply_limits(memory_limit_mb: int):
+    try:
+        import resource
+        if memory_limit_mb:
+            limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except Exception as e:
+        print(f"[code_exec_worker] could not apply memory limit: {e}")
+
+
+def _warm_up():
+    import importlib
+    for module_name in WARM_MODULES:
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            print(f"[code_exec_worker] warm import failed for {module_name}: {e}")
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot  # noqa: F401
+    except Exception:
+        pass
+
+
+def _new_namespace() -> dict:
+    namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+    # Same names the agent prompt advertises as pre-imported.
+    for alias, module_name in (("np", "numpy"), ("pd", "pandas"), ("plt", "matplotlib.pyplot"),
+                               ("sns", "seaborn"), ("go", "plotly.graph_objects"), ("pio", "plotly.io")):
+        try:
+            import importlib
+            namespace[alias] = importlib.import_module(module_name)
+        except Exception:
+            continue
+    return namespace
+
+
+def execute_cell(code: str, namespace: dict) -> str:
+    output_capture = io.StringIO()
+    with contextlib.redirect_stdout(output_capture), contextlib.redirect_stderr(output_capture):
+        parsed = ast.parse(code)
+
+        if parsed.body and isinstance(parsed.body[-1], ast.Expr):
+            exec(compile(ast.Module(body=parsed.body[:-1], type_ignores=[]), '<string>', 'exec'), namespace)
+
+            last_expr = compile(ast.Expression(parsed.body[-1].value), '<string>', 'eval')
+            expr_value = eval(last_expr, namespace)
+
+            if expr_value is not None:
+                if isinstance(expr_value, (list, tuple, set)):
+                    for element in expr_value:
+                        print(element)
+                else:
+                    print(expr_value)
+        else:
+            exec(compile(parsed, '<string>', 'exec'), namespace)
+
+    return output_capture.getvalue().strip()
+
+
+def worker_main(conn, memory_limit_mb: int, cpu_limit_seconds: float, session_idle_seconds: float):
+    """
+    Request loop. Messages are dicts:
+      {"op": "exec", "session_id": str, "code": str, "timeout": float}
+      {"op": "drop", "session_ids": [str]}
+      {"op": "ping"} / {"op": "stop"}
+    Replies are dicts with "ok" and either "output"/"value" or "error".
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _warm_up()
+    _apply_limits(memory_limit_mb)
+    signal.signal(signal.SIGPROF, _on_cpu_limit)
+    signal.signal(signal.SIGALRM, _on_time_limit)
+
+    sessions = {}
+    last_used = {}
+    conn.send({"ok": True, "ready": True})
+
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError, KeyboardInterrupt):
+            break
+
+        op = request.get("op")
+        session_id = request.get("session_id")
+
+        now = time.monotonic()
+        for sid in [sid for sid, ts in last_used.items() if now - ts > session_idle_seconds and sid != session_id]:
+            sessions.pop(sid, None)
+            last_used.pop(sid, None)
+
+        if op == "stop":
+            break
+
+        if op == "ping":
+            conn.send({"ok": True, "sessions": len(sessions)})
+            continue
+
+        if op == "drop":
+            for sid in request.get("session_ids", []):
+                sessions.pop(sid, None)
+                last_used.pop(sid, None)
+            conn.send({"ok": True})
+            continue
+
+        namespace = sessions.get(session_id)
+        if namespace is None:
+            namespace = _new_namespace()
+            sessions[session_id] = namespace
+        last_used[session_id] = now
+
+        if op == "exec":
+            timeout = request.get("timeout")
+            try:
+                if cpu_limit_seconds:
+                    signal.setitimer(signal.ITIMER_PROF, cpu_limit_seconds)
+                if timeout:
+                    signal.setitimer(signal.ITIMER_REAL, timeout)
+                try:
+                    output = execute_cell(request.get("code", ""), namespace)
+                finally:
+                    signal.setitimer(signal.ITIMER_PROF, 0)
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+                reply = {"ok": True, "output": output, "variables": [k for k in namespace.keys() if not k.startswith("__")]}
+            except CellTimeExceeded:
+                reply = {"ok": False, "error": f"Execution timed out after {int(timeout)} seconds. Session variables were kept."}
+            except MemoryError:
+                reply = {"ok": False, "error": "Memory limit exceeded for this cell"}
+            except Exception as e:
+                reply = {"ok": False, "error": str(e), "traceback": traceback.format_exc(limit=3)}
+            try:
+                conn.send(reply)
+            except Exception as e:
+                conn.send({"ok": False, "error": f"Could not return result: {e}"})
+            continue
+
+        conn.send({"ok": False, "error": f"Unknown op: {op}"})
@@ -1,21 +1,191 @@
 from src.ai.ai_schemas.tool_structured_input import CodeExecutionToolInput
-from src.backend.utils.utils import pretty_format
-import ast
-import sys
-import io
-from IPython.display import display, HTML
-import sklearn
-import plotly.io as pio
-import plotly.graph_objects as go
-import pandas as pd
-import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
+from src.ai.tools import code_exec_worker
 from langchain_core.tools import tool, BaseTool
+from langchain_core.runnables import RunnableConfig
 from pydantic import BaseModel, Field
 from typing import List, Dict, Literal, Annotated, Optional, Sequence, Union, Any, Iterable, Type
-import matplotlib
-matplotlib.use('Agg')
+import asyncio
+import multiprocessing
+import threading
+import time
+import zlib
+import os
+
+
+CODE_EXEC_WORKERS = int(os.getenv("CODE_EXEC_WORKERS", "2"))
+CODE_EXEC_TIMEOUT = float(os.getenv("CODE_EXEC_TIMEOUT", "60"))
+CODE_EXEC_CPU_LIMIT = float(os.getenv("CODE_EXEC_CPU_LIMIT", "30"))
+CODE_EXEC_MEMORY_LIMIT_MB = int(os.getenv("CODE_EXEC_MEMORY_LIMIT_MB", "2048"))
+CODE_EXEC_SESSION_IDLE = float(os.getenv("CODE_EXEC_SESSION_IDLE", "1800"))
+# Extra wait past the cell timeout before the worker is presumed stuck and killed.
+CODE_EXEC_KILL_GRACE = float(os.getenv("CODE_EXEC_KILL_GRACE", "5"))
+CODE_EXEC_WORKER_START_TIMEOUT = 120
+# Dropping namespaces of deleted sessions is best effort; a worker busy with a cell is skipped
+# and frees them through CODE_EXEC_SESSION_IDLE instead.
+CODE_EXEC_DROP_WAIT = 1.0
+
+
+class _CodeWorker:
+    def __init__(self, ctx, index: int):
+        self.ctx = ctx
+        self.index = index
+        self.lock = threading.Lock()
+        self.process = None
+        self.conn = None
+        # Sessions with a namespace on this worker (last use), and sessions whose namespace
+        # was lost when the worker was restarted for another session's cell.
+        self.active: Dict[str, float] = {}
+        self.reset_sessions = set()
+
+    def start(self):
+        parent_conn, child_conn = self.ctx.Pipe()
+        self.process = self.ctx.Process(
+            target=code_exec_worker.worker_main,
+            args=(child_conn, CODE_EXEC_MEMORY_LIMIT_MB, CODE_EXEC_CPU_LIMIT, CODE_EXEC_SESSION_IDLE),
+            name=f"code-exec-worker-{self.index}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+    def wait_ready(self):
+        if self.conn.poll(CODE_EXEC_WORKER_START_TIMEOUT):
+            self.conn.recv()
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def restart(self, culprit: Optional[str] = None):
+        now = time.monotonic()
+        self.reset_sessions.update(sid for sid, used in self.active.items()
+                                   if sid != culprit and now - used <= CODE_EXEC_SESSION_IDLE)
+        self.active = {}
+        self.kill()
+        self.start()
+        # Consume the ready message so it is not mistaken for the next reply.
+        self.wait_ready()
+
+    def kill(self):
+        try:
+            if self.process is not None and self.process.is_alive():
+                self.process.kill()
+                self.process.join(timeout=5)
+        except Exception as e:
+            print(f"Error stopping code execution worker {self.index}: {str(e)}")
+        try:
+            if self.conn is not None:
+                self.conn.close()
+        except Exception:
+            pass
+        self.process = None
+        self.conn = None
+
+    def request(self, payload: dict, timeout: float) -> dict:
+        session_id = payload.get("session_id")
+        with self.lock:
+            if not self.is_alive():
+                self.restart()
+
+            if session_id in self.reset_sessions:
+                self.reset_sessions.discard(session_id)
+                if payload.get("op") == "exec":
+                    return {"ok": False, "error": "Session context was reset because the execution process restarted; "
+                                                  "previously defined variables, imports and functions are gone. Re-run the earlier code before continuing."}
+            if session_id is not None:
+                self.active[session_id] = time.monotonic()
+
+            try:
+                # The worker stops the cell itself after `timeout`; killing the process is the last resort.
+                self.conn.send({**payload, "timeout": timeout})
+                if not self.conn.poll(timeout + CODE_EXEC_KILL_GRACE):
+                    print(f"Code execution worker {self.index} did not stop after {timeout}s; restarting")
+                    self.restart(culprit=session_id)
+                    return {"ok": False, "error": f"Execution timed out after {int(timeout)} seconds. Session variables were reset."}
+                return self.conn.recv()
+            except (EOFError, OSError, BrokenPipeError) as e:
+                print(f"Code execution worker {self.index} crashed: {str(e)}; restarting")
+                self.restart(culprit=session_id)
+                return {"ok": False, "error": "Execution process crashed (possibly out of memory). Session variables were reset."}
+
+    def drop(self, session_ids: List[str]):
+        if not self.lock.acquire(timeout=CODE_EXEC_DROP_WAIT):
+            return
+        try:
+            for session_id in session_ids:
+                self.active.pop(session_id, None)
+                self.reset_sessions.discard(session_id)
+            if not self.is_alive():
+                return
+            self.conn.send({"op": "drop", "session_ids": session_ids})
+            if self.conn.poll(CODE_EXEC_DROP_WAIT + CODE_EXEC_KILL_GRACE):
+                self.conn.recv()
+            else:
+                print(f"Code execution worker {self.index} did not answer a drop request; restarting")
+                self.restart()
+        except (EOFError, OSError, BrokenPipeError) as e:
+            print(f"Code execution worker {self.index} crashed while dropping sessions: {str(e)}; restarting")
+            self.restart()
+        finally:
+            self.lock.release()
+
+
+class CodeWorkerPool:
+    """
+    Pre-started worker processes with the data-science stack already imported.
+    A session is pinned to one worker so its namespace survives across cells,
+    while different sessions run in parallel on different workers.
+    """
+
+    def __init__(self, size: int = CODE_EXEC_WORKERS):
+        self.size = max(1, size)
+        self.ctx = multiprocessing.get_context("spawn")
+        self.workers: List[_CodeWorker] = []
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self.workers:
+                return
+            workers = [_CodeWorker(self.ctx, i) for i in range(self.size)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.wait_ready()
+            self.workers = workers
+            print(f"Code execution pool started with {self.size} workers")
+
+    def shutdown(self):
+        with self._start_lock:
+            for worker in self.workers:
+                worker.kill()
+            self.workers = []
+
+    def _worker_for(self, session_id: str) -> _CodeWorker:
+        if not self.workers:
+            self.start()
+        return self.workers[zlib.crc32(session_id.encode("utf-8")) % len(self.workers)]
+
+    def execute(self, session_id: str, code: str, timeout: float = CODE_EXEC_TIMEOUT) -> dict:
+        return self._worker_for(session_id).request({"op": "exec", "session_id": session_id, "code": code}, timeout)
+
+    def drop_sessions(self, session_ids: List[str]):
+        """Frees the namespaces of deleted chat sessions. Never starts the pool."""
+        if not self.workers:
+            return
+        by_worker: Dict[int, List[str]] = {}
+        for session_id in session_ids:
+            by_worker.setdefault(zlib.crc32(session_id.encode("utf-8")) % len(self.workers), []).append(session_id)
+        for index, ids in by_worker.items():
+            self.workers[index].drop(ids)
+
+
+code_worker_pool = CodeWorkerPool()
+
+
+def _session_from_config(config: Optional[RunnableConfig]) -> str:
+    configurable = (config or {}).get("configurable", {}) or {}
+    return str(configurable.get("session_id") or configurable.get("thread_id") or "default")
 
 
 class CodeExecutionTool(BaseTool):
@@ -29,61 +199,20 @@ Outputs only the print results or any errors.
 
     args_schema: Type[BaseModel] = CodeExecutionToolInput
 
-    execution_context: Dict[str, Any] = {}
-    cell_history: list = []
-
-    def _run(self, code: str, explanation: str) -> str:
+    def _run(self, code: str, explanation: str, config: RunnableConfig = None) -> str:
+        session_id = _session_from_config(config)
         try:
-            original_stdout = sys.stdout
-            output_capture = io.StringIO()
-            sys.stdout = output_capture
-
-            try:
-                if hasattr(sys.stdin, 'buffer'):
-                    sys.stdin.buffer.flush()
-
-                output_capture.truncate(0)
-                output_capture.seek(0)
-
-                parsed = ast.parse(code)
-
-                if parsed.body and isinstance(parsed.body[-1], ast.Expr):
-                    exec(compile(ast.Module(
-                        body=parsed.body[:-1], type_ignores=[]), '<string>', 'exec'), self.execution_context)
-
-                    last_expr = compile(ast.Expression(
-                        parsed.body[-1].value), '<string>', 'eval')
-                    expr_value = eval(last_expr, self.execution_context)
-
-                    if expr_value is not None:
-                        if isinstance(expr_value, (list, tuple, set)):
-                            for element in expr_value:
-                                print(element)
-                        else:
-                            print(expr_value)
-                else:
-                    exec(code, self.execution_context)
-
-            finally:
-                sys.stdout = original_stdout
-
-            output = output_capture.getvalue().strip()
-
-            result = {
-                'output': output,
-                'variables': list(self.execution_context.keys())
-            }
-
-            self.cell_history.append(result)
+            result = code_worker_pool.execute(session_id, code)
+        except Exception as e:
+            return f"Error executing code: {str(e)}"
 
-            return output
+        if result.get("ok"):
+            return result.get("output", "")
 
-        except Exception as e:
-            error_message = f"Error executing code: {str(e)}"
-            return error_message
+        return f"Error executing code: {result.get('error')}"
 
-    def get_variable(self, var_name: str):
-        return self.execution_context.get(var_name)
+    async def _arun(self, code: str, explanation: str, config: RunnableConfig = None) -> str:
+        return await asyncio.to_thread(self._run, code, explanation, config)
 
 
 code_execution_tool = CodeExecutionTool()
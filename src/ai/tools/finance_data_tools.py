@@ -18,6 +18,8 @@ import concurrent.futures
 from .finance_scraper_utils import convert_fmp_to_json
 from src.ai.ai_schemas.tool_structured_input import QueryRequest, SearchCompanyInfoSchema, CompanySymbolSchema, StockDataSchema, CombinedFinancialStatementSchema, CurrencyExchangeRateSchema, TickerSchema
 import src.backend.db.mongodb as mongodb
+from src.backend.db.symbol_index import symbol_index
+from src.backend.utils.quote_cache import quote_cache
 from src.ai.tools.web_search_tools import AdvancedInternetSearchTool
 # from crypto_data import get_crypto_data  
 from tavily import TavilyClient
@@ -199,7 +201,10 @@ class SearchCompanyInfoTool(BaseTool):
 
     def _fetch_data_for_single_ticker(self, query_request: QueryRequest) -> Dict[str, Any]:
        
-       fmp_data = self._fetch_fmp_data(query_request.query)       
+       fmp_data = symbol_index.lookup(query_request.query, limit=10, exchange=query_request.exchange_short_name)
+       if not fmp_data:
+           fmp_data = self._fetch_fmp_data(query_request.query)
+           symbol_index.add_records(fmp_data)
        return {
            "query": query_request.query,
            "type": query_request.type,
@@ -444,6 +449,12 @@ class GetStockData(BaseTool):
         return out
 
     def _yf_realtime(self, ticker: str) -> dict:
+        return quote_cache.get_or_fetch(
+            "yf_realtime", ticker, lambda: self._yf_realtime_uncached(ticker),
+            cacheable=lambda realtime: realtime.get("price") is not None
+        )
+
+    def _yf_realtime_uncached(self, ticker: str) -> dict:
         t = yf.Ticker(ticker)
         price = None
         ts = None
@@ -853,6 +864,58 @@ class GetStockData(BaseTool):
         except Exception:
             return lst
 
+    def _fetch_realtime(self, ticker: str, exchange_symbol: Optional[str]) -> dict:
+        """Realtime quote from FMP, falling back to yfinance."""
+        realtime_response = None
+        try:
+            if exchange_symbol and ticker:
+                try:
+                    url = f"https://financialmodelingprep.com/stable/quote/?symbol={ticker}&apikey={fm_api_key}"
+                    currency_url = f'https://financialmodelingprep.com/stable/search-symbol?query={ticker}&apikey={fm_api_key}'
+                    data_resp = requests.get(url, timeout=10)
+                    # Currency comes from the local symbol index; search-symbol is only hit on a miss.
+                    local_currency = next((r.get("currency") for r in symbol_index.get_symbol(ticker) if r.get("currency")), None)
+                    search_resp = None if local_currency else requests.get(currency_url, timeout=8)
+                    if data_resp.ok:
+                        fmp_json = data_resp.json()
+                    else:
+                        print(f"[DEBUG] FMP realtime status {data_resp.status_code} for {ticker}")
+                        fmp_json = None
+                    if isinstance(fmp_json, list) and len(fmp_json) > 0 and isinstance(fmp_json[0], dict):
+                        realtime_response = dict(fmp_json[0])
+                        if local_currency:
+                            realtime_response["currency"] = local_currency
+                        elif search_resp.ok:
+                            currency_json = search_resp.json()
+                            symbol_index.add_records(currency_json)
+                            if isinstance(currency_json, list) and len(currency_json) > 0 and isinstance(currency_json[0], dict):
+                                realtime_response["currency"] = currency_json[0].get("currency", realtime_response.get("currency", "USD"))
+                            else:
+                                realtime_response.setdefault("currency", realtime_response.get("currency", "USD"))
+                        else:
+                            realtime_response.setdefault("currency", realtime_response.get("currency", "USD"))
+                    else:
+                        cand = self._candidate_yf_tickers(ticker, exchange_symbol)
+                        for c in cand:
+                            try:
+                                rt = self._yf_realtime(c)
+                                if rt and rt.get("price") is not None:
+                                    realtime_response = rt
+                                    break
+                            except Exception:
+                                continue
+                        if realtime_response is None:
+                            realtime_response = {"error": "Failed to fetch realtime from FMP and yfinance."}
+                except Exception as e_fmp_rt:
+                    print(f"[DEBUG] FMP realtime exception for {ticker}: {e_fmp_rt}")
+                    realtime_response = self._yf_realtime(ticker)
+            else:
+                realtime_response = {"error": "Use web search tool for data not available from FMP."}
+        except Exception as e:
+            realtime_response = {"error": f"Failed to get realtime data: {str(e)}"}
+
+        return realtime_response
+
     # main runner 
     def _run(self, ticker_data: List[TickerSchema], explanation: str = None, period: str = "1M", strictly: bool = False):
         def process_ticker(ticker_info):
@@ -860,49 +923,12 @@ class GetStockData(BaseTool):
             exchange_symbol = getattr(ticker_info, "exchange_symbol", None)
             result = {"realtime": None, "historical": None}
 
-            # Realtime (FMP -> yfinance fallback)
-            realtime_response = None
-            try:
-                if exchange_symbol and ticker:
-                    try:
-                        url = f"https://financialmodelingprep.com/stable/quote/?symbol={ticker}&apikey={fm_api_key}"
-                        currency_url = f'https://financialmodelingprep.com/stable/search-symbol?query={ticker}&apikey={fm_api_key}'
-                        data_resp = requests.get(url, timeout=10)
-                        search_resp = requests.get(currency_url, timeout=8)
-                        if data_resp.ok:
-                            fmp_json = data_resp.json()
-                        else:
-                            print(f"[DEBUG] FMP realtime status {data_resp.status_code} for {ticker}")
-                            fmp_json = None
-                        if isinstance(fmp_json, list) and len(fmp_json) > 0 and isinstance(fmp_json[0], dict):
-                            realtime_response = dict(fmp_json[0])
-                            if search_resp.ok:
-                                currency_json = search_resp.json()
-                                if isinstance(currency_json, list) and len(currency_json) > 0 and isinstance(currency_json[0], dict):
-                                    realtime_response["currency"] = currency_json[0].get("currency", realtime_response.get("currency", "USD"))
-                                else:
-                                    realtime_response.setdefault("currency", realtime_response.get("currency", "USD"))
-                            else:
-                                realtime_response.setdefault("currency", realtime_response.get("currency", "USD"))
-                        else:
-                            cand = self._candidate_yf_tickers(ticker, exchange_symbol)
-                            for c in cand:
-                                try:
-                                    rt = self._yf_realtime(c)
-                                    if rt and rt.get("price") is not None:
-                                        realtime_response = rt
-                                        break
-                                except Exception:
-                                    continue
-                            if realtime_response is None:
-                                realtime_response = {"error": "Failed to fetch realtime from FMP and yfinance."}
-                    except Exception as e_fmp_rt:
-                        print(f"[DEBUG] FMP realtime exception for {ticker}: {e_fmp_rt}")
-                        realtime_response = self._yf_realtime(ticker)
-                else:
-                    realtime_response = {"error": "Use web search tool for data not available from FMP."}
-            except Exception as e:
-                realtime_response = {"error": f"Failed to get realtime data: {str(e)}"}
+            # Realtime (FMP -> yfinance fallback), shared across sessions for QUOTE_CACHE_TTL seconds
+            realtime_response = quote_cache.get_or_fetch(
+                "realtime", f"{ticker}:{exchange_symbol}",
+                lambda: self._fetch_realtime(ticker, exchange_symbol),
+                cacheable=lambda response: isinstance(response, dict) and "error" not in response
+            )
 
             # ensure symbol/timestamp/companyName exist
             if isinstance(realtime_response, dict) and "symbol" not in realtime_response:
@@ -14,6 +14,7 @@ from src.ai.tools.graph_gen_tool_system_prompt import SYSTEM_PROMPT_STRUCT_OUTPU
 from dotenv import load_dotenv
 from src.ai.llm.model import get_llm
 from src.ai.llm.config import GraphGenerationConfig
+from src.ai.tools.table_chart_parser import table_to_chart_collection
 
 load_dotenv()
 
@@ -118,7 +119,21 @@ class StructOutputList(BaseModel):
 llm_struct_op = llm.with_structured_output(StructOutputList)
 
 
-def generate_graphs(md_content):
+def generate_graphs_local(md_content):
+    try:
+        local_output = table_to_chart_collection(md_content)
+        if not local_output:
+            return None
+        dump = StructOutputList.model_validate(local_output).model_dump()
+        if not dump.get("chart_collection"):
+            return None
+        return json.dumps(dump, ensure_ascii=False)
+    except Exception as e:
+        print(f"Local chart parser failed, using LLM: {e}")
+        return None
+
+
+def generate_graphs_llm(md_content):
     table = md_content
 
     INPUT_PROMPT = f"""
@@ -190,6 +205,16 @@ The table is listed below:
     # return json.dumps(results, ensure_ascii=False)
 
 
+def generate_graphs(md_content):
+    output_string = generate_graphs_local(md_content)
+    if output_string:
+        print(f"Chart generated by local table parser")
+        return output_string
+
+    print(f"Table not handled by local parser, using LLM")
+    return generate_graphs_llm(md_content)
+
+
 class GraphGenToolInput(BaseModel):
     table: str = Field(description="Provide a table containing numerical data of similar property in markdown format to create the visualization chart.")
 
@@ -1,8 +1,10 @@
 from langchain_core.tools import tool, BaseTool
 from pydantic import BaseModel, Field
-from typing import List, Literal, Type
+from typing import List, Literal, Optional, Type
+from langchain_core.runnables import RunnableConfig
 from src.backend.utils.utils import pretty_format
 from src.ai.ai_schemas.tool_structured_input import DatabaseSearchSchema
+from src.backend.db.doc_index import search_file_storage
 # from langchain_openai import AzureOpenAIEmbeddings
 # from qdrant_client import QdrantClient
 from dotenv import dotenv_values
@@ -33,16 +35,22 @@ class SearchArgs(BaseModel):
     doc_ids: list = Field(description="List of document IDs for filtering documents")
     explanation: str = Field(description="Provide short reasoning for calling this tool.")
 
+def _user_from_config(config: Optional[RunnableConfig]) -> Optional[str]:
+    configurable = (config or {}).get("configurable", {}) or {}
+    user_id = configurable.get("user_id")
+    return str(user_id) if user_id else None
+
+
 class SearchAuditDocumentsTool(BaseTool):
     name: str = "search_audit_documents"
     description: str = (
         "Use this tool to search on Documents uploaded by user based on the provided Document IDs"
-        "Perform a similarity search on the 'file_storage' Qdrant collection. "
+        "Perform a similarity search on the local index of uploaded documents. "
         "Returns up to 5 document snippets as JSON. Filters by provided document IDs."
     )
     args_schema: type[BaseModel] = SearchArgs
     
-    def _run(self, query: str, doc_ids: list, explanation: str = None) -> str:
+    def _run(self, query: str, doc_ids: list, explanation: str = None, config: RunnableConfig = None) -> str:
         # qdrant = QdrantClient(host=QDRANT_CLIENT_URL, port=6333)
         # embeddings = AzureOpenAIEmbeddings(api_key=os.getenv('AZURE_API_KEY'), model="text-embedding-3-small", azure_endpoint=os.getenv("AZURE_API_BASE"))
         try:
@@ -62,7 +70,13 @@ class SearchAuditDocumentsTool(BaseTool):
             #     } 
             #     for doc, score in docs_with_scores
             # ]
-            return json.dumps([])
+            # doc_ids come from the model, so only the caller's own documents may be searched.
+            user_id = _user_from_config(config)
+            if not user_id:
+                print("search_audit_documents called without a user_id, returning no documents")
+                return json.dumps([])
+            results = search_file_storage(query=query, doc_ids=doc_ids, k=5, user_id=user_id)
+            return json.dumps(results)
         except Exception as e:
             print(e)
             return json.dumps([]) 
@@ -1,10 +1,19 @@
 import requests
+import httpx
+import asyncio
+import concurrent.futures
+import json
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
 from langchain_core.tools import tool, BaseTool
-from typing import List, Literal, Type, Dict
+from typing import List, Literal, Type, Dict, Optional, Tuple
 import time
 import os 
 from pydantic import BaseModel, Field
 from src.ai.ai_schemas.tool_structured_input import GeocodeInput
+import src.backend.db.mongodb as mongodb
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,6 +21,166 @@ load_dotenv()
 
 GOOGLE_MAP_API_KEY = os.getenv("GOOGLE_MAP_API_KEY")
 GOOGLE_MAPS_TIMEOUT = 10
+GOOGLE_GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
+GEOCODER_BACKEND = os.getenv("GEOCODER_BACKEND", "google")  # "google" or "local"
+GEOCODER_LOCAL_DATA = os.getenv("GEOCODER_LOCAL_DATA")      # optional JSON {place: [lat, lng]}
+GEOCODE_CONCURRENCY = int(os.getenv("GEOCODE_CONCURRENCY", "8"))
+GEOCODE_LRU_SIZE = int(os.getenv("GEOCODE_LRU_SIZE", "5000"))
+GEOCODE_USE_MONGO = os.getenv("GEOCODE_USE_MONGO", "true").lower() == "true"
+
+
+PLACE_ABBREVIATIONS = {
+    "st": "street", "ave": "avenue", "av": "avenue", "rd": "road", "blvd": "boulevard", "dr": "drive",
+    "ln": "lane", "hwy": "highway", "pkwy": "parkway", "ste": "suite", "fl": "floor", "mt": "mount",
+    "ft": "fort", "usa": "united states", "us": "united states", "u s a": "united states",
+    "uk": "united kingdom", "uae": "united arab emirates", "nyc": "new york city",
+}
+PLACE_NOISE_WORDS = {"headquarters", "hq", "head", "office", "corporate", "global", "the", "inc", "corp",
+                     "corporation", "ltd", "limited", "llc", "plc", "co"}
+
+
+def normalize_place(place: str) -> str:
+    """Canonical cache key so near-duplicate place strings share one entry."""
+    text = unicodedata.normalize("NFKD", place or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = text.replace("united states of america", "united states")
+    text = re.sub(r"[^\w\s]", " ", text)
+    tokens = [PLACE_ABBREVIATIONS.get(tok, tok) for tok in text.split()]
+    tokens = [tok for tok in tokens if tok not in PLACE_NOISE_WORDS]
+    return " ".join(tokens)
+
+
+class GeocodeCache:
+    """In-memory LRU in front of the persistent Mongo geocode_cache collection."""
+
+    def __init__(self, max_size: int = GEOCODE_LRU_SIZE, use_mongo: bool = GEOCODE_USE_MONGO):
+        self.max_size = max_size
+        self.use_mongo = use_mongo
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, key: str, value: dict):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get_many(self, keys: List[str]) -> Dict[str, dict]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+
+        missing = [k for k in keys if k not in found]
+        if missing and self.use_mongo:
+            try:
+                stored = mongodb.get_cached_geocodes(missing)
+                with self._lock:
+                    for key, value in stored.items():
+                        self._remember(key, value)
+                found.update(stored)
+            except Exception as e:
+                print(f"Error reading geocode cache from MongoDB: {str(e)}")
+        return found
+
+    def put_many(self, entries: Dict[str, dict]):
+        if not entries:
+            return
+        with self._lock:
+            for key, value in entries.items():
+                self._remember(key, value)
+        if self.use_mongo:
+            try:
+                mongodb.upsert_geocodes(entries)
+            except Exception as e:
+                print(f"Error writing geocode cache to MongoDB: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class GoogleGeocoder:
+    def __init__(self, api_key: Optional[str] = GOOGLE_MAP_API_KEY, timeout: int = GOOGLE_MAPS_TIMEOUT):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    @staticmethod
+    def _parse(place: str, data: dict) -> Optional[dict]:
+        if data.get("status") != "OK" or not data.get("results"):
+            return None
+        # Assuming we're interested in the first result
+        result = data["results"][0]
+        location = result["geometry"]["location"]
+        return {
+            "latitude": location.get("lat"),
+            "longitude": location.get("lng"),
+            "formatted_address": result.get("formatted_address"),
+        }
+
+    def geocode(self, place: str) -> Optional[dict]:
+        response = self.session.get(GOOGLE_GEOCODE_URL, params={"address": place, "key": self.api_key}, timeout=self.timeout)
+        response.raise_for_status()
+        return self._parse(place, response.json())
+
+    async def ageocode(self, client: httpx.AsyncClient, place: str) -> Optional[dict]:
+        response = await client.get(GOOGLE_GEOCODE_URL, params={"address": place, "key": self.api_key}, timeout=self.timeout)
+        response.raise_for_status()
+        return self._parse(place, response.json())
+
+
+class LocalGeocoder:
+    """
+    Offline stand-in for tests and benchmarks: resolves places from a small
+    built-in gazetteer, optionally extended by the JSON file in GEOCODER_LOCAL_DATA.
+    """
+
+    DEFAULT_PLACES = {
+        "new york": (40.7128, -74.0060),
+        "new york city": (40.7128, -74.0060),
+        "london": (51.5074, -0.1278),
+        "mumbai": (19.0760, 72.8777),
+        "bengaluru": (12.9716, 77.5946),
+        "dubai": (25.2048, 55.2708),
+        "singapore": (1.3521, 103.8198),
+        "tokyo": (35.6762, 139.6503),
+        "san francisco": (37.7749, -122.4194),
+        "cupertino california": (37.3230, -122.0322),
+        "one apple park way cupertino california": (37.3349, -122.0090),
+        "redmond washington": (47.6740, -122.1215),
+        "mountain view california": (37.3861, -122.0839),
+        "santa clara california": (37.3541, -121.9552),
+        "seattle washington": (47.6062, -122.3321),
+    }
+
+    def __init__(self, data_path: Optional[str] = GEOCODER_LOCAL_DATA):
+        self.places = {normalize_place(k): v for k, v in self.DEFAULT_PLACES.items()}
+        if data_path and os.path.exists(data_path):
+            with open(data_path, "r", encoding="utf-8") as f:
+                for name, coords in json.load(f).items():
+                    self.places[normalize_place(name)] = tuple(coords)
+
+    def geocode(self, place: str) -> Optional[dict]:
+        coords = self.places.get(normalize_place(place))
+        if not coords:
+            return None
+        return {"latitude": coords[0], "longitude": coords[1], "formatted_address": place}
+
+    async def ageocode(self, client, place: str) -> Optional[dict]:
+        return self.geocode(place)
+
+
+def get_geocoder():
+    if GEOCODER_BACKEND == "local":
+        return LocalGeocoder()
+    return GoogleGeocoder()
+
+
+geocode_cache = GeocodeCache()
 
 
 # Geocoding Multiple Location 
@@ -22,55 +191,114 @@ class GoogleGeocodingTool(BaseTool):
     """
     args_schema: Type[BaseModel] = GeocodeInput
 
-    def _run(self, places: List[str], explanation: str = None) -> List[Dict]:
+    geocoder: object = Field(default_factory=get_geocoder, exclude=True)
+    cache: object = Field(default_factory=lambda: geocode_cache, exclude=True)
 
-        print(f"---TOOL CALL: google_geocoding_tool --- Query: {places}")
-        if not GOOGLE_MAP_API_KEY:
+    def _lookup_cache(self, places: List[str]) -> Tuple[Dict[str, str], Dict[str, dict], List[str]]:
+        keys = {place: normalize_place(place) for place in places}
+        cached = self.cache.get_many(list(set(keys.values())))
+        # One upstream request per distinct normalized place.
+        misses, seen = [], set()
+        for place in places:
+            key = keys[place]
+            if key not in cached and key not in seen:
+                seen.add(key)
+                misses.append(place)
+        return keys, cached, misses
+
+    @staticmethod
+    def _assemble(places: List[str], keys: Dict[str, str], resolved: Dict[str, dict], errors: Dict[str, str]) -> List[Dict]:
+        op_response = [] # List to store coordinates of all the input places
+        for place in places:
+            key = keys[place]
+            if key in resolved:
+                coords = resolved[key]
+                print(f"Geolocation for '{place}': Latitude = {coords['latitude']}, Longitude = {coords['longitude']}")
+                op_response.append({"place": place, "latitude": coords["latitude"], "longitude": coords["longitude"]})
+            else:
+                op_response.append({"place": place, "error": errors.get(key, f"Error: Could not find geolocation data for '{place}'.")})
+        return op_response
+
+    def _geocode_one(self, place: str) -> Tuple[Optional[dict], Optional[str]]:
+        try:
+            print(f"---Geocoding: {place}---")
+            coords = self.geocoder.geocode(place)
+            if not coords:
+                return None, f"Error: Could not find geolocation data for '{place}'."
+            return coords, None
+        except Exception as e:
+            return None, f"Error processing Google Maps API results for '{place}': {str(e)}"
+
+    def _check_configured(self):
+        if isinstance(self.geocoder, GoogleGeocoder) and not self.geocoder.api_key:
             error_message = "Error: Google Maps API key is not configured."
             print(error_message)
             return {"error": error_message}
-        
-        op_response = [] # List to store coordinates of all the input places
+        return None
 
-        for place in places:            # Prepare the request URL
-            url = "https://maps.googleapis.com/maps/api/geocode/json"
-            params = {
-                "address": place,
-                "key": GOOGLE_MAP_API_KEY
-            }
-            
-            try:
-                print(f"---Geocoding: {place}---")
-                response = requests.get(url, params=params, timeout=GOOGLE_MAPS_TIMEOUT)
-                response.raise_for_status()
-                
-                data = response.json()
-                if data.get("status") != "OK" or not data.get("results"):
-                    error_message = f"Error: Could not find geolocation data for '{place}'."
-                    print(error_message)
-                    return error_message
-
-                # Assuming we're interested in the first result
-                result = data["results"][0]
-                location = result["geometry"]["location"]
-                latitude = location.get("lat")
-                longitude = location.get("lng")
-                message = f"Geolocation for '{place}': Latitude = {latitude}, Longitude = {longitude}"
-                print(message)
-                place_coord = {
-                    "place": place,
-                    "latitude": latitude,
-                    "longitude": longitude
-                }
-                # Append the individual place coordinates to the list
-                op_response.append(place_coord)
-            
-            except Exception as e:
-                error_message = f"Error processing Google Maps API results for '{place}': {str(e)}"
-                print(error_message)
-                op_response.append({"place": place, "error": error_message})
-            
-        return op_response
+    def _run(self, places: List[str], explanation: str = None) -> List[Dict]:
+
+        print(f"---TOOL CALL: google_geocoding_tool --- Query: {places}")
+        not_configured = self._check_configured()
+        if not_configured:
+            return not_configured
+
+        keys, resolved, misses = self._lookup_cache(places)
+        errors, fetched = {}, {}
+
+        if misses:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(GEOCODE_CONCURRENCY, len(misses))) as executor:
+                future_to_place = {executor.submit(self._geocode_one, place): place for place in misses}
+                for future in concurrent.futures.as_completed(future_to_place):
+                    place = future_to_place[future]
+                    coords, error = future.result()
+                    if coords:
+                        fetched[keys[place]] = coords
+                    else:
+                        print(error)
+                        errors[keys[place]] = error
+
+        self.cache.put_many(fetched)
+        resolved.update(fetched)
+        return self._assemble(places, keys, resolved, errors)
+
+    async def _arun(self, places: List[str], explanation: str = None) -> List[Dict]:
+
+        print(f"---TOOL CALL: google_geocoding_tool (async) --- Query: {places}")
+        not_configured = self._check_configured()
+        if not_configured:
+            return not_configured
+
+        keys, resolved, misses = await asyncio.to_thread(self._lookup_cache, places)
+        errors, fetched = {}, {}
+
+        if misses:
+            semaphore = asyncio.Semaphore(GEOCODE_CONCURRENCY)
+
+            async def geocode(client, place):
+                async with semaphore:
+                    try:
+                        print(f"---Geocoding: {place}---")
+                        coords = await self.geocoder.ageocode(client, place)
+                        if not coords:
+                            return place, None, f"Error: Could not find geolocation data for '{place}'."
+                        return place, coords, None
+                    except Exception as e:
+                        return place, None, f"Error processing Google Maps API results for '{place}': {str(e)}"
+
+            async with httpx.AsyncClient() as client:
+                results = await asyncio.gather(*(geocode(client, place) for place in misses))
+
+            for place, coords, error in results:
+                if coords:
+                    fetched[keys[place]] = coords
+                else:
+                    print(error)
+                    errors[keys[place]] = error
+
+        await asyncio.to_thread(self.cache.put_many, fetched)
+        resolved.update(fetched)
+        return self._assemble(places, keys, resolved, errors)
 
 google_geocoding_tool = GoogleGeocodingTool()
 tool_list = [google_geocoding_tool]
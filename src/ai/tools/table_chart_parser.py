@@ -0,0 +1,362 @@
+"""
+Deterministic markdown-table -> chart_collection conversion.
+
+Handles the common case of a numeric grid (periods x metrics, or entities x
+metrics) and returns the same shape as `StructOutputList.model_dump()`.
+Anything that would need judgement (mixed units, text-heavy cells, very
+different magnitudes, ranges such as ">63%") returns None so the caller can
+fall back to the LLM.
+"""
+import re
+from typing import List, Optional, Tuple, Dict, Any
+
+CHART_COLORS = ["#1537ba", "#00a9f4", "#051c2c", "#82a6c9", "#99e6ff", "#14b8ab", "#9c217d"]
+
+MISSING_TOKENS = {"", "-", "--", "—", "–", "n/a", "na", "n.a.", "nm", "none", "null", "nil", "tbd", "—%"}
+
+SCALE_SUFFIXES = {
+    "k": ("Thousand", 1e3), "thousand": ("Thousand", 1e3),
+    "m": ("Million", 1e6), "mn": ("Million", 1e6), "mm": ("Million", 1e6), "million": ("Million", 1e6),
+    "b": ("Billion", 1e9), "bn": ("Billion", 1e9), "billion": ("Billion", 1e9),
+    "t": ("Trillion", 1e12), "tn": ("Trillion", 1e12), "trillion": ("Trillion", 1e12),
+    "cr": ("Crore", 1e7), "crore": ("Crore", 1e7), "lakh": ("Lakh", 1e5),
+}
+
+CURRENCY_SYMBOLS = {"$": "USD", "₹": "INR", "€": "EUR", "£": "GBP", "¥": "JPY"}
+CURRENCY_CODES = {"USD", "INR", "EUR", "GBP", "JPY", "AED", "CNY", "CAD", "AUD", "SGD", "CHF"}
+
+PERIOD_PATTERN = re.compile(
+    r"^(fy\s?'?\d{2,4}|cy\s?\d{4}|\d{4}(\s?[-/]\s?\d{2,4})?|q[1-4]\s?(fy)?\s?'?\d{2,4}|h[12]\s?\d{2,4}|"
+    r"\d{4}\s?q[1-4]|(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s?'?\d{2,4}|ttm|ltm)[a-z]?$",
+    re.IGNORECASE,
+)
+
+NUMBER_PATTERN = re.compile(
+    r"^(?P<neg>-|−|\()?\s*(?P<cur>[$₹€£¥]|[A-Z]{3}\s)?\s*(?P<num>\d[\d,]*(\.\d+)?|\.\d+)\s*"
+    r"(?P<suffix>[a-zA-Z]{1,8})?\s*(?P<pct>%)?\s*(?P<close>\))?\s*(?P<x>x)?$"
+)
+
+MAX_MAGNITUDE_RATIO = 200
+
+
+def _clean_cell(cell: str) -> str:
+    cell = cell.strip()
+    cell = re.sub(r"[*_`]", "", cell)
+    cell = re.sub(r"\[(.*?)\]\(.*?\)", r"\1", cell)
+    return cell.strip()
+
+
+def extract_first_markdown_table(md_content: str) -> Optional[Tuple[List[str], List[List[str]]]]:
+    lines = md_content.strip().splitlines()
+    for i in range(len(lines) - 1):
+        header = lines[i].strip()
+        separator = lines[i + 1].strip()
+        if '|' not in header or '|' not in separator:
+            continue
+        sep_chars = separator.replace('|', '').replace(' ', '')
+        if not sep_chars or not set(sep_chars).issubset({'-', ':'}) or len(sep_chars) < 3:
+            continue
+
+        def split_row(line: str) -> List[str]:
+            line = line.strip()
+            if line.startswith('|'):
+                line = line[1:]
+            if line.endswith('|'):
+                line = line[:-1]
+            return [_clean_cell(c) for c in line.split('|')]
+
+        header_cells = split_row(header)
+        rows = []
+        for line in lines[i + 2:]:
+            if '|' not in line.strip():
+                break
+            row = split_row(line)
+            if len(row) < len(header_cells):
+                row += [""] * (len(header_cells) - len(row))
+            rows.append(row[:len(header_cells)])
+        return header_cells, rows
+    return None
+
+
+def parse_number(cell: str) -> Tuple[Optional[float], Dict[str, Any]]:
+    """
+    Returns (value, unit_info) where unit_info has currency/scale/percent/multiple.
+    value is None for missing cells; raises ValueError for non-numeric or ambiguous cells.
+    """
+    text = cell.strip()
+    if text.lower() in MISSING_TOKENS:
+        return None, {}
+    if text[:1] in "<>≈~±" or " - " in text or " to " in text.lower():
+        raise ValueError(f"ambiguous cell: {cell}")
+
+    text = text.replace("−", "-").replace("+", "")
+    match = NUMBER_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"non numeric cell: {cell}")
+
+    value = float(match.group("num").replace(",", ""))
+    if match.group("neg"):
+        if match.group("neg") == "(" and not match.group("close"):
+            raise ValueError(f"unbalanced parenthesis: {cell}")
+        value = -value
+
+    info = {}
+    currency = match.group("cur")
+    if currency:
+        currency = currency.strip()
+        if currency in CURRENCY_SYMBOLS:
+            info["currency"] = CURRENCY_SYMBOLS[currency]
+        elif currency in CURRENCY_CODES:
+            info["currency"] = currency
+        else:
+            raise ValueError(f"unknown currency: {cell}")
+
+    suffix = match.group("suffix")
+    if suffix:
+        suffix_lower = suffix.lower()
+        if suffix_lower == "x":
+            info["multiple"] = True
+        elif suffix_lower in SCALE_SUFFIXES:
+            info["scale"] = suffix_lower
+        elif suffix.upper() in CURRENCY_CODES:
+            info["currency"] = suffix.upper()
+        else:
+            raise ValueError(f"unknown suffix: {cell}")
+
+    if match.group("pct"):
+        info["percent"] = True
+    if match.group("x"):
+        info["multiple"] = True
+
+    return value, info
+
+
+def _is_period(label: str) -> bool:
+    return bool(PERIOD_PATTERN.match(label.strip()))
+
+
+def _unit_from_header(header: str) -> Dict[str, Any]:
+    info = {}
+    header_lower = header.lower()
+    if "%" in header or "percent" in header_lower:
+        info["percent"] = True
+    for symbol, code in CURRENCY_SYMBOLS.items():
+        if symbol in header:
+            info["currency"] = code
+    for code in CURRENCY_CODES:
+        if re.search(rf"\b{code}\b", header):
+            info["currency"] = code
+    for word, (name, _) in SCALE_SUFFIXES.items():
+        if len(word) > 2 and re.search(rf"\b{word}\b", header_lower):
+            info["scale"] = word
+    short_scale = re.search(r"\(\s*(?:[$₹€£¥]|[a-z]{3}\s)?\s*(k|m|mn|mm|b|bn|t|tn|cr)\s*\)", header_lower)
+    if short_scale:
+        info["scale"] = short_scale.group(1)
+    return info
+
+
+def _series_from_cells(cells: List[str], header_hint: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    values = []
+    units = []
+    for cell in cells:
+        value, info = parse_number(cell)
+        values.append(value)
+        if value is not None:
+            units.append(info)
+
+    present = [v for v in values if v is not None]
+    if len(present) < max(2, (len(values) + 1) // 2):
+        return None
+
+    unit_keys = {(u.get("currency"), u.get("percent", False), u.get("multiple", False)) for u in units}
+    if len(unit_keys) > 1:
+        return None
+    currency, percent, multiple = unit_keys.pop() if unit_keys else (None, False, False)
+
+    scales = [u.get("scale") for u in units if u.get("scale")]
+    if scales and len(scales) != len(units):
+        # "5M" next to a bare "300": the bare cell's scale is unknown, so leave it to the LLM.
+        return None
+    scale = None
+    if scales:
+        # Rescale mixed suffixes (e.g. 1.2B and 850M) to the dominant one.
+        scale = max(set(scales), key=scales.count)
+        target = SCALE_SUFFIXES[scale][1]
+        rescaled = []
+        unit_iter = iter(units)
+        for v in values:
+            if v is None:
+                rescaled.append(None)
+                continue
+            u = next(unit_iter)
+            factor = SCALE_SUFFIXES[u["scale"]][1]
+            rescaled.append(round(v * factor / target, 6))
+        values = rescaled
+    elif header_hint.get("scale"):
+        scale = header_hint["scale"]
+
+    return {
+        "values": values,
+        "currency": currency or header_hint.get("currency"),
+        "scale": scale,
+        "percent": percent or bool(header_hint.get("percent")),
+        "multiple": multiple,
+    }
+
+
+def _unit_label(series: Dict[str, Any]) -> str:
+    if series["percent"]:
+        return "%"
+    if series["multiple"]:
+        return "x"
+    parts = []
+    if series["currency"]:
+        parts.append(series["currency"])
+    if series["scale"]:
+        parts.append(SCALE_SUFFIXES[series["scale"]][0])
+    return " ".join(parts)
+
+
+def _with_unit(label: str, unit: str) -> str:
+    if not unit or unit.lower() in label.lower():
+        return label
+    return f"{label} ({unit})"
+
+
+def _strip_unit(label: str) -> str:
+    return re.sub(r"\s*\((?:[^)]*)\)\s*$", "", label).strip() or label
+
+
+def table_to_chart_collection(md_content: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns a dict shaped like StructOutputList.model_dump() or None when the
+    table should go to the LLM path.
+    """
+    parsed = extract_first_markdown_table(md_content)
+    if not parsed:
+        return None
+    header, rows = parsed
+    rows = [r for r in rows if any(c.strip() for c in r)]
+    if len(header) < 2 or not rows:
+        return None
+
+    column_labels = header[1:]
+    row_labels = [r[0] for r in rows]
+
+    # Periods across the header (metrics as rows) -> transpose so x is time.
+    if len(column_labels) >= 2 and all(_is_period(c) for c in column_labels):
+        x_label = "Period"
+        x_values = column_labels
+        raw_series = [(r[0], r[1:], _unit_from_header(r[0])) for r in rows]
+        time_axis = True
+    else:
+        x_label = header[0] or "Category"
+        x_values = row_labels
+        raw_series = [(column_labels[j], [r[j + 1] for r in rows], _unit_from_header(column_labels[j]))
+                      for j in range(len(column_labels))]
+        time_axis = all(_is_period(x) for x in x_values)
+
+    if len(x_values) < 2 or len(set(x_values)) != len(x_values):
+        return None
+
+    series_list = []
+    for label, cells, hint in raw_series:
+        try:
+            series = _series_from_cells(cells, hint)
+        except ValueError:
+            return None
+        if series is None:
+            return None
+        series["label"] = label
+        series_list.append(series)
+
+    if not series_list or len(series_list) > len(CHART_COLORS):
+        return None
+
+    units = {_unit_label(s) for s in series_list}
+    if len(units) > 1:
+        return None
+    unit = units.pop()
+
+    if len(series_list) > 1:
+        magnitudes = [max(abs(v) for v in s["values"] if v is not None) for s in series_list]
+        smallest = min(m for m in magnitudes) or 1e-9
+        if max(magnitudes) / smallest > MAX_MAGNITUDE_RATIO:
+            return None
+
+    if time_axis and len(x_values) >= 4:
+        chart_type = "lines"
+    elif len(series_list) > 1:
+        chart_type = "group_bar"
+    else:
+        chart_type = "bar"
+
+    if time_axis:
+        x_values = _chronological(x_values, series_list)
+
+    data = []
+    for idx, series in enumerate(series_list):
+        points = [(x, y) for x, y in zip(x_values, series["values"]) if y is not None]
+        data.append({
+            "legend_label": _strip_unit(series["label"]),
+            "x_axis_data": [p[0] for p in points],
+            "y_axis_data": [float(p[1]) for p in points],
+            "color": CHART_COLORS[idx % len(CHART_COLORS)],
+        })
+
+    metric_names = [_strip_unit(s["label"]) for s in series_list]
+    if len(metric_names) == 1:
+        title = f"{metric_names[0]} by {x_label}"
+        y_label = _with_unit(metric_names[0], unit)
+    else:
+        title = f"{', '.join(metric_names[:-1])} and {metric_names[-1]} by {x_label}"
+        y_label = _with_unit("Value", unit) if unit else "Value"
+
+    return {
+        "chart_collection": [{
+            "chart_type": chart_type,
+            "chart_title": title,
+            "x_label": x_label,
+            "y_label": y_label,
+            "data": data,
+        }]
+    }
+
+
+MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+
+
+def _period_key(label: str) -> Optional[tuple]:
+    """(year, position within the year) for a PERIOD_PATTERN label; TTM/LTM sort after every dated period."""
+    text = label.strip().lower()
+    if text.startswith(("ttm", "ltm")):
+        return (float("inf"), 0)
+    years = re.findall(r"\d{4}|(?<=')\d{2}|(?<![\d.])\d{2}(?!\d)", re.sub(r"^[qh][1-4]", "", text))
+    if not years:
+        return None
+    year = int(years[0]) if len(years[0]) == 4 else 2000 + int(years[0])
+
+    quarter = re.match(r"q([1-4])|\d{4}\s?q([1-4])", text)
+    if quarter:
+        return (year, int(quarter.group(1) or quarter.group(2)) * 3)
+    half = re.match(r"h([12])", text)
+    if half:
+        return (year, int(half.group(1)) * 6)
+    if text[:3] in MONTHS:
+        return (year, MONTHS.index(text[:3]) + 1)
+    # "2024-03" is a month; "2023-24" is a fiscal year and sorts by its first year.
+    month = re.match(r"\d{4}\s?[-/]\s?(\d{2})$", text)
+    if month and 1 <= int(month.group(1)) <= 12 and int(month.group(1)) != (year + 1) % 100:
+        return (year, int(month.group(1)))
+    return (year, 0)
+
+
+def _chronological(x_values: List[str], series_list: List[Dict[str, Any]]) -> List[str]:
+    # Tables are often newest-first; charts read left-to-right in time.
+    keys = [_period_key(x) for x in x_values]
+    if None in keys or len(set(keys)) != len(keys) or keys == sorted(keys):
+        return x_values
+    order = sorted(range(len(x_values)), key=lambda i: keys[i])
+    for series in series_list:
+        series["values"] = [series["values"][i] for i in order]
+    return [x_values[i] for i in order]
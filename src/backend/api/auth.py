@@ -7,14 +7,13 @@ from datetime import datetime, timedelta
 from fastapi import APIRouter, HTTPException, Depends, Response
 from typing import Annotated
 import json
-from passlib.context import CryptContext
 from urllib.parse import urlencode
 import anyio
 import src.backend.db.mongodb as mongodb
 from src.backend.models.app_io_schemas import Registration
 from src.backend.utils.api_utils import generate_otp, redis_manager
+from src.backend.utils.password_hashing import password_hasher
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 router = APIRouter()
 
 @router.post("/login")
@@ -25,7 +24,7 @@ async def login_user_endpoint(login: Annotated[OAuth2PasswordRequestForm, Depend
     if user and user.password==None:
         raise HTTPException(
             status_code=400, detail="User does not have a password set. Please use password reset to set your password.")
-    if not user or not pwd_context.verify(login.password.encode('utf-8'), user.password):
+    if not user or not await password_hasher.verify(login.password, user.password):
         raise HTTPException(
             status_code=400, detail="Invalid email or password or account does not exists.")
     
@@ -58,7 +57,7 @@ async def register_user_endpoint(reg: Registration):
         
         regdata = {
             "email": reg.email,
-            "password": pwd_context.hash(reg.password.encode('utf-8')),
+            "password": await password_hasher.hash(reg.password),
             "full_name": reg.full_name,
             "auth_provider": "local",
             "created_at": datetime.utcnow().isoformat()
@@ -128,7 +127,7 @@ async def reset_password(data: ResetPasswordRequest):
         raise HTTPException(status_code=404, detail="User not found")
     
     # Update password in database
-    user.password = pwd_context.hash(data.new_password.encode('utf-8'))
+    user.password = await password_hasher.hash(data.new_password)
     await user.save()
     
     # Clean up the token after successful password reset
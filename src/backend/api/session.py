@@ -9,7 +9,6 @@ import base64
 import tempfile
 
 from src.ai.chart_bot.generate_related_qn import chart_bot_related_query
-from src.ai.stock_prediction.stock_prediction_functions import get_sentiment_rating, get_stock_history, sarimax_predict
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from fastapi import APIRouter, Request, HTTPException, Query,status, BackgroundTasks, File, UploadFile
@@ -20,20 +19,21 @@ from src.ai.tools.finance_data_tools import get_stock_data
 import src.backend.db.mongodb as mongodb
 from src.backend.utils.agent_comm import process_agent_input_functional
 from src.ai.agents.fast_agent import process_fast_agent_input
-from src.ai.agents.summarizer import stream_summary
+from src.ai.agents.summarizer import stream_summary, invalidate_summary_cache
 from src.backend.models.app_io_schemas import StockPredictionRequest, StockDataRequest, ResponseFeedback, ExportResponse, UpdateSessionAccess,UpdateMessageAccess
 # from src.backend.utils.api_utils import notify_slack_error, redis_manager
-from src.backend.utils.export_utils import markdown_to_pdf, markdown_to_docx, slugify
+from src.backend.utils.lazy_imports import lazy_import
 import src.backend.utils as utils
 import src.backend.db.filestorage as filestorage
 from src.backend.db.mongodb import RelatedQueriesResponse,UploadResponse, MessageLog,StockDataRequest, QueryRequestModel
 from src.backend.core.api_limit import apiSecurityFree
-from src.ai.stock_prediction.stock_prediction import StockAnalysisAgent
 from src.backend.utils.api_utils import redis_manager
 from src.backend.db.mongodb import handle_partial_data_storage
 from src.backend.utils.utils import render_charts_as_images
 
-stock_agent = StockAnalysisAgent()
+# statsmodels/yfinance forecasting and PDF/DOCX export load on first use (or background warm-up).
+stock_prediction_functions = lazy_import("src.ai.stock_prediction.stock_prediction_functions")
+export_utils = lazy_import("src.backend.utils.export_utils")
 router = APIRouter()
 
 @router.get("/__ping")
@@ -105,7 +105,8 @@ async def list_messages(user: apiSecurityFree, session_id: str = Query(..., alia
 @router.delete("/delete/{session_id}")
 async def delete_session(user: apiSecurityFree, session_id: str):
     
-    result = await mongodb.delete_session(user.id, session_id)
+    session_log = await mongodb.SessionLog.find_one({"user_id": user.id, "session_id": session_id})
+    result = await mongodb.delete_session(session_id) if session_log else None
 
     if not result:
         raise HTTPException(
@@ -183,6 +184,8 @@ async def query_and_stream(user: apiSecurityFree, query: QueryRequestModel, requ
         partial_sources = []
         partial_related_queries = []
         partial_metadata = None
+        # A retry reuses message_id; its first save must replace the earlier attempt's items.
+        mongodb.reset_message_log_sync_state(session_id, message_id)
 
         try:
             if search_mode == 'summarizer':
@@ -200,7 +203,8 @@ async def query_and_stream(user: apiSecurityFree, query: QueryRequestModel, requ
                         prev_message_id=prev_message_id,
                         timezone = timezone,
                         ip_address = ip_address,
-                        doc_ids = doc_ids
+                        doc_ids = doc_ids,
+                        realtime_info = realtime_info
                     )
 
                 else:
@@ -407,8 +411,12 @@ async def query_and_stream(user: apiSecurityFree, query: QueryRequestModel, requ
                             store_data['retry'] = data_to_send.get('retry', False)
                             partial_metadata = store_data.get('metadata', None)
                             bgt.add_task(mongodb.append_data, user_id, session_id, message_id, current_messages_log, local_time, timezone, store_data['retry'], store_data.get('metadata', None), time_taken)
+                            if retry_response:
+                                # Runs after append_data, so summaries of the old answer cannot be re-cached.
+                                bgt.add_task(invalidate_summary_cache, message_id)
 
-                            yield f"data: {json.dumps({'type': 'metadata', 'data': store_data.get('metadata',None)})}\n\n".encode('utf-8')
+                            # metadata (per-agent/per-model cost) is stored only; the client gets token totals.
+                            yield f"data: {json.dumps({'type': 'metadata', 'data': store_data.get('usage',None)})}\n\n".encode('utf-8')
 
                             # if not error_flag:
                             #     yield f"data: {json.dumps({'type': 'complete', 'message_id': message_id, 'notification': data_to_send.get('notification', True), 'suggestions': data_to_send.get('suggestions', True)})}\n\n".encode('utf-8')
@@ -490,6 +498,8 @@ async def query_and_stream(user: apiSecurityFree, query: QueryRequestModel, requ
                 bgt=bgt,
                 is_cancelled=True
             )
+           if retry_response:
+               bgt.add_task(invalidate_summary_cache, message_id)
            return
         except Exception as e:
             traceback.print_exc()
@@ -618,6 +628,7 @@ async def export_response_endpoint(user: apiSecurityFree, payload: ExportRespons
     cleaned_response = cleaned_response.replace("```", "")
     markdown_content = f"# {query_text}\n\n{cleaned_response}"
 
+    export = await asyncio.to_thread(export_utils.load)
     file_content_64 = ""
     filename = ""
 
@@ -625,29 +636,29 @@ async def export_response_endpoint(user: apiSecurityFree, payload: ExportRespons
         file_content_64 = base64.b64encode(markdown_content.encode("utf-8")).decode(
             "utf-8"
         )
-        filename = f"{slugify(query_text)}.md"
+        filename = f"{export.slugify(query_text)}.md"
 
     elif payload.format == "pdf":
         with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
             pdf_path = tmp.name
         try:
-            await markdown_to_pdf(markdown_content, pdf_path)
+            await export.markdown_to_pdf(markdown_content, pdf_path)
             with open(pdf_path, "rb") as f:
                 file_content_64 = base64.b64encode(f.read()).decode("utf-8")
         finally:
             os.remove(pdf_path)
-        filename = f"{slugify(query_text)}.pdf"
+        filename = f"{export.slugify(query_text)}.pdf"
 
     elif payload.format == "docx":
         with tempfile.NamedTemporaryFile(suffix=".docx", delete=False) as tmp:
             docx_path = tmp.name
         try:
-            await markdown_to_docx(markdown_content, docx_path)
+            await export.markdown_to_docx(markdown_content, docx_path)
             with open(docx_path, "rb") as f:
                 file_content_64 = base64.b64encode(f.read()).decode("utf-8")
         finally:
             os.remove(docx_path)
-        filename = f"{slugify(query_text)}.docx"
+        filename = f"{export.slugify(query_text)}.docx"
 
     else:
         raise HTTPException(status_code=400, detail="Unsupported format.")
@@ -767,17 +778,15 @@ async def predict_stock(user: apiSecurityFree, request: StockPredictionRequest):
     company_name = request.company_name
     ticker = request.ticker
     exchange_symbol = request.exchange_symbol
-    if stock_agent is None:
-        raise HTTPException(status_code=503, detail="Stock Analysis Agent not initialized")
-    
     try:
+        prediction = await asyncio.to_thread(stock_prediction_functions.load)
 
-        rating, reason = await asyncio.to_thread(get_sentiment_rating, company_name, exchange_symbol)
+        rating, reason = await asyncio.to_thread(prediction.get_sentiment_rating, company_name, exchange_symbol)
 
-        history_data = await asyncio.to_thread(get_stock_history, ticker, rating, reason)
+        history_data = await asyncio.to_thread(prediction.get_stock_history, ticker, rating, reason)
 
         adjusted_mean_series, adjusted_ci_df = await asyncio.to_thread(
-            sarimax_predict, history_data, exchange_symbol, 5
+            prediction.sarimax_predict, history_data, exchange_symbol, 5
         )
 
         historical_data = []
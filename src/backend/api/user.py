@@ -1,7 +1,9 @@
 from http.client import HTTPException
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, BackgroundTasks
+from fastapi import HTTPException as FastAPIHTTPException
+import uuid
 from fastapi.security import OAuth2PasswordBearer
 from src.backend.db import mongodb
 from src.backend.core.api_limit import apiSecurityFree
@@ -34,8 +36,14 @@ async def update_user_personalization(user: apiSecurityFree, request: mongodb.Pe
     return updated
 
 @router.delete("/user/{user_id}")
-async def delete_user_endpoint(user_id: str):
+async def delete_user_endpoint(user_id: str, bgt: BackgroundTasks, background: bool = False):
     try:
+        if background:
+            job_id = str(uuid.uuid4())
+            await mongodb.save_deletion_progress(job_id, {"job_id": job_id, "user_id": user_id, "status": "queued"})
+            bgt.add_task(mongodb.delete_user, user_id, job_id)
+            return {"status": "accepted", "job_id": job_id}
+
         # Use the cascading delete service function
         result = await mongodb.delete_user(user_id)
         return result
@@ -49,6 +57,13 @@ async def delete_user_endpoint(user_id: str):
             detail=f"Unexpected error occurred while deleting user: {str(e)}"
         )
      
+@router.get("/user/delete-status/{job_id}")
+async def delete_user_status(job_id: str):
+    progress = await mongodb.get_deletion_progress(job_id)
+    if not progress:
+        raise FastAPIHTTPException(status_code=404, detail=f"Deletion job '{job_id}' not found")
+    return progress
+
 @router.get("/is_new_user")
 async def is_new_user(token: Annotated[str, Depends(oauth2_scheme)]):
     return await mongodb.is_new_user_token(token)
@@ -1,9 +1,10 @@
-from datetime import datetime, timezone
-from fastapi import FastAPI, Response, status
+from datetime import datetime, timedelta, timezone
+from fastapi import FastAPI, Request, Response, status
+from src.backend.core.api_limit import apiSecurityInternal
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, HTMLResponse
+from src.backend.utils.metrics import metrics_registry
 from src.backend.utils.api_utils import redis_manager
-from src.ai.stock_prediction.stock_prediction import StockAnalysisAgent
 from contextlib import asynccontextmanager
 from src.backend.db import mongodb
 from src.backend.api.auth import router as auth_router
@@ -12,15 +13,33 @@ from src.backend.api.user import router as user_router
 from src.backend.api.chat import router as chat_router
 import os
 from src.backend.api.customize import router as customize_router
-
-stock_agent = StockAnalysisAgent()
+from src.ai.tools.code_gen_tools import code_worker_pool
+from src.backend.utils.password_hashing import password_hasher
+from src.backend.utils.static_assets import static_assets
+from src.backend.utils.currency_rates import currency_rates
+from src.backend.utils.quote_cache import quote_cache
+from src.backend.db.symbol_index import symbol_index
+from src.backend.utils.lazy_imports import warm_up
+import asyncio
 
 
 @asynccontextmanager
 async def on_startup(app: FastAPI):
     await mongodb.init_db()
     await redis_manager.connect()
+    asyncio.get_running_loop().run_in_executor(None, code_worker_pool.start)
+    await static_assets.start()
+    await currency_rates.start()
+    await symbol_index.start()
+    # Heavy optional stacks (forecasting, plotting, export) import in the background once we are serving.
+    asyncio.get_running_loop().run_in_executor(None, warm_up)
     yield
+    static_assets.stop()
+    currency_rates.stop()
+    symbol_index.stop()
+    code_worker_pool.shutdown()
+    password_hasher.shutdown()
+    quote_cache.shutdown()
 
 app = FastAPI(title="Finance Insight Agent API", lifespan=on_startup)
 
@@ -38,33 +57,26 @@ app.include_router(chat_router)
 app.include_router(customize_router)
 
 @app.get("/", response_class=HTMLResponse)
-async def get():
-    return FileResponse(path="out/index.html")
-@app.get("/{url:path}")
-async def chat_redirect(url: str):
-    try:
-        if url.startswith("public/") and os.path.exists(url):
-            return FileResponse(url)
-    except Exception as e:
-        print(f"Error checking or serving {url}: {e}")
+async def get(request: Request):
+    return static_assets.serve("index.html", request) or FileResponse(path="out/index.html")
+@app.get("/health")
+async def health():
+    return {"status": "ok", "time": datetime.now(timezone.utc).isoformat()}
 
-    try:
-        if os.path.exists(f"out/{url}"):
-            return FileResponse(f"out/{url}")
-    except Exception as e:
-        print(f"Error checking or serving out/{url}: {e}")
+@app.get("/metrics", dependencies=[apiSecurityInternal])
+async def metrics():
+    return Response(content=metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
-    try:
-        if os.path.exists(f"out/{url}.html"):
-            return FileResponse(f"out/{url}.html")
-    except Exception as e:
-        print(f"Error checking or serving out/{url}.html: {e}")
+@app.get("/metrics/usage", dependencies=[apiSecurityInternal])
+async def usage_metrics(hours: float = 24):
+    """Token usage, cost and LLM time of the queries answered in the last `hours`, per agent and per model."""
+    return await mongodb.get_usage_aggregates(datetime.now(timezone.utc) - timedelta(hours=hours))
 
-    try:
-        if os.path.exists(f"out/{url}.txt"):
-            return FileResponse(f"out/{url}.txt")
-    except Exception as e:
-        print(f"Error checking or serving out/{url}.txt: {e}")
+@app.get("/{url:path}")
+async def chat_redirect(url: str, request: Request):
+    response = static_assets.serve(url, request)
+    if response is not None:
+        return response
 
     return Response(status_code=status.HTTP_404_NOT_FOUND)
 
@@ -2,11 +2,18 @@ from src.backend.core.limiter import AsyncRateLimiter
 from src.backend.utils.api_utils import redis_manager
 from src.backend.db import mongodb
 from typing import Annotated, Optional
+import hmac
+import os
 from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
+# Bearer token for operational endpoints (/metrics, /metrics/usage); without it they are closed.
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN", "")
+# Opt-in for local scraping without a token. Unsafe behind a same-host reverse proxy,
+# where every external request arrives from loopback.
+INTERNAL_METRICS_ALLOW_LOOPBACK = os.getenv("INTERNAL_METRICS_ALLOW_LOOPBACK", "false").lower() in ("1", "true", "yes")
 # apiSecurity = Annotated[str, Depends(oauth2_scheme)]
 
 AsyncRateLimiter.set_enable(True)
@@ -30,4 +37,16 @@ class GetCurrentUser:
 apiSecurityStrict = Annotated[mongodb.Users, Depends(GetCurrentUser("strict"))]
 apiSecurityStandard = Annotated[mongodb.Users, Depends(GetCurrentUser("standard"))]
 apiSecurityRelaxed = Annotated[mongodb.Users, Depends(GetCurrentUser("relaxed"))]
-apiSecurityFree = Annotated[mongodb.Users, Depends(GetCurrentUser("free"))]
\ No newline at end of file
+apiSecurityFree = Annotated[mongodb.Users, Depends(GetCurrentUser("free"))]
+
+
+async def require_internal(req: Request):
+    if INTERNAL_API_TOKEN:
+        scheme, _, token = req.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), INTERNAL_API_TOKEN.encode()):
+            return
+    elif INTERNAL_METRICS_ALLOW_LOOPBACK and req.client and req.client.host in ("127.0.0.1", "::1", "localhost"):
+        return
+    raise HTTPException(status_code=403, detail="Forbidden")
+
+apiSecurityInternal = Depends(require_internal)
\ No newline at end of file
@@ -0,0 +1,321 @@
+"""
+In-process vector index for user uploaded documents.
+
+Each document is stored as two files under DOC_INDEX_DIR:
+    <file_id>.npy   float32 matrix of L2-normalised chunk embeddings (loaded with mmap)
+    <file_id>.json  chunk texts plus file metadata (user_id, filename, content_hash, embedder)
+
+plus a small marker per (user_id, content_hash) under hashes/, so duplicate uploads
+are detected with one file lookup instead of reading every indexed document.
+
+Search is a cosine top-k over the matrices of the requested doc_ids, so lookups
+need no external vector service. Embeddings come from a local CPU
+sentence-transformers model (DOC_EMBEDDING_MODEL, all-MiniLM-L6-v2 by default).
+When sentence-transformers is not installed or the model cannot be loaded (e.g. no
+network and no cached weights), or DOC_EMBEDDING_MODEL is empty, a deterministic
+hashing embedder is used instead. It matches shared words and word pairs only, so
+paraphrases and synonyms retrieve noticeably worse. Documents indexed with a
+different embedder than the current one are re-embedded from their stored chunks
+on first search.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+DOC_INDEX_DIR = os.getenv("DOC_INDEX_DIR", os.path.join("data", "doc_index"))
+DOC_EMBEDDING_MODEL = os.getenv("DOC_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+DOC_HASH_EMBEDDING_DIM = int(os.getenv("DOC_HASH_EMBEDDING_DIM", "1024"))
+DOC_CHUNK_SIZE = int(os.getenv("DOC_CHUNK_SIZE", "1000"))
+DOC_CHUNK_OVERLAP = int(os.getenv("DOC_CHUNK_OVERLAP", "200"))
+# Documents kept open (mmapped matrix plus parsed chunks) between searches.
+DOC_INDEX_CACHE_SIZE = int(os.getenv("DOC_INDEX_CACHE_SIZE", "64"))
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.'][a-z0-9]+)*")
+
+
+class HashingEmbedder:
+    """Signed feature hashing of unigrams and bigrams with sublinear term frequency."""
+
+    def __init__(self, dim: int = DOC_HASH_EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts: Dict[int, float] = {}
+            for feature in self._features(text):
+                hashed = zlib.crc32(feature.encode("utf-8"))
+                index = hashed % self.dim
+                sign = 1.0 if (hashed >> 31) & 1 == 0 else -1.0
+                counts[index] = counts.get(index, 0.0) + sign
+            for index, value in counts.items():
+                matrix[row, index] = np.sign(value) * (1.0 + np.log(abs(value))) if value else 0.0
+        return normalize_rows(matrix)
+
+
+class SentenceTransformerEmbedder:
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.name = f"st-{model_name}"
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = self.model.encode(texts, batch_size=32, normalize_embeddings=True, convert_to_numpy=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder():
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                if DOC_EMBEDDING_MODEL:
+                    try:
+                        _embedder = SentenceTransformerEmbedder(DOC_EMBEDDING_MODEL)
+                    except Exception as e:
+                        print(f"Falling back to hashing embedder, retrieval quality will be lower: {str(e)}")
+                        _embedder = HashingEmbedder()
+                else:
+                    _embedder = HashingEmbedder()
+    return _embedder
+
+
+class DocumentIndex:
+    def __init__(self, index_dir: str = DOC_INDEX_DIR, cache_size: int = DOC_INDEX_CACHE_SIZE):
+        self.index_dir = index_dir
+        self.hash_dir = os.path.join(index_dir, "hashes")
+        self.cache_size = cache_size
+        self._loaded: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hash_dir_ready = False
+        self._splitter = RecursiveCharacterTextSplitter(
+            chunk_size=DOC_CHUNK_SIZE,
+            chunk_overlap=DOC_CHUNK_OVERLAP,
+            separators=["\n\n", "\n", ". ", " ", ""]
+        )
+
+    def _paths(self, file_id: str):
+        safe_id = re.sub(r"[^A-Za-z0-9_.-]", "_", file_id)
+        base = os.path.join(self.index_dir, safe_id)
+        return f"{base}.npy", f"{base}.json"
+
+    def _hash_path(self, user_id: str, content_hash: str) -> str:
+        user_key = hashlib.sha256(str(user_id).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.hash_dir, f"{user_key}-{content_hash}.json")
+
+    def _write_hash_marker(self, meta: Dict[str, Any]):
+        path = self._hash_path(meta.get("user_id"), meta.get("content_hash"))
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"file_id": meta.get("file_id"), "filename": meta.get("filename")}, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _ensure_hash_dir(self):
+        """Creates the hash markers, backfilling them once for indexes written before they existed."""
+        if self._hash_dir_ready:
+            return
+        with self._lock:
+            if self._hash_dir_ready:
+                return
+            if not os.path.isdir(self.hash_dir):
+                os.makedirs(self.hash_dir, exist_ok=True)
+                for name in os.listdir(self.index_dir):
+                    if not name.endswith(".json"):
+                        continue
+                    try:
+                        with open(os.path.join(self.index_dir, name), "r", encoding="utf-8") as f:
+                            meta = json.load(f)
+                        self._write_hash_marker(meta)
+                    except Exception as e:
+                        print(f"Skipping {name} while building document hash markers: {str(e)}")
+            self._hash_dir_ready = True
+
+    def _find_by_hash(self, user_id: str, content_hash: str) -> Optional[Dict[str, Any]]:
+        path = self._hash_path(user_id, content_hash)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                existing = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # A marker without its document (e.g. deleted by hand) is not a duplicate.
+        if not all(os.path.exists(p) for p in self._paths(existing.get("file_id", ""))):
+            return None
+        return existing
+
+    def add_document(self, file_id: str, filename: str, text_content: str, user_id: str) -> Dict[str, Any]:
+        content_hash = hashlib.sha256(text_content.encode("utf-8")).hexdigest()
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._ensure_hash_dir()
+        existing = self._find_by_hash(user_id, content_hash)
+        if existing:
+            print(f"Document with hash {content_hash} already exists")
+            return {
+                "status": "success",
+                "message": "Document already exists",
+                "file_id": existing.get("file_id"),
+                "existing_filename": existing.get("filename"),
+                "content_hash": content_hash
+            }
+
+        texts = [text for text in self._splitter.split_text(text_content) if text.strip()]
+        if not texts:
+            return {"status": "error", "message": "Document contains no readable text content."}
+
+        embedder = get_embedder()
+        matrix = embedder.embed(texts)
+
+        meta = {
+            "file_id": file_id,
+            "user_id": user_id,
+            "filename": filename,
+            "content_hash": content_hash,
+            "embedder": embedder.name,
+            "dim": int(matrix.shape[1]),
+            "chunks": texts,
+        }
+
+        self._write_matrix(file_id, matrix, meta)
+        self._write_hash_marker(meta)
+
+        with self._lock:
+            self._loaded.pop(file_id, None)
+
+        return {
+            "status": "success",
+            "chunks": len(texts),
+            "content_hash": content_hash,
+            "message": "Document stored successfully",
+            "file_id": file_id
+        }
+
+    def _write_matrix(self, file_id: str, matrix: np.ndarray, meta: Dict[str, Any]):
+        npy_path, json_path = self._paths(file_id)
+        # Write to temp files and rename so readers never see a half-written document.
+        with open(f"{npy_path}.tmp", "wb") as f:
+            np.save(f, matrix)
+        with open(f"{json_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(f"{npy_path}.tmp", npy_path)
+        os.replace(f"{json_path}.tmp", json_path)
+
+    def _reembed(self, file_id: str, meta: Dict[str, Any], embedder):
+        print(f"Re-embedding document {file_id}: indexed with {meta.get('embedder')}, searching with {embedder.name}")
+        matrix = embedder.embed(meta["chunks"])
+        meta = {**meta, "embedder": embedder.name, "dim": int(matrix.shape[1])}
+        self._write_matrix(file_id, matrix, meta)
+        with self._lock:
+            self._loaded.pop(file_id, None)
+        return self._load(file_id)
+
+    def _load(self, file_id: str):
+        with self._lock:
+            if file_id in self._loaded:
+                self._loaded.move_to_end(file_id)
+                return self._loaded[file_id]
+
+        npy_path, json_path = self._paths(file_id)
+        if not (os.path.exists(npy_path) and os.path.exists(json_path)):
+            return None
+        with open(json_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        matrix = np.load(npy_path, mmap_mode="r")
+
+        with self._lock:
+            self._loaded[file_id] = (matrix, meta)
+            self._loaded.move_to_end(file_id)
+            while len(self._loaded) > self.cache_size:
+                self._loaded.popitem(last=False)
+        return matrix, meta
+
+    def delete_document(self, file_id: str):
+        with self._lock:
+            self._loaded.pop(file_id, None)
+        npy_path, json_path = self._paths(file_id)
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            marker = self._hash_path(meta.get("user_id"), meta.get("content_hash"))
+            if os.path.exists(marker):
+                os.remove(marker)
+        except (OSError, ValueError):
+            pass
+        for path in (npy_path, json_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def search(self, query: str, doc_ids: List[str], k: int = 5, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        embedder = get_embedder()
+        query_vector = embedder.embed([query])[0]
+
+        candidates = []
+        for file_id in doc_ids or []:
+            loaded = self._load(str(file_id))
+            if loaded is None:
+                continue
+            matrix, meta = loaded
+            # Callers without a user see nothing: doc_ids alone are not proof of ownership.
+            if not user_id or str(meta.get("user_id")) != str(user_id):
+                continue
+            if meta.get("embedder") != embedder.name:
+                loaded = self._reembed(str(file_id), meta, embedder)
+                if loaded is None:
+                    continue
+                matrix, meta = loaded
+
+            scores = matrix @ query_vector
+            top = min(k, scores.shape[0])
+            indices = np.argpartition(-scores, top - 1)[:top]
+            for index in indices:
+                candidates.append((float(scores[index]), meta, int(index)))
+
+        candidates.sort(key=lambda item: item[0], reverse=True)
+        return [
+            {
+                "content": meta["chunks"][index],
+                "filename": meta.get("filename"),
+                "file_id": meta.get("file_id"),
+                "confidence_score": score
+            }
+            for score, meta, index in candidates[:k]
+        ]
+
+
+document_index = DocumentIndex()
+
+
+async def store_document_embeddings(file_id: str, filename: str, text_content: str, user_id: str) -> Dict[str, Any]:
+    try:
+        return await asyncio.to_thread(document_index.add_document, file_id, filename, text_content, user_id)
+    except Exception as e:
+        print(f"Error storing embeddings: {str(e)}")
+        return {"status": "error", "message": str(e)}
+
+
+def search_file_storage(query: str, doc_ids: list, k: int = 5, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    return document_index.search(query, doc_ids, k=k, user_id=user_id)
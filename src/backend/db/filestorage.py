@@ -12,6 +12,7 @@ from docx import Document as DocxDocument
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.embeddings.base import Embeddings 
 from src.backend.utils.async_runner import AsyncRunner
+from src.backend.db import doc_index
 
 asyncrunner = AsyncRunner()
 
@@ -90,7 +91,7 @@ async def extract_text_from_file(file: UploadFile) -> str:
 
 async def upload_files(user_id, file):
     """
-    Upload and process a file, storing its embeddings in Qdrant.
+    Upload and process a file, storing its embeddings in the local document index.
     
     Args:
         file: The uploaded file object
@@ -125,25 +126,24 @@ async def upload_files(user_id, file):
             raise ValueError(f"Unsupported file format: {file.filename}")
 
         # Store document embeddings
-        # result = await qdrant.store_document_embeddings(
-        #     file_id=file_id,
-        #     filename=file.filename,
-        #     text_content=content,
-        #     user_id=user_id
-        # )
+        result = await doc_index.store_document_embeddings(
+            file_id=file_id,
+            filename=file.filename,
+            text_content=content or "",
+            user_id=user_id
+        )
         
-        # # Handle the result based on status
-        # if result["status"] == "success":
-        #     print(f"Successfully uploaded file: {file.filename} with ID: {result.get('file_id')}")
-        #     return result.get("file_id")
-        # else:
-        #     raise Exception(f"Failed to store document: {result.get('message', 'Unknown error')}")
-        return ""
+        # Handle the result based on status
+        if result["status"] == "success":
+            print(f"Successfully uploaded file: {file.filename} with ID: {result.get('file_id')}")
+            return result.get("file_id")
+        else:
+            raise Exception(f"Failed to store document: {result.get('message', 'Unknown error')}")
         
     except Exception as e:
         raise Exception(f"Unexpected status from storage {e}")
         
-async def process_docx(self, file: UploadFile):
+async def process_docx(file: UploadFile):
     try:
         from docx import Document
         doc = Document(BytesIO(file.file.read()))
@@ -154,7 +154,7 @@ async def process_docx(self, file: UploadFile):
         print(f"Error processing DOCX: {e}")
         return ""
 
-async def process_md(self, file: UploadFile):
+async def process_md(file: UploadFile):
     try:
         content = file.file.read().decode("utf-8")
         print(f"\n--- Extracted Markdown Text ---\n{content}\n")
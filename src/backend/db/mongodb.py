@@ -1,14 +1,19 @@
 import asyncio
+import hashlib
+import json
 import os
 import re
 import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone, timedelta
 from beanie import init_beanie
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import DESCENDING, MongoClient, ReturnDocument
+from pymongo import DESCENDING, MongoClient, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
 from typing import Any, List, Optional, Dict, Union
 from beanie.odm.fields import PydanticObjectId
+from beanie.odm.utils.encoder import Encoder
 from beanie.operators import  And
 from src.backend.utils import JWT
 from fastapi import HTTPException, UploadFile, BackgroundTasks
@@ -17,12 +22,19 @@ from typing import Optional
 from src.backend.models.model import *
 from src.backend.models.app_io_schemas import Onboarding
 from src.ai.agents.utils import generate_session_title
+from src.backend.db.symbol_index import symbol_index
+from src.backend.utils.metrics import register_mongo_listener
+from src.backend.utils.quote_cache import quote_cache
+from src.backend.utils.usage import USAGE_FIELDS
 import requests
 
 MONGO_URI = os.getenv("MONGO_URI")
 FMP_API_KEY= os.getenv("FM_API_KEY")
 
+register_mongo_listener()
+
 jwt_handler = None
+bson_encoder = Encoder()
 
 
 async def init_db():
@@ -44,6 +56,10 @@ def _fetch_fmp_data(query: str) -> Union[List[Dict[str, Any]], str]:
     
 def search_company(query: str):
     query_upper = query.upper()
+    local_results = symbol_index.lookup(query)
+    if local_results:
+        return {"query": query_upper, "results": local_results, "timestamp": datetime.now(), "source": "symbol_index"}
+
     client = MongoClient(MONGO_URI)
     db = client["insight_agent_fmp"]
     collection = db["fmp_query_results"]
@@ -72,6 +88,7 @@ def search_company(query: str):
     result = _fetch_fmp_data(query)
     if isinstance(result, str):
         raise HTTPException(status_code=500, detail=result)
+    symbol_index.add_records(result)
 
     new_entry = {
         "query": query_upper,
@@ -273,13 +290,15 @@ def get_or_update_historical(ticker: str, period: str) -> dict:
 def fetch_stock_price_change(symbol: str) -> dict:
     """
     Get stock price change for the given symbol.
-    Uses cached data if updated today; else updates from FMP.
+    Served from the shared quote cache for QUOTE_CACHE_TTL seconds, then from
+    the daily Mongo copy, then from FMP.
     """
     symbol = symbol.upper()
+    return quote_cache.get_or_fetch("price_change", symbol, lambda: _fetch_stock_price_change(symbol))
 
-    client = MongoClient(MONGO_URI)
-    db = client["insight_agent_fmp"]
-    collection = db["stock_price_changes"]
+
+def _fetch_stock_price_change(symbol: str) -> dict:
+    collection = _get_fmp_db()["stock_price_changes"]
     # 1. Check for cached data
     record = collection.find_one({"symbol": symbol})
     today = datetime.now().date()
@@ -327,6 +346,59 @@ def fetch_stock_price_change(symbol: str) -> dict:
         "source": "https://financialmodelingprep.com/"
     }
 
+_sync_fmp_client = None
+
+
+def _get_fmp_db():
+    # Shared sync client for hot lookup caches; MongoClient is thread-safe and pools connections.
+    global _sync_fmp_client
+    if _sync_fmp_client is None:
+        client = MongoClient(MONGO_URI)
+        try:
+            # Lookups are $in on key, and upserts of one place from concurrent requests must not duplicate it.
+            client["insight_agent_fmp"]["geocode_cache"].create_index("key", unique=True)
+        except PyMongoError as e:
+            print(f"Error creating geocode_cache index: {str(e)}")
+        _sync_fmp_client = client
+    return _sync_fmp_client["insight_agent_fmp"]
+
+
+def get_cached_geocodes(keys: List[str]) -> Dict[str, dict]:
+    """Returns {normalized_place: {"latitude", "longitude", "formatted_address"}} for cached places."""
+    if not keys:
+        return {}
+    collection = _get_fmp_db()["geocode_cache"]
+    cached = {}
+    for record in collection.find({"key": {"$in": list(keys)}}):
+        cached[record["key"]] = {
+            "latitude": record.get("latitude"),
+            "longitude": record.get("longitude"),
+            "formatted_address": record.get("formatted_address"),
+        }
+    return cached
+
+
+def upsert_geocodes(entries: Dict[str, dict]):
+    if not entries:
+        return
+    collection = _get_fmp_db()["geocode_cache"]
+    now = datetime.now()
+    operations = [
+        UpdateOne(
+            {"key": key},
+            {"$set": {**value, "key": key, "last_updated": now}},
+            upsert=True
+        )
+        for key, value in entries.items()
+    ]
+    try:
+        collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        # A concurrent upsert of the same place inserted it first; its coordinates are as good as ours.
+        if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+            raise
+
+
 async def init_web_search_db():
     client = AsyncIOMotorClient(MONGO_URI)
     database = client["insight_agent"]
@@ -368,127 +440,178 @@ async def get_user_by_token(token: str)->returnStatus:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
-async def append_data(user_id, session_id, message_id, messages, local_time, time_zone, retry = False, metadata = None, time_taken = 0):
-    from src.backend.utils.utils import get_unique_response_id, get_date_time
-    try:
-        log_entry = await MessageLog.find_one({"session_id": str(session_id), "message_id": str(message_id)})
-        if not log_entry:
-            log_entry = MessageLog(session_id=str(session_id), message_id=str(message_id))
-            log_entry.created_at = local_time
-        else:
-            log_entry.research = []
-            log_entry.stock_chart = []
+MESSAGE_LOG_SYNC_LIMIT = 2000
+# (session_id, message_id) -> what this process has already written for that MessageLog
+_message_log_sync_state: "OrderedDict[tuple, dict]" = OrderedDict()
 
-        if metadata:
-            log_entry.metadata = metadata
 
-        if time_taken:
-            log_entry.time_taken = time_taken
+def _get_message_log_sync_state(key: tuple) -> dict:
+    state = _message_log_sync_state.get(key)
+    if state is None:
+        state = {"lock": asyncio.Lock(), "synced": False, "research_ids": set(), "stock_keys": set(), "fingerprints": {}, "default_checked": False}
+        _message_log_sync_state[key] = state
+        while len(_message_log_sync_state) > MESSAGE_LOG_SYNC_LIMIT:
+            oldest_key, oldest = next(iter(_message_log_sync_state.items()))
+            if oldest["lock"].locked():
+                break
+            _message_log_sync_state.pop(oldest_key)
+    _message_log_sync_state.move_to_end(key)
+    return state
 
-        # canvas_response_data = {}
 
-        for content in messages:
-            if not content:
-                continue
-            if 'user_query' in content:
-                content['retry'] = retry
-                log_entry.human_input = content
+def reset_message_log_sync_state(session_id, message_id):
+    """
+    Forgets what was written for this message. Called when a stream starts, so a retry
+    reusing the message_id rewrites research/stock_chart instead of pushing onto the
+    failed attempt's items.
+    """
+    _message_log_sync_state.pop((str(session_id), str(message_id)), None)
 
-            elif 'type' in content and content['type'] == 'research':
-                if content['agent_name'] != "DB Search Agent":
-                    log_entry.research.append({'agent_name': content['agent_name'], 'title': content['title'], 'id': content.get('id', get_unique_response_id()), 'created_at': content['created_at']})
-            
-            elif 'research-manager' in content:
-                log_entry.research.append({'agent_name': content['agent_name'], 'title': content['research-manager'], 'id': content.get('id', get_unique_response_id()), 'created_at': content['created_at']})
-            
-            elif 'response' in content:
-                log_entry.response = {'agent_name': content['agent_name'], 'content': content['response'], 'id': content.get('id', get_unique_response_id()), 'created_at': content['created_at']}
-
-            elif 'type' in content and content['type'] == 'response':
-                log_entry.response = {'agent_name': content['agent_name'], 'content': content['content'], 'id': content.get('id', get_unique_response_id()), 'created_at': content['created_at']}
-
-            # elif 'type' in content and content['type'] == 'canvas_info':
-            #     canvas_response_data["document_id"] = content.get("canvas_document_id")
-            #     canvas_response_data["version_number"] = content.get("canvas_version_number", 1)
-
-            # elif 'type' in content and content['type'] == 'canvas-preview':
-            #     canvas_response_data["preview"] = content.get("content", "")
-
-            # elif 'type' in content and content['type'] == 'stock_data':
-            #     data = content['data']
-            #     symbol = data['realtime']['symbol']
-            #     timestamp = data['realtime']['timestamp']
-
-            #     already_exists = any(
-            #         d['realtime']['symbol'] == symbol and d['realtime']['timestamp'] == timestamp
-            #         for d in log_entry.stock_chart
-            #     )
-            #     if not already_exists:
-            #         log_entry.stock_chart.append(data)
-            elif content.get('type') == 'stock_data':
-                data = content.get('data') or {}
-                realtime = data.get('realtime') or {}
-
-                # symbol fallback: try multiple places, default to None
-                symbol = realtime.get('symbol') or data.get('symbol') or None
-
-                # If timestamp missing, generate one (UTC ISO8601)
-                try:
-                    timestamp = realtime.get('timestamp')
-                    if not timestamp:
-                        timestamp = datetime.now(timezone).isoformat()
-                        realtime['timestamp'] = timestamp
-                        data['realtime'] = realtime
-                        # optional debug:
-                        # print(f"[DEBUG] Auto-added timestamp for {symbol}: {timestamp}")
-                except Exception:
-                    timestamp = datetime.now(timezone).isoformat()
-                    realtime['timestamp'] = timestamp
-                    data['realtime'] = realtime
-
-                # Ensure log_entry.stock_chart exists and iterate defensively
-                existing_charts = log_entry.stock_chart if getattr(log_entry, "stock_chart", None) else []
-
-                already_exists = any(
-                    (d.get('realtime', {}).get('symbol') == symbol) and (d.get('realtime', {}).get('timestamp') == timestamp)
-                    for d in existing_charts
-                )
 
-                if not already_exists:
-                    # append the (possibly updated) data dict
-                    if not getattr(log_entry, "stock_chart", None):
-                        log_entry.stock_chart = []
-                    log_entry.stock_chart.append(data)
+def _fingerprint(value) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
 
-            elif 'type' in content and content['type'] == 'map_layers':
-                log_entry.map_layers.append(content['data'])
 
-            elif 'sources' in content:
-                log_entry.sources = content['sources']
-            
-            elif "error" in content:
-                log_entry.error = content
-        
-        # if canvas_response_data:
-        #     log_entry.canvas_response = {
-        #         "document_id": canvas_response_data.get("document_id", ""),
-        #         "version_number": canvas_response_data.get("version_number", 1),
-        #         "final_content": log_entry.response["content"] if log_entry.response else "",
-        #         "preview": canvas_response_data.get("preview", "")
-        #     }
-
-        if not log_entry.response:
-            log_entry.response = {'agent_name': 'Response Generator Agent', 'content': '**There was an error generating the response**', 'id': get_unique_response_id(), 'created_at': get_date_time(timezone=time_zone).isoformat()}
-
-        # if "document_id" in canvas_response_data:
-        #     log_entry.response = {
-        #         "agent_name":    "",
-        #         "content":       "",
-        #         "id":            get_unique_response_id(),
-        #         "created_at":    get_date_time(timezone=time_zone).isoformat()
-        #     }
-
-        lg = await log_entry.save()
+def _stock_chart_key(data: dict) -> tuple:
+    realtime = data.get('realtime') or {}
+    return (realtime.get('symbol') or data.get('symbol') or None, realtime.get('timestamp'))
+
+
+def _collect_message_log_items(messages, retry):
+    """
+    Folds streamed message items into MessageLog fields with the same
+    precedence as a full rewrite. Items without an id get one assigned in place,
+    so later calls with the same (growing) list produce the same ids.
+    """
+    from src.backend.utils.utils import get_unique_response_id
+
+    fields = {}
+    research = []
+    stock_chart = []
+    stock_keys = set()
+
+    for content in messages:
+        if not content:
+            continue
+        if 'user_query' in content:
+            content['retry'] = retry
+            fields['human_input'] = content
+
+        elif 'type' in content and content['type'] == 'research':
+            if content['agent_name'] != "DB Search Agent":
+                content.setdefault('id', get_unique_response_id())
+                research.append({'agent_name': content['agent_name'], 'title': content['title'], 'id': content['id'], 'created_at': content['created_at']})
+
+        elif 'research-manager' in content:
+            content.setdefault('id', get_unique_response_id())
+            research.append({'agent_name': content['agent_name'], 'title': content['research-manager'], 'id': content['id'], 'created_at': content['created_at']})
+
+        elif 'response' in content:
+            content.setdefault('id', get_unique_response_id())
+            fields['response'] = {'agent_name': content['agent_name'], 'content': content['response'], 'id': content['id'], 'created_at': content['created_at']}
+
+        elif 'type' in content and content['type'] == 'response':
+            content.setdefault('id', get_unique_response_id())
+            fields['response'] = {'agent_name': content['agent_name'], 'content': content['content'], 'id': content['id'], 'created_at': content['created_at']}
+
+        elif content.get('type') == 'stock_data':
+            data = content.get('data') or {}
+            realtime = data.get('realtime') or {}
+
+            # If timestamp missing, generate one (UTC ISO8601) and keep it on the item
+            if not realtime.get('timestamp'):
+                realtime['timestamp'] = datetime.now(timezone.utc).isoformat()
+                data['realtime'] = realtime
+
+            chart_key = _stock_chart_key(data)
+            if chart_key not in stock_keys:
+                stock_keys.add(chart_key)
+                stock_chart.append(data)
+
+        elif 'type' in content and content['type'] == 'map_layers':
+            fields['map_layers'] = content['data']
+
+        elif 'sources' in content:
+            fields['sources'] = content['sources']
+
+        elif "error" in content:
+            fields['error'] = content
+
+    return fields, research, stock_chart
+
+
+async def append_data(user_id, session_id, message_id, messages, local_time, time_zone, retry = False, metadata = None, time_taken = 0):
+    """
+    Persists the streamed message items for one message.
+
+    The first call for a message since its stream started (see
+    reset_message_log_sync_state) rewrites research/stock_chart in full (same
+    result as rebuilding the document). Later calls with the same
+    growing list only $push the new research/stock items and $set scalar fields
+    whose value changed, so long answers are not rewritten on every save.
+    """
+    from src.backend.utils.utils import get_unique_response_id, get_date_time
+    try:
+        key = (str(session_id), str(message_id))
+        state = _get_message_log_sync_state(key)
+
+        async with state["lock"]:
+            fields, research, stock_chart = _collect_message_log_items(messages, retry)
+
+            if metadata:
+                fields['metadata'] = metadata
+            if time_taken:
+                fields['time_taken'] = time_taken
+
+            set_fields = {}
+            new_fingerprints = {}
+            for field, value in fields.items():
+                fingerprint = _fingerprint(value)
+                if state["fingerprints"].get(field) != fingerprint:
+                    set_fields[field] = value
+                    new_fingerprints[field] = fingerprint
+
+            push_fields = {}
+            if not state["synced"]:
+                set_fields['research'] = research
+                set_fields['stock_chart'] = stock_chart
+            else:
+                new_research = [item for item in research if item['id'] not in state["research_ids"]]
+                new_stock_chart = [data for data in stock_chart if _stock_chart_key(data) not in state["stock_keys"]]
+                if new_research:
+                    push_fields['research'] = {'$each': new_research}
+                if new_stock_chart:
+                    push_fields['stock_chart'] = {'$each': new_stock_chart}
+
+            insert_defaults = {
+                'human_input': None, 'research': [], 'response': None, 'sources': None, 'error': None,
+                'stock_chart': [], 'map_layers': None, 'metadata': None, 'time_taken': 0,
+                'access_level': AccessLevel.PRIVATE.value, 'created_at': local_time,
+            }
+            set_on_insert = {k: v for k, v in insert_defaults.items() if k not in set_fields and k not in push_fields}
+
+            update = {}
+            if set_fields:
+                update['$set'] = bson_encoder.encode(set_fields)
+            if push_fields:
+                update['$push'] = bson_encoder.encode(push_fields)
+
+            collection = MessageLog.get_motor_collection()
+            log_filter = {"session_id": key[0], "message_id": key[1]}
+
+            if update or not state["synced"]:
+                update['$setOnInsert'] = bson_encoder.encode(set_on_insert)
+                await collection.update_one(log_filter, update, upsert=True)
+
+            if 'response' not in fields and not state["default_checked"]:
+                default_response = {'agent_name': 'Response Generator Agent', 'content': '**There was an error generating the response**', 'id': get_unique_response_id(), 'created_at': get_date_time(timezone=time_zone).isoformat()}
+                await collection.update_one({**log_filter, "response": None}, {"$set": {"response": default_response}})
+                state["default_checked"] = True
+
+            state["synced"] = True
+            state["fingerprints"].update(new_fingerprints)
+            state["research_ids"].update(item['id'] for item in research)
+            state["stock_keys"].update(_stock_chart_key(data) for data in stock_chart)
 
         await add_session(session_id, 'New Chat', local_time, time_zone, user_id)
 
@@ -499,6 +622,46 @@ async def append_data(user_id, session_id, message_id, messages, local_time, tim
         print(f"Error in storing message log: {str(e)}")
 
 
+async def get_usage_aggregates(since: datetime, until: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Sums the token usage, cost and LLM time stored in MessageLog metadata over a
+    time window: overall, per agent and per model, most expensive first.
+    """
+    created_at = {"$gte": since}
+    if until:
+        created_at["$lt"] = until
+
+    def grouped(field: str, key: str) -> List[dict]:
+        return [
+            {"$unwind": f"$metadata.{field}"},
+            {"$group": {"_id": f"$metadata.{field}.{key}", "queries": {"$sum": 1},
+                        **{name: {"$sum": f"$metadata.{field}.{name}"} for name in USAGE_FIELDS}}},
+            {"$sort": {"token_cost": -1}},
+        ]
+
+    pipeline = [
+        {"$match": {"created_at": created_at, "metadata.llm_calls": {"$exists": True}}},
+        {"$facet": {
+            "totals": [{"$group": {"_id": None, "queries": {"$sum": 1},
+                                   **{name: {"$sum": f"$metadata.{name}"} for name in USAGE_FIELDS}}}],
+            "by_agent": grouped("by_agent", "agent"),
+            "by_model": grouped("by_model", "model"),
+        }},
+    ]
+    result = await MessageLog.get_motor_collection().aggregate(pipeline).to_list(length=1)
+    facets = result[0] if result else {}
+
+    totals = (facets.get("totals") or [{}])[0]
+    totals.pop("_id", None)
+    return {
+        "since": since.isoformat(),
+        "until": until.isoformat() if until else None,
+        "totals": totals or {"queries": 0, **{name: 0 for name in USAGE_FIELDS}},
+        "by_agent": [{"agent": row.pop("_id"), **row} for row in facets.get("by_agent", [])],
+        "by_model": [{"model": row.pop("_id"), **row} for row in facets.get("by_model", [])],
+    }
+
+
 async def append_graph_log_to_mongo(session_id: str, message_id: str, log: str):
     existing_log = await GraphLog.find_one({"session_id": session_id, "message_id": message_id})
     if existing_log:
@@ -1164,93 +1327,115 @@ async def rename_session_title(user_id:str, session_id: str, new_title:str):
 
     return {"new_title": new_title}
     
+DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", "500"))
+DELETE_ID_CHUNK_SIZE = 1000
+DELETE_CONCURRENCY = int(os.getenv("DELETE_CONCURRENCY", "3"))
+DELETION_JOB_TTL = 24 * 60 * 60
+_deletion_semaphore = None
+
+
+def _get_deletion_semaphore() -> asyncio.Semaphore:
+    # Shared across requests so a large account deletion cannot flood Mongo.
+    global _deletion_semaphore
+    if _deletion_semaphore is None:
+        _deletion_semaphore = asyncio.Semaphore(DELETE_CONCURRENCY)
+    return _deletion_semaphore
+
+
+async def _bounded(coro):
+    async with _get_deletion_semaphore():
+        return await coro
+
+
+def _chunks(items: List[Any], size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+async def save_deletion_progress(job_id: str, progress: Dict[str, Any]):
+    if not job_id:
+        return
+    from src.backend.utils.api_utils import redis_manager
+    try:
+        await redis_manager.safe_execute("set", f"deletion_job:{job_id}", json.dumps(progress, default=str), ex=DELETION_JOB_TTL)
+    except Exception as e:
+        print(f"Could not store deletion progress for job {job_id}: {str(e)}")
+
+
+async def get_deletion_progress(job_id: str) -> Optional[Dict[str, Any]]:
+    from src.backend.utils.api_utils import redis_manager
+    data = await redis_manager.safe_execute("get", f"deletion_job:{job_id}")
+    return json.loads(data) if data else None
+
+
+async def delete_sessions_bulk(session_ids: List[str], progress: Optional[Dict[str, Any]] = None, job_id: str = None) -> Dict[str, int]:
+    """
+    Deletes every document belonging to the given sessions using $in-batched
+    delete_many calls (a few round trips per DELETE_BATCH_SIZE sessions) and
+    returns deleted counts per collection.
+    """
+    counts = {'message_outputs': 0, 'message_logs': 0, 'map_data': 0, 'session_log': 0, 'session_history': 0, 'message_feedback': 0}
+    session_ids = list(dict.fromkeys(str(s) for s in session_ids if s))
+
+    for batch in _chunks(session_ids, DELETE_BATCH_SIZE):
+        # Message ids are needed for MessageFeedback, which has no session_id.
+        output_ids, log_ids = await asyncio.gather(
+            _bounded(MessageOutput.get_motor_collection().distinct("message_id", {"session_id": {"$in": batch}})),
+            _bounded(MessageLog.get_motor_collection().distinct("message_id", {"session_id": {"$in": batch}})),
+        )
+        message_ids = list({str(m) for m in output_ids + log_ids if m})
+
+        session_filter = {"session_id": {"$in": batch}}
+        results = await asyncio.gather(
+            _bounded(MessageOutput.get_motor_collection().delete_many(session_filter)),
+            _bounded(MessageLog.get_motor_collection().delete_many(session_filter)),
+            _bounded(MapData.get_motor_collection().delete_many(session_filter)),
+            _bounded(SessionLog.get_motor_collection().delete_many(session_filter)),
+            _bounded(SessionHistory.get_motor_collection().delete_many(session_filter)),
+            *[
+                _bounded(MessageFeedback.get_motor_collection().delete_many({"message_id": {"$in": id_chunk}}))
+                for id_chunk in _chunks(message_ids, DELETE_ID_CHUNK_SIZE)
+            ],
+        )
+
+        for name, result in zip(['message_outputs', 'message_logs', 'map_data', 'session_log', 'session_history'], results[:5]):
+            counts[name] += result.deleted_count
+        counts['message_feedback'] += sum(result.deleted_count for result in results[5:])
+
+        if progress is not None:
+            progress['sessions_done'] = progress.get('sessions_done', 0) + len(batch)
+            progress['message_ids_checked'] = progress.get('message_ids_checked', 0) + len(message_ids)
+            progress['deleted'] = dict(counts)
+            await save_deletion_progress(job_id, progress)
+
+    # Code execution namespaces are keyed by chat session; free them with the session.
+    from src.ai.tools.code_gen_tools import code_worker_pool
+    try:
+        await asyncio.to_thread(code_worker_pool.drop_sessions, session_ids)
+    except Exception as e:
+        print(f"Error dropping code execution sessions: {str(e)}")
+
+    return counts
+
+
 async def delete_session(session_id: str):
    
-    try:        
-        deletion_and_fetch_tasks = [
-            MessageOutput.find(MessageOutput.session_id == session_id).delete(),
-            MessageLog.find(MessageLog.session_id == session_id).delete(),
-            # GraphLog.find(GraphLog.session_id == session_id).delete(),
-            MapData.find(MapData.session_id == session_id).delete(),
-            SessionLog.find(SessionLog.session_id == session_id).delete(),
-            SessionHistory.find(SessionHistory.session_id == session_id).delete(),
-            ##Get message_ids at the same time (parallel)
-            MessageOutput.find(MessageOutput.session_id == session_id).to_list(),
-        ]
-        print("Operation start")
-        results = await asyncio.gather(*deletion_and_fetch_tasks, return_exceptions=True)
-        print("Operation stop")
-        # Check if session existed (if all deletions returned 0, session didn't exist)
-        deletion_results = results[:6]  # First 7 are deletions
-        message_outputs = results[6]    # Last one is message_outputs
-        
-        total_deleted = sum(
-            getattr(result, 'deleted_count', 0) 
-            for result in deletion_results 
-            if not isinstance(result, Exception)
-        )
-        
-        if total_deleted == 0:
+    try:
+        session_log = await SessionLog.find_one(SessionLog.session_id == session_id)
+        progress = {}
+        counts = await delete_sessions_bulk([session_id], progress=progress)
+
+        if sum(counts.values()) == 0:
             raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found")
-        
-        # SPEED OPTIMIZATION 3: Bulk MessageFeedback deletion
-        feedback_deleted_count = 0
-        if not isinstance(message_outputs, Exception) and message_outputs:
-            # Collect unique message_ids
-            message_ids = set()
-            for record in message_outputs:
-                if hasattr(record, 'message_id') and record.message_id:
-                    message_ids.add(str(record.message_id))
-            
-            if message_ids:
-                
-                feedback_tasks = []
-                batch_size = 50  # Process 50 message_ids at once
-                message_id_list = list(message_ids)
-                
-                for i in range(0, len(message_id_list), batch_size):
-                    batch = message_id_list[i:i + batch_size]
-                    # Delete multiple feedback records in one query per batch
-                    for msg_id in batch:
-                        feedback_tasks.append(
-                            MessageFeedback.find(MessageFeedback.message_id == msg_id).delete()
-                        )
-                
-                # Execute all feedback deletions in parallel
-                if feedback_tasks:
-                    feedback_results = await asyncio.gather(*feedback_tasks, return_exceptions=True)
-                    feedback_deleted_count = sum(
-                        getattr(result, 'deleted_count', 0)
-                        for result in feedback_results
-                        if not isinstance(result, Exception)
-                    )
-        
-        ##Build response (streamlined)
-        deleted_items = []
-        deletion_names = ['message_outputs', 'message_logs', 'map_data', 'session_log', 'session_history']
-        
-        for i, result in enumerate(deletion_results):
-            if not isinstance(result, Exception) and hasattr(result, 'deleted_count') and result.deleted_count > 0:
-                deleted_items.append(f"{deletion_names[i]} ({result.deleted_count})")
-        
-        if feedback_deleted_count > 0:
-            deleted_items.append(f"message_feedback ({feedback_deleted_count})")
-        
-        # Get session title from the deleted records if available
-        session_title = None
-        if not isinstance(message_outputs, Exception) and message_outputs:
-            # Try to get title from any message output that might have it
-            for output in message_outputs:
-                if hasattr(output, 'session_title'):
-                    session_title = output.session_title
-                    break
-        
+
+        deleted_items = [f"{name} ({count})" for name, count in counts.items() if count > 0]
+
         return {
             "status": "success",
             "message": f"Session '{session_id}' and all associated data deleted",
-            "session_title": session_title,
+            "session_title": session_log.title if session_log else None,
             "deleted": deleted_items,
-            "message_ids_checked_in_messageFeedback": len(message_ids) if 'message_ids' in locals() else 0
+            "message_ids_checked_in_messageFeedback": progress.get('message_ids_checked', 0)
         }
         
     except HTTPException:
@@ -1284,85 +1469,56 @@ async def check_time_taken(session_id: Optional[str] = None, message_id: Optiona
         query["message_id"] = message_id
     return await MessageLog.find(query).to_list()
 
-async def delete_user(user_id: str) -> Dict[str, Any]:
+async def delete_user(user_id: str, job_id: str = None) -> Dict[str, Any]:
     """
-    Delete ALL user data simultaneously - no batches for maximum speed
+    Delete all user data with batched, concurrency-bounded bulk deletes.
+    When job_id is given, progress is published for /user/delete-status/{job_id}.
     """
+    progress = {"job_id": job_id, "user_id": user_id, "status": "running", "sessions_total": 0, "sessions_done": 0, "deleted": {}}
     try:
         user_object_id = PydanticObjectId(user_id)
         
         print(f"Starting user deletion for: {user_id}")
         
-        # Step 1: Get user and all session info in parallel
-        user, session_logs, session_histories = await asyncio.gather(
+        # Step 1: Get user and all session ids in parallel
+        user, log_session_ids, history_session_ids = await asyncio.gather(
             Users.get(user_object_id),
-            SessionLog.find(SessionLog.user_id == user_object_id).to_list(),
-            SessionHistory.find(SessionHistory.user_id == user_object_id).to_list(),
-            return_exceptions=True
+            SessionLog.get_motor_collection().distinct("session_id", {"user_id": user_object_id}),
+            SessionHistory.get_motor_collection().distinct("session_id", {"user_id": user_object_id}),
         )
         
-        if isinstance(user, Exception) or not user:
+        if not user:
             print(f"User {user_id} not found")
             raise HTTPException(status_code=404, detail="User not found.")
         
-        # Collect unique session_ids
-        session_ids = set()
-        if not isinstance(session_logs, Exception):
-            session_ids.update(log.session_id for log in session_logs)
-        if not isinstance(session_histories, Exception):
-            session_ids.update(history.session_id for history in session_histories)
-        
-        session_ids = list(session_ids)
+        session_ids = list(set(log_session_ids) | set(history_session_ids))
+        progress["sessions_total"] = len(session_ids)
+        await save_deletion_progress(job_id, progress)
+
         if len(session_ids) == 0:
             print("User has no sessions to delete.")
         else:
-            print(f"Found {len(session_ids)} sessions - deleting ALL at once...")
-        
-        # Step 2: Delete ALL sessions simultaneously (no batches)
-        all_tasks = []
-        
-        if session_ids:
-            # Create tasks for ALL sessions at once
-            session_tasks = [delete_session(session_id) for session_id in session_ids]
-            all_tasks.extend(session_tasks)
-        
-        # Step 3: Add user-specific data deletion tasks to the same batch
-        all_tasks.extend([
-            Personalization.find(Personalization.user_id == user_object_id).delete(),
-            UploadResponse.find(UploadResponse.user_id == user_object_id).delete(),
-            Onboarding.find(Onboarding.user_id == user_object_id).delete(),
-        ])
-        
-        print(f"Executing {len(all_tasks)} operations simultaneously...")
+            print(f"Found {len(session_ids)} sessions - deleting in batches of {DELETE_BATCH_SIZE}...")
         
-        # Execute EVERYTHING at once
-        all_results = await asyncio.gather(*all_tasks, return_exceptions=True)
+        # Step 2: Delete sessions in $in batches
+        session_counts = await delete_sessions_bulk(session_ids, progress=progress, job_id=job_id)
         
-        print("All operations completed!")
-        
-        # Process results
-        deleted_summary = []
-        
-        # Process session results
-        session_results = all_results[:len(session_ids)]
-        for i, result in enumerate(session_results):
-            session_id = session_ids[i]
-            if isinstance(result, Exception):
-                deleted_summary.append(f"Session {session_id}: Error")
-                print(f"Session {session_id} error: {str(result)}")
-            else:
-                session_title = result.get('session_title', 'No title')
-                deleted_summary.append(f"Session {session_id} ({session_title}): {', '.join(result['deleted'])}")
+        # Step 3: User-specific data
+        user_data_results = await asyncio.gather(
+            _bounded(Personalization.get_motor_collection().delete_many({"user_id": user_object_id})),
+            _bounded(UploadResponse.get_motor_collection().delete_many({"user_id": {"$in": [str(user_id), user_object_id]}})),
+            _bounded(Onboarding.get_motor_collection().delete_many({"user_id": user_object_id})),
+            return_exceptions=True
+        )
         
-        # Process user-specific data results
-        user_data_results = all_results[len(session_ids):]
+        deleted_summary = [f"{name}: {count}" for name, count in session_counts.items() if count > 0]
         data_types = ['personalization', 'upload_responses', 'onboarding']
         
         for i, result in enumerate(user_data_results):
             if isinstance(result, Exception):
                 print(f"Error deleting {data_types[i]}: {str(result)}")
                 deleted_summary.append(f"{data_types[i]}: Error - {str(result)}")
-            elif hasattr(result, 'deleted_count') and result.deleted_count > 0:
+            elif result.deleted_count > 0:
                 deleted_summary.append(f"{data_types[i]}: {result.deleted_count}")
         
         # Step 4: Delete user record (final step)
@@ -1370,6 +1526,9 @@ async def delete_user(user_id: str) -> Dict[str, Any]:
         deleted_summary.append("User record")
         
         print(f"User {user_id} deletion completed successfully!")
+
+        progress["status"] = "completed"
+        await save_deletion_progress(job_id, progress)
         
         return {
             "status": "success", 
@@ -1378,10 +1537,14 @@ async def delete_user(user_id: str) -> Dict[str, Any]:
             "deleted_summary": deleted_summary
         }
         
-    except HTTPException:
+    except HTTPException as e:
+        progress.update({"status": "failed", "error": e.detail})
+        await save_deletion_progress(job_id, progress)
         raise
     except Exception as e:
         print(f"Error deleting user {user_id}: {str(e)}")
+        progress.update({"status": "failed", "error": str(e)})
+        await save_deletion_progress(job_id, progress)
         raise HTTPException(
             status_code=500,
             detail=f"Error deleting user '{user_id}': {str(e)}"
@@ -0,0 +1,229 @@
+"""
+In-memory index of ticker symbols, company names and exchanges.
+
+Loaded from a JSON dump (a list of FMP search records: symbol, name, currency,
+exchange, exchangeFullName) at SYMBOL_INDEX_DUMP and reloaded when the file
+changes. Tickers resolve through an exact map, names through a sorted prefix list
+and a trigram index for fuzzy matches. Callers fall back to the FMP search
+endpoint on a miss and feed those results back with add_records.
+
+Without a dump the index only holds those learned records, so `lookup` then
+accepts exact symbol or name matches only; a prefix or fuzzy hit on a partial
+index ("Tata" after learning Tata Motors) would hide the other companies FMP
+knows. When SYMBOL_INDEX_DUMP_URL is set, `start` re-downloads the dump every
+SYMBOL_INDEX_REFRESH_INTERVAL seconds.
+"""
+import asyncio
+import bisect
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import requests
+
+SYMBOL_INDEX_DUMP = os.getenv("SYMBOL_INDEX_DUMP", os.path.join("data", "symbols.json"))
+SYMBOL_INDEX_DUMP_URL = os.getenv("SYMBOL_INDEX_DUMP_URL", "")
+SYMBOL_INDEX_CHECK_INTERVAL = float(os.getenv("SYMBOL_INDEX_CHECK_INTERVAL", "300"))
+SYMBOL_INDEX_REFRESH_INTERVAL = int(os.getenv("SYMBOL_INDEX_REFRESH_INTERVAL", str(24 * 60 * 60)))
+SYMBOL_INDEX_MIN_SCORE = float(os.getenv("SYMBOL_INDEX_MIN_SCORE", "0.45"))
+# Trigrams shared by a large share of names ("inc", "ion") add cost but little signal.
+SYMBOL_INDEX_MAX_POSTING = int(os.getenv("SYMBOL_INDEX_MAX_POSTING", "5000"))
+
+NAME_STOPWORDS = {"inc", "corp", "corporation", "co", "ltd", "limited", "plc", "sa", "ag", "nv", "the", "holdings", "group", "company"}
+
+
+def normalize_name(name: str) -> str:
+    name = (name or "").lower().replace("&", " and ")
+    tokens = re.findall(r"[a-z0-9]+", name)
+    return " ".join(token for token in tokens if token not in NAME_STOPWORDS)
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymbolIndex:
+    def __init__(self, dump_path: str = SYMBOL_INDEX_DUMP):
+        self.dump_path = dump_path
+        self._lock = threading.Lock()
+        self._records: List[Dict[str, Any]] = []
+        self._by_symbol: Dict[str, List[int]] = {}
+        self._names: List[tuple] = []
+        self._name_keys: List[str] = []
+        self._name_grams: List[set] = []
+        self._postings: Dict[str, List[int]] = {}
+        self._known: set = set()
+        self._loaded_mtime: Optional[float] = None
+        self._last_check = 0.0
+        self._refresh_task = None
+
+    @property
+    def has_dump(self) -> bool:
+        return self._loaded_mtime is not None
+
+    def __len__(self):
+        return len(self._records)
+
+    def _add(self, record: Dict[str, Any]) -> Optional[tuple]:
+        record_id = len(self._records)
+        self._records.append(record)
+        self._known.add((record["symbol"].upper(), record.get("exchange")))
+        self._by_symbol.setdefault(record["symbol"].upper(), []).append(record_id)
+
+        name = normalize_name(record.get("name", ""))
+        grams = trigrams(name) if name else set()
+        self._name_grams.append(grams)
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(record_id)
+        return (name, record_id) if name else None
+
+    def _index_record(self, record: Dict[str, Any]):
+        entry = self._add(record)
+        if entry:
+            position = bisect.bisect_left(self._names, entry)
+            self._names.insert(position, entry)
+            self._name_keys.insert(position, entry[0])
+
+    def _rebuild(self, records: List[Dict[str, Any]]):
+        self._records, self._by_symbol, self._name_grams, self._postings, self._known = [], {}, [], {}, set()
+        names = [self._add(record) for record in records if isinstance(record, dict) and record.get("symbol")]
+        self._names = sorted(entry for entry in names if entry)
+        self._name_keys = [key for key, _ in self._names]
+
+    def load(self, force: bool = False):
+        """Loads the dump when it is new or changed; cheap to call before every lookup."""
+        now = time.monotonic()
+        if not force and now - self._last_check < SYMBOL_INDEX_CHECK_INTERVAL and self._loaded_mtime is not None:
+            return
+        self._last_check = now
+
+        try:
+            mtime = os.path.getmtime(self.dump_path)
+        except OSError:
+            return
+        if not force and mtime == self._loaded_mtime:
+            return
+
+        try:
+            with open(self.dump_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+        except Exception as e:
+            print(f"Error loading symbol index dump {self.dump_path}: {str(e)}")
+            return
+
+        with self._lock:
+            self._rebuild(records)
+            self._loaded_mtime = mtime
+        print(f"Symbol index loaded with {len(self._records)} records")
+
+    def refresh_dump(self, url: str = SYMBOL_INDEX_DUMP_URL) -> int:
+        """Downloads a fresh dump (JSON list of search records) and reloads the index."""
+        if not url:
+            return 0
+        response = requests.get(url, timeout=60)
+        response.raise_for_status()
+        records = response.json()
+
+        os.makedirs(os.path.dirname(self.dump_path) or ".", exist_ok=True)
+        # Workers sharing the dump path refresh independently; a per-process temp file keeps their writes apart.
+        tmp_path = f"{self.dump_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(records, f)
+        os.replace(tmp_path, self.dump_path)
+        self.load(force=True)
+        return len(self._records)
+
+    def add_records(self, records: List[Dict[str, Any]]):
+        """Adds records learned from network fallbacks so the next lookup is local."""
+        if not isinstance(records, list):
+            return
+        with self._lock:
+            for record in records:
+                if isinstance(record, dict) and record.get("symbol") and (record["symbol"].upper(), record.get("exchange")) not in self._known:
+                    self._index_record(record)
+
+    async def watch(self):
+        while True:
+            try:
+                if not self.has_dump or time.time() - self._loaded_mtime >= SYMBOL_INDEX_REFRESH_INTERVAL:
+                    count = await asyncio.to_thread(self.refresh_dump)
+                    print(f"Symbol index dump refreshed with {count} records")
+            except Exception as e:
+                print(f"Error refreshing symbol index dump: {str(e)}")
+            await asyncio.sleep(min(SYMBOL_INDEX_REFRESH_INTERVAL, 60 * 60))
+
+    async def start(self):
+        if SYMBOL_INDEX_DUMP_URL and self._refresh_task is None:
+            self.load()
+            self._refresh_task = asyncio.create_task(self.watch())
+
+    def stop(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    def _matches_exchange(self, record: Dict[str, Any], exchange: Optional[str]) -> bool:
+        if not exchange:
+            return True
+        exchange = exchange.strip().upper()
+        return exchange in (str(record.get("exchange", "")).upper(), str(record.get("exchangeShortName", "")).upper())
+
+    def get_symbol(self, symbol: str, exchange: Optional[str] = None) -> List[Dict[str, Any]]:
+        self.load()
+        with self._lock:
+            ids = self._by_symbol.get((symbol or "").strip().upper(), [])
+            return [self._records[i] for i in ids if self._matches_exchange(self._records[i], exchange)]
+
+    def lookup(self, query: str, limit: int = 10, exchange: Optional[str] = None) -> List[Dict[str, Any]]:
+        """search() when a full dump is loaded, otherwise exact symbol/name matches only; [] means ask FMP."""
+        # Load first so has_dump reflects a dump that appeared since the last check.
+        self.load()
+        return self.search(query, limit=limit, exchange=exchange, exact_only=not self.has_dump)
+
+    def search(self, query: str, limit: int = 10, exchange: Optional[str] = None, exact_only: bool = False) -> List[Dict[str, Any]]:
+        self.load()
+        with self._lock:
+            return self._search(query, limit, exchange, exact_only)
+
+    def _search(self, query: str, limit: int, exchange: Optional[str], exact_only: bool) -> List[Dict[str, Any]]:
+        if not query or not self._records:
+            return []
+
+        scores: Dict[int, float] = {}
+        for record_id in self._by_symbol.get(query.strip().upper(), []):
+            scores[record_id] = 2.0
+
+        name = normalize_name(query)
+        if name:
+            start = bisect.bisect_left(self._name_keys, name)
+            for key, record_id in self._names[start:start + limit * 5]:
+                if not key.startswith(name) or (exact_only and key != name):
+                    break
+                scores[record_id] = max(scores.get(record_id, 0.0), 1.5 if key == name else 1.0 + len(name) / max(len(key), 1) * 0.4)
+
+        if name and not exact_only:
+            query_grams = trigrams(name)
+            hits: Counter = Counter()
+            for gram in query_grams:
+                posting = self._postings.get(gram, [])
+                if len(posting) <= SYMBOL_INDEX_MAX_POSTING:
+                    hits.update(posting)
+            for record_id, shared in hits.items():
+                similarity = shared / (len(query_grams) + len(self._name_grams[record_id]) - shared)
+                if similarity >= SYMBOL_INDEX_MIN_SCORE:
+                    scores[record_id] = max(scores.get(record_id, 0.0), similarity)
+
+        ranked = sorted(
+            (record_id for record_id in scores if self._matches_exchange(self._records[record_id], exchange)),
+            key=lambda record_id: scores[record_id],
+            reverse=True
+        )
+        return [self._records[record_id] for record_id in ranked[:limit]]
+
+
+symbol_index = SymbolIndex()
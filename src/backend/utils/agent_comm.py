@@ -1,14 +1,17 @@
 from typing import Dict, Any, List, AsyncGenerator, Optional
 from src.ai.insight_graph import InsightAgentGraph
-from src.backend.utils.utils import get_date_time, format_langgraph_message, PRICING, get_user_metadata
+from src.backend.utils.utils import get_date_time, format_langgraph_message, get_user_metadata
 import traceback
 from src.ai.agents.utils import get_related_queries_util
+from src.ai.agents.history import attach_turn_summaries, summarize_turn_later
 # from src.ai.tools.finance_data_tools import get_currency_exchange_rates
 import time
 import asyncio
 import src.backend.db.mongodb as mongodb
 from src.ai.llm.config import CountUsageMetricsPricingConfig
-from src.ai.llm.model import get_llm
+from src.backend.utils.metrics import latency_callback
+from src.backend.utils.usage import UsageTracker
+from src.backend.utils.currency_rates import currency_rates
 
 agent_graph_instance = InsightAgentGraph()
 
@@ -18,7 +21,7 @@ cmp = CountUsageMetricsPricingConfig()
 async def process_agent_input_functional(user_id: str, session_id: str, user_query: str, message_id: str, prev_message_id: str, realtime_info: bool, pro_reasoning: bool, retry_response: bool, timezone: str, ip_address:str, doc_ids: Optional[List[str]] = []) -> AsyncGenerator[Dict[str, Any], None]:
     start_time = time.monotonic()
     sources_for_message = []
-    query_metadata = {'input_tokens': 0, 'output_tokens': 0, 'total_tokens': 0, 'token_cost': 0.0}
+    usage_tracker = UsageTracker()
     final_response_content = "No response generated"
     collect_response = ""
 
@@ -45,31 +48,23 @@ async def process_agent_input_functional(user_id: str, session_id: str, user_que
 
 
     def count_usage_metrics(token_usage):
-        # model = token_usage.get('model', 'azure/gpt-4.1-mini')
-
-        # pricing = PRICING.get(model, PRICING["azure/gpt-4.1-mini"])
-        # model = token_usage.get('model', 'gemini/gemini-2.5-pro')
-
-        # pricing = PRICING.get(model, PRICING["gemini/gemini-2.5-pro"])
-        model = token_usage.get(get_llm(cmp.MODEL))
-        pricing = PRICING.get(model, PRICING.get[cmp.MODEL])
-
-        input_cost = pricing["input"] * token_usage.get("input_tokens", 0)
-        output_cost = pricing["output"] * token_usage.get("output_tokens", 0)
-        total_cost = input_cost + output_cost
-
-        query_metadata["input_tokens"] += token_usage.get("input_tokens", 0)
-        query_metadata["output_tokens"] += token_usage.get("output_tokens", 0)
-        query_metadata["total_tokens"] += token_usage.get("total_tokens", 0)
-        query_metadata["token_cost"] += total_cost
-
-
+        # Usage reported in stream updates; LLM calls made inside the graph are counted by usage_tracker itself.
+        usage_tracker.record(
+            token_usage.get('agent_name', 'unknown'),
+            token_usage.get('model', cmp.MODEL),
+            token_usage.get("input_tokens", 0),
+            token_usage.get("output_tokens", 0),
+            token_usage.get("total_tokens"),
+        )
 
     yield {"start_stream": str(message_id)}
     config = {
         "configurable": {
-            "thread_id": message_id},
-        "recursion_limit": 50
+            "thread_id": message_id,
+            "session_id": session_id,
+            "user_id": user_id},
+        "recursion_limit": 50,
+        "callbacks": [latency_callback, usage_tracker]
     }
 
     retry_count = 0
@@ -88,9 +83,9 @@ async def process_agent_input_functional(user_id: str, session_id: str, user_que
             ip_address
         ),
         "realtime_info": realtime_info,
-        "previous_messages": prev_session_data.get('messages', []),
+        "previous_messages": await attach_turn_summaries(prev_session_data.get('messages', [])),
         "reasoning": pro_reasoning,
-        "currency_rates": "",
+        "currency_rates": currency_rates.text,
         "doc_ids": doc_ids,
         "prev_doc_ids": prev_session_data.get('doc_ids', []),
     }
@@ -183,6 +178,7 @@ async def process_agent_input_functional(user_id: str, session_id: str, user_que
                     final_response_content = str(messages_list[-1])
 
             await mongodb.update_session_history_in_db(session_id, user_id, message_id, user_query, collect_response, doc_ids, local_time, timezone)
+            summarize_turn_later(user_query, collect_response)
 
             final_data_event = {'state': "completed_from_graph"}
 
@@ -198,7 +194,7 @@ async def process_agent_input_functional(user_id: str, session_id: str, user_que
 
             yield final_data_event
 
-        yield {"store_data":{}, 'notification': True, 'suggestions': True, 'retry': True}
+        yield {"store_data": {"metadata": usage_tracker.summary(), "usage": usage_tracker.client_summary()}, 'notification': True, 'suggestions': True, 'retry': True}
 
     except Exception as e:
         error_msg = f"Error in agent processing: {traceback.format_exc()}"
@@ -212,7 +208,7 @@ async def process_agent_input_functional(user_id: str, session_id: str, user_que
             await mongodb.update_session_history_in_db(session_id, user_id, message_id, user_query, collect_response or error_msg, doc_ids, local_time, timezone)
 
         yield {"enriched_content": store_current_message("error", error_event)}
-        yield {"store_data": {}, 'notification': False, 'suggestions': False, 'retry': True}
+        yield {"store_data": {"metadata": usage_tracker.summary(), "usage": usage_tracker.client_summary()}, 'notification': False, 'suggestions': False, 'retry': True}
 
     finally:
         pass
@@ -13,6 +13,7 @@ from urllib.parse import urlparse
 import logging
 import asyncio
 from dotenv import load_dotenv
+from src.backend.utils.metrics import REDIS_LATENCY
 
 load_dotenv(dotenv_path=".env", override=True)
 
@@ -61,14 +62,15 @@ class RedisManager:
             self.client = None
 
     async def safe_execute(self, command, *args, **kwargs):
-        try:
-            method = getattr(self.client, command)
-            return await method(*args, **kwargs)
-        except (ConnectionError, TimeoutError, RedisError) as e:
-            logger.warning(f"Redis command '{command}' failed: {e}")
-            await self.reconnect()
-            method = getattr(self.client, command)
-            return await method(*args, **kwargs)
+        with REDIS_LATENCY.time(command=command):
+            try:
+                method = getattr(self.client, command)
+                return await method(*args, **kwargs)
+            except (ConnectionError, TimeoutError, RedisError) as e:
+                logger.warning(f"Redis command '{command}' failed: {e}")
+                await self.reconnect()
+                method = getattr(self.client, command)
+                return await method(*args, **kwargs)
 
 redis_manager = RedisManager(
     host=REDIS_HOST,
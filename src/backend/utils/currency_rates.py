@@ -0,0 +1,120 @@
+"""
+Process-wide snapshot of USD exchange rates for the `currency_rates` prompt field.
+
+One worker at a time (guarded by a Redis lock) downloads the rates from Yahoo
+Finance every CURRENCY_RATES_REFRESH_INTERVAL seconds and stores them in Redis;
+every worker mirrors the Redis snapshot in memory and re-reads it every
+CURRENCY_RATES_SYNC_INTERVAL seconds. Requests only read the in-memory text, so
+all agents in a run see the same rates and none has to look them up mid-run.
+"""
+import asyncio
+import json
+import math
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from src.backend.utils.api_utils import redis_manager
+from src.backend.utils.lazy_imports import lazy_import
+
+yf = lazy_import("yfinance", warmup=False)
+
+CURRENCY_RATES_SYMBOLS = [s.strip().upper() for s in os.getenv("CURRENCY_RATES_SYMBOLS", "INR,EUR,GBP,JPY,AED,CNY,CAD,AUD,SGD,CHF").split(",") if s.strip()]
+CURRENCY_RATES_REFRESH_INTERVAL = int(os.getenv("CURRENCY_RATES_REFRESH_INTERVAL", str(60 * 60)))
+CURRENCY_RATES_SYNC_INTERVAL = int(os.getenv("CURRENCY_RATES_SYNC_INTERVAL", "60"))
+# Kept well past the refresh interval so a failed refresh leaves the last rates in place.
+CURRENCY_RATES_TTL = int(os.getenv("CURRENCY_RATES_TTL", str(24 * 60 * 60)))
+CURRENCY_RATES_KEY = "currency_rates:snapshot"
+CURRENCY_RATES_LOCK_KEY = "currency_rates:refresh_lock"
+
+
+def fetch_currency_rates(symbols=CURRENCY_RATES_SYMBOLS) -> Dict[str, float]:
+    """Latest close of USD/<symbol> for each symbol, from one yf.download call."""
+    tickers = [f"{symbol}=X" for symbol in symbols]
+    df = yf.download(tickers, period="5d", interval="1d", progress=False, threads=False, auto_adjust=False)
+    if df is None or df.empty or "Close" not in df:
+        return {}
+
+    closes = df["Close"]
+    if not hasattr(closes, "columns"):
+        closes = closes.to_frame(tickers[0])
+
+    rates = {}
+    for symbol, ticker in zip(symbols, tickers):
+        if ticker not in closes.columns:
+            continue
+        series = closes[ticker].dropna()
+        if not series.empty and not math.isnan(float(series.iloc[-1])):
+            rates[symbol] = round(float(series.iloc[-1]), 4)
+    return rates
+
+
+def format_currency_rates(snapshot: Optional[dict]) -> str:
+    if not snapshot or not snapshot.get("rates"):
+        return ""
+    as_of = datetime.fromtimestamp(snapshot["fetched_at"], timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+    rates = ", ".join(f"{symbol} {rate}" for symbol, rate in snapshot["rates"].items())
+    return f"Currency Exchange Rates (1 USD in each currency, as of {as_of}): {rates}"
+
+
+class CurrencyRateSnapshot:
+    def __init__(self, refresh_interval: int = CURRENCY_RATES_REFRESH_INTERVAL, sync_interval: int = CURRENCY_RATES_SYNC_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self.sync_interval = sync_interval
+        self.snapshot: Optional[dict] = None
+        self.text = ""
+        self._watch_task = None
+
+    def _mirror(self, snapshot: Optional[dict]):
+        if snapshot and (self.snapshot is None or snapshot["fetched_at"] >= self.snapshot["fetched_at"]):
+            self.snapshot = snapshot
+            self.text = format_currency_rates(snapshot)
+
+    async def load(self) -> Optional[dict]:
+        raw = await redis_manager.safe_execute("get", CURRENCY_RATES_KEY)
+        snapshot = json.loads(raw) if raw else None
+        self._mirror(snapshot)
+        return snapshot
+
+    async def refresh(self) -> bool:
+        """Downloads new rates if no other worker is doing so. Returns True if this worker stored a snapshot."""
+        acquired = await redis_manager.safe_execute("set", CURRENCY_RATES_LOCK_KEY, "1", nx=True, ex=max(self.sync_interval, 30))
+        if not acquired:
+            return False
+
+        rates = await asyncio.to_thread(fetch_currency_rates)
+        if not rates:
+            print("Currency rate refresh returned no rates, keeping previous snapshot")
+            return False
+
+        snapshot = {"rates": rates, "fetched_at": time.time()}
+        await redis_manager.safe_execute("set", CURRENCY_RATES_KEY, json.dumps(snapshot), ex=CURRENCY_RATES_TTL)
+        self._mirror(snapshot)
+        print(f"Currency rates refreshed for {len(rates)} currencies")
+        return True
+
+    async def sync(self):
+        snapshot = await self.load()
+        if snapshot is None or time.time() - snapshot["fetched_at"] >= self.refresh_interval:
+            await self.refresh()
+
+    async def watch(self):
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                print(f"Error syncing currency rates: {str(e)}")
+            await asyncio.sleep(self.sync_interval)
+
+    async def start(self):
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self.watch())
+
+    def stop(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+
+currency_rates = CurrencyRateSnapshot()
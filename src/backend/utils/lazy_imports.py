@@ -0,0 +1,63 @@
+"""
+Deferred imports for heavy, rarely used stacks (statsmodels forecasting, matplotlib,
+PDF/DOCX export) so importing the app stays fast and /health answers sooner.
+
+A LazyModule imports on first attribute access. Modules registered with
+register_warmup are imported by warm_up(), which the app runs in a background
+thread after startup, so the first request that needs them usually finds them loaded.
+"""
+import importlib
+import os
+import threading
+import time
+from types import ModuleType
+from typing import List
+
+LAZY_WARMUP_ENABLED = os.getenv("LAZY_WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+class LazyModule:
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    self._module = importlib.import_module(self._name)
+                    print(f"Loaded {self._name} in {time.perf_counter() - start:.2f}s")
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self.load(), attr)
+
+
+_warmup_modules: List[LazyModule] = []
+
+
+def register_warmup(module: LazyModule) -> LazyModule:
+    _warmup_modules.append(module)
+    return module
+
+
+def lazy_import(name: str, warmup: bool = True) -> LazyModule:
+    module = LazyModule(name)
+    return register_warmup(module) if warmup else module
+
+
+def warm_up():
+    """Imports every registered module; meant to run in a worker thread after startup."""
+    if not LAZY_WARMUP_ENABLED:
+        return
+    for module in _warmup_modules:
+        try:
+            module.load()
+        except Exception as e:
+            print(f"Error warming up {module._name}: {str(e)}")
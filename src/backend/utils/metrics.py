@@ -0,0 +1,216 @@
+"""
+Latency histograms for graph nodes, tools, LLM calls, Redis and MongoDB, plus
+simple gauges and counters, rendered in the Prometheus text exposition format for the /metrics endpoint.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [bucket counts..., sum, count]
+                series = [0] * len(self.buckets) + [0.0, 0]
+                self._series[key] = series
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _labels(self, key: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, key))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        for key, series in sorted(snapshot.items()):
+            for index, bound in enumerate(self.buckets):
+                lines.append(f"{self.name}_bucket{self._labels(key, ('le', repr(float(bound))))} {series[index]}")
+            lines.append(f"{self.name}_bucket{self._labels(key, ('le', '+Inf'))} {series[-1]}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {series[-2]}")
+            lines.append(f"{self.name}_count{self._labels(key)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}", f"{self.name} {self._value}"]
+
+
+class Counter(Gauge):
+    metric_type = "counter"
+
+    def set(self, value: float):
+        raise ValueError("Counters can only be incremented")
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, name: str, factory):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = factory()
+            return self._metrics[name]
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(name, lambda: Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        return self._register(name, lambda: Gauge(name, documentation))
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._register(name, lambda: Counter(name, documentation))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+NODE_LATENCY = metrics_registry.histogram("insight_graph_node_seconds", "Latency of LangGraph nodes.", ["node"])
+TOOL_LATENCY = metrics_registry.histogram("insight_tool_seconds", "Latency of agent tool calls.", ["tool", "status"])
+LLM_LATENCY = metrics_registry.histogram("insight_llm_seconds", "Latency of LLM calls.", ["model", "status"])
+REDIS_LATENCY = metrics_registry.histogram("insight_redis_seconds", "Latency of Redis commands.", ["command"],
+                                           buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+MONGO_LATENCY = metrics_registry.histogram("insight_mongo_seconds", "Latency of MongoDB commands.", ["command", "status"],
+                                           buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+
+
+class LatencyCallbackHandler(BaseCallbackHandler):
+    """Times LLM and tool runs through LangChain callbacks, keyed by run_id."""
+
+    run_inline = True
+
+    def __init__(self):
+        self._started: Dict[UUID, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _model_name(serialized: Optional[Dict[str, Any]], kwargs: Dict[str, Any]) -> str:
+        params = kwargs.get("invocation_params") or {}
+        serialized_kwargs = (serialized or {}).get("kwargs", {}) or {}
+        return str(params.get("model") or params.get("model_name") or serialized_kwargs.get("model_name")
+                   or serialized_kwargs.get("model") or (serialized or {}).get("name") or "unknown")
+
+    def _start(self, run_id: UUID, label: str):
+        with self._lock:
+            self._started[run_id] = (time.perf_counter(), label)
+
+    def _finish(self, run_id: UUID, histogram: Histogram, label_name: str, status: str):
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        if started:
+            histogram.observe(time.perf_counter() - started[0], **{label_name: started[1], "status": status})
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs):
+        self._start(run_id, self._model_name(serialized, kwargs))
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs):
+        self._start(run_id, self._model_name(serialized, kwargs))
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        self._finish(run_id, LLM_LATENCY, "model", "ok")
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs):
+        self._finish(run_id, LLM_LATENCY, "model", "error")
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs):
+        self._start(run_id, str((serialized or {}).get("name") or kwargs.get("name") or "unknown"))
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs):
+        self._finish(run_id, TOOL_LATENCY, "tool", "ok")
+
+    def on_tool_error(self, error, *, run_id: UUID, **kwargs):
+        self._finish(run_id, TOOL_LATENCY, "tool", "error")
+
+
+latency_callback = LatencyCallbackHandler()
+
+
+class MongoCommandLatencyListener(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_LATENCY.observe(event.duration_micros / 1_000_000, command=event.command_name, status="ok")
+
+    def failed(self, event):
+        MONGO_LATENCY.observe(event.duration_micros / 1_000_000, command=event.command_name, status="error")
+
+
+_mongo_listener_registered = False
+
+
+def register_mongo_listener():
+    """Must run before any MongoClient / AsyncIOMotorClient is created."""
+    global _mongo_listener_registered
+    if not _mongo_listener_registered:
+        monitoring.register(MongoCommandLatencyListener())
+        _mongo_listener_registered = True
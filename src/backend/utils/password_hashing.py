@@ -0,0 +1,76 @@
+"""
+bcrypt hashing and verification off the event loop.
+
+bcrypt takes tens to hundreds of milliseconds per call, so it runs in a small
+dedicated thread pool instead of inside the request handler. At most
+PASSWORD_HASH_MAX_PENDING operations may be queued or running; beyond that new
+requests are rejected with 503 so a login burst cannot grow an unbounded backlog
+or take threads from the default executor used by streaming requests.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from src.backend.utils.metrics import metrics_registry
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+PASSWORD_HASH_PENDING = metrics_registry.gauge("password_hash_pending", "Password hash/verify operations queued or running.")
+PASSWORD_HASH_REJECTED = metrics_registry.counter("password_hash_rejected_total", "Password operations rejected because the queue was full.")
+PASSWORD_HASH_WAIT = metrics_registry.histogram("password_hash_queue_wait_seconds", "Time password operations wait for a worker.", ["operation"])
+PASSWORD_HASH_SECONDS = metrics_registry.histogram("password_hash_seconds", "Time spent hashing or verifying a password.", ["operation"])
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordHasher:
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def _run(self, operation: str, func, *args):
+        if PASSWORD_HASH_PENDING.value >= self.max_pending:
+            PASSWORD_HASH_REJECTED.inc()
+            raise HTTPException(status_code=503, detail="Too many authentication requests, please retry shortly.", headers={"Retry-After": "1"})
+
+        queued_at = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            PASSWORD_HASH_WAIT.observe(started - queued_at, operation=operation)
+            try:
+                return func(*args)
+            finally:
+                PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started, operation=operation)
+
+        PASSWORD_HASH_PENDING.inc()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        finally:
+            PASSWORD_HASH_PENDING.dec()
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run("verify", pwd_context.verify, password.encode('utf-8'), hashed)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", pwd_context.hash, password.encode('utf-8'))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
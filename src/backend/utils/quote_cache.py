@@ -0,0 +1,166 @@
+"""
+Short-lived cache of realtime quotes shared by all workers through Redis.
+
+Quote tools run in worker threads, so this cache uses a synchronous Redis client
+with the same settings as redis_manager. An entry is fresh for QUOTE_CACHE_TTL
+seconds. Until QUOTE_CACHE_STALE_TTL it is still served, while one background
+refresh per key revalidates it. On a miss, threads in a process wait on a per-key
+lock and workers wait on a Redis lock, so a hot ticker costs about one upstream
+fetch per TTL window. Without Redis the cache degrades to per-process.
+"""
+import copy
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import redis
+
+from src.backend.utils.api_utils import redis_manager
+from src.backend.utils.metrics import metrics_registry
+
+QUOTE_CACHE_TTL = float(os.getenv("QUOTE_CACHE_TTL", "5"))
+QUOTE_CACHE_STALE_TTL = float(os.getenv("QUOTE_CACHE_STALE_TTL", "60"))
+# How long a worker waits for another worker's fetch of the same key before fetching itself.
+QUOTE_CACHE_WAIT = float(os.getenv("QUOTE_CACHE_WAIT", "2"))
+QUOTE_CACHE_LOCK_TTL = float(os.getenv("QUOTE_CACHE_LOCK_TTL", "10"))
+QUOTE_CACHE_REFRESH_WORKERS = int(os.getenv("QUOTE_CACHE_REFRESH_WORKERS", "4"))
+
+QUOTE_CACHE_HITS = metrics_registry.counter("quote_cache_hits_total", "Quote lookups answered from a fresh cache entry.")
+QUOTE_CACHE_STALE = metrics_registry.counter("quote_cache_stale_total", "Quote lookups answered from a stale entry while it is revalidated.")
+QUOTE_CACHE_MISSES = metrics_registry.counter("quote_cache_misses_total", "Quote lookups that waited for an upstream fetch.")
+
+
+class QuoteCache:
+    def __init__(self, ttl: float = QUOTE_CACHE_TTL, stale_ttl: float = QUOTE_CACHE_STALE_TTL):
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self._local: Dict[str, Tuple[float, Any]] = {}
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._client = None
+        self._executor = None
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = redis.Redis(**redis_manager.redis_config)
+        return self._client
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=QUOTE_CACHE_REFRESH_WORKERS, thread_name_prefix="quote-refresh")
+        return self._executor
+
+    def _redis(self, command: str, *args, default=None, **kwargs):
+        try:
+            return getattr(self.client, command)(*args, **kwargs)
+        except (redis.RedisError, OSError) as e:
+            print(f"Quote cache Redis error on {command}: {str(e)}")
+            return default
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _read(self, key: str) -> Optional[Tuple[float, Any]]:
+        entry = self._local.get(key)
+        if entry and time.time() - entry[0] < self.ttl:
+            return entry
+        raw = self._redis("get", key)
+        if raw:
+            data = json.loads(raw)
+            if entry is None or data["fetched_at"] > entry[0]:
+                entry = (data["fetched_at"], data["value"])
+                self._local[key] = entry
+        return entry
+
+    def _fetch(self, key: str, fetch: Callable[[], Any], cacheable: Callable[[Any], bool]):
+        value = fetch()
+        if cacheable(value):
+            fetched_at = time.time()
+            self._local[key] = (fetched_at, value)
+            payload = json.dumps({"fetched_at": fetched_at, "value": value}, default=str)
+            self._redis("set", key, payload, px=int(self.stale_ttl * 1000))
+        return value
+
+    def _try_lock(self, lock_key: str) -> bool:
+        # Without Redis every worker fetches for itself.
+        return bool(self._redis("set", lock_key, "1", nx=True, px=int(QUOTE_CACHE_LOCK_TTL * 1000), default=True))
+
+    def _revalidate(self, key: str, fetch: Callable[[], Any], cacheable: Callable[[Any], bool]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            lock_key = f"{key}:lock"
+            try:
+                if self._try_lock(lock_key):
+                    try:
+                        self._fetch(key, fetch, cacheable)
+                    finally:
+                        self._redis("delete", lock_key)
+            except Exception as e:
+                print(f"Error revalidating {key}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self.executor.submit(run)
+
+    def get_or_fetch(self, kind: str, key: str, fetch: Callable[[], Any], cacheable: Callable[[Any], bool] = lambda value: value is not None):
+        """
+        Returns the cached value for (kind, key) or the result of fetch(). Only values
+        passing `cacheable` are stored, so errors are never served from the cache.
+        """
+        cache_key = f"quote:{kind}:{key.upper()}"
+        entry = self._read(cache_key)
+        if entry:
+            age = time.time() - entry[0]
+            if age < self.ttl:
+                QUOTE_CACHE_HITS.inc()
+                return copy.deepcopy(entry[1])
+            if age < self.stale_ttl:
+                QUOTE_CACHE_STALE.inc()
+                self._revalidate(cache_key, fetch, cacheable)
+                return copy.deepcopy(entry[1])
+
+        QUOTE_CACHE_MISSES.inc()
+        with self._key_lock(cache_key):
+            entry = self._read(cache_key)
+            if entry and time.time() - entry[0] < self.ttl:
+                return copy.deepcopy(entry[1])
+
+            lock_key = f"{cache_key}:lock"
+            if self._try_lock(lock_key):
+                try:
+                    return copy.deepcopy(self._fetch(cache_key, fetch, cacheable))
+                finally:
+                    self._redis("delete", lock_key)
+
+            # Another worker is fetching this key; its result usually lands within a few hundred ms.
+            deadline = time.time() + QUOTE_CACHE_WAIT
+            while time.time() < deadline:
+                time.sleep(0.05)
+                entry = self._read(cache_key)
+                if entry and time.time() - entry[0] < self.ttl:
+                    return copy.deepcopy(entry[1])
+            return copy.deepcopy(self._fetch(cache_key, fetch, cacheable))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+quote_cache = QuoteCache()
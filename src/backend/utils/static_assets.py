@@ -0,0 +1,187 @@
+"""
+In-memory index of the built frontend (out/) and public/ files for the SPA catch-all route.
+
+The tree is scanned once at startup and rescanned every STATIC_ASSET_RELOAD_INTERVAL
+seconds off the event loop, so a request is a dict lookup instead of several
+os.path.exists probes. Every asset gets a strong ETag (content hash); hashed build
+output under _next/static is served as immutable, everything else is revalidated.
+Precompressed .br/.gz siblings are served when the client accepts them, and small
+files are answered straight from memory.
+"""
+import asyncio
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+STATIC_OUT_DIR = os.getenv("STATIC_OUT_DIR", "out")
+STATIC_PUBLIC_DIR = os.getenv("STATIC_PUBLIC_DIR", "public")
+STATIC_ASSET_RELOAD_INTERVAL = float(os.getenv("STATIC_ASSET_RELOAD_INTERVAL", "10"))
+STATIC_ASSET_MEMORY_LIMIT = int(os.getenv("STATIC_ASSET_MEMORY_LIMIT", str(256 * 1024)))
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+# Next.js puts content-hashed build output under _next/static; other bundlers use name.<hash>.ext.
+HASHED_ASSET_PATTERN = re.compile(r"(^|/)_next/static/|\.[0-9a-f]{8,}\.[a-z0-9]+$")
+COMPRESSED_SUFFIXES = {".br": "br", ".gz": "gzip"}
+
+
+@dataclass
+class StaticAsset:
+    path: str
+    etag: str
+    content_type: str
+    cache_control: str
+    # path and (size, mtime) of the file and of each precompressed variant; a change triggers a rebuild
+    signature: tuple
+    body: Optional[bytes] = None
+    # encoding -> (path, etag, body)
+    variants: Dict[str, Tuple[str, str, Optional[bytes]]] = field(default_factory=dict)
+
+
+def _read_small(path: str, size: int) -> Optional[bytes]:
+    if size > STATIC_ASSET_MEMORY_LIMIT:
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _digest(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(block)
+    return sha.hexdigest()[:32]
+
+
+class StaticAssetIndex:
+    def __init__(self, out_dir: str = STATIC_OUT_DIR, public_dir: str = STATIC_PUBLIC_DIR):
+        # url prefix -> directory; the catch-all route serves public/ files under their own prefix.
+        self.roots = {"": out_dir, "public/": public_dir}
+        self._assets: Dict[str, StaticAsset] = {}
+        self._lock = threading.Lock()
+        self._watch_task = None
+
+    def _scan(self) -> Dict[str, Tuple[str, Tuple[int, float]]]:
+        files = {}
+        for prefix, root in self.roots.items():
+            if not os.path.isdir(root):
+                continue
+            for directory, _, names in os.walk(root):
+                for name in names:
+                    path = os.path.join(directory, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    key = prefix + os.path.relpath(path, root).replace(os.sep, "/")
+                    files[key] = (path, (stat.st_size, stat.st_mtime))
+        return files
+
+    def _build_asset(self, key: str, path: str, size: int, variants: Dict[str, Tuple[str, int]], signature: tuple) -> StaticAsset:
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type in ("application/javascript", "application/json"):
+            content_type += "; charset=utf-8"
+        cache_control = IMMUTABLE_CACHE_CONTROL if HASHED_ASSET_PATTERN.search(key) else REVALIDATE_CACHE_CONTROL
+        digest = _digest(path)
+        asset = StaticAsset(path=path, etag=f'"{digest}"', content_type=content_type, cache_control=cache_control,
+                            signature=signature, body=_read_small(path, size))
+        for encoding, (variant_path, variant_size) in variants.items():
+            asset.variants[encoding] = (variant_path, f'"{digest}-{encoding}"', _read_small(variant_path, variant_size))
+        return asset
+
+    def refresh(self) -> bool:
+        """Rescans the roots; only new or changed files are hashed again. Returns True if anything changed."""
+        files = self._scan()
+        variants: Dict[str, Dict[str, tuple]] = {}
+        for key, (path, stat) in files.items():
+            base, suffix = os.path.splitext(key)
+            if suffix in COMPRESSED_SUFFIXES and base in files:
+                variants.setdefault(base, {})[COMPRESSED_SUFFIXES[suffix]] = (path, stat)
+
+        current = self._assets
+        assets: Dict[str, StaticAsset] = {}
+        for key, (path, stat) in files.items():
+            base, suffix = os.path.splitext(key)
+            if suffix in COMPRESSED_SUFFIXES and base in files:
+                continue
+            key_variants = variants.get(key, {})
+            signature = (path, stat, tuple(sorted((encoding, v[0], v[1]) for encoding, v in key_variants.items())))
+            previous = current.get(key)
+            if previous is not None and previous.signature == signature:
+                assets[key] = previous
+                continue
+            try:
+                assets[key] = self._build_asset(key, path, stat[0], {e: (v[0], v[1][0]) for e, v in key_variants.items()}, signature)
+            except OSError as e:
+                print(f"Error indexing static asset {path}: {e}")
+
+        changed = assets.keys() != current.keys() or any(assets[key] is not current[key] for key in assets)
+        if changed:
+            with self._lock:
+                self._assets = assets
+            print(f"Static asset index loaded with {len(assets)} files")
+        return changed
+
+    async def watch(self, interval: float = STATIC_ASSET_RELOAD_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                print(f"Error refreshing static asset index: {e}")
+
+    async def start(self):
+        await asyncio.to_thread(self.refresh)
+        if STATIC_ASSET_RELOAD_INTERVAL > 0 and self._watch_task is None:
+            self._watch_task = asyncio.create_task(self.watch())
+
+    def stop(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    def lookup(self, url: str) -> Optional[StaticAsset]:
+        assets = self._assets
+        if url.startswith("public/"):
+            return assets.get(url)
+        for candidate in (url, f"{url}.html", f"{url}.txt"):
+            asset = assets.get(candidate)
+            if asset is not None:
+                return asset
+        return None
+
+    def respond(self, asset: StaticAsset, request: Request) -> Response:
+        accepted = request.headers.get("accept-encoding", "")
+        path, etag, body, encoding = asset.path, asset.etag, asset.body, None
+        for candidate in ("br", "gzip"):
+            if candidate in asset.variants and candidate in accepted:
+                path, etag, body = asset.variants[candidate]
+                encoding = candidate
+                break
+
+        headers = {"ETag": etag, "Cache-Control": asset.cache_control}
+        if asset.variants:
+            headers["Vary"] = "Accept-Encoding"
+        if encoding:
+            headers["Content-Encoding"] = encoding
+
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+            return Response(status_code=304, headers=headers)
+        if body is not None:
+            return Response(content=body, media_type=asset.content_type, headers=headers)
+        return FileResponse(path, media_type=asset.content_type, headers=headers)
+
+    def serve(self, url: str, request: Request) -> Optional[Response]:
+        asset = self.lookup(url)
+        return self.respond(asset, request) if asset else None
+
+
+static_assets = StaticAssetIndex()
@@ -0,0 +1,201 @@
+"""
+Per-query token and cost accounting.
+
+A UsageTracker is passed as a LangChain callback to one graph run. Each LLM call
+is attributed to the agent (top-level graph node) that made it and to the model
+that answered, so the query metadata stored with the MessageLog carries totals
+plus per-agent and per-model breakdowns of tokens, cost and LLM time.
+
+Streamed calls do not always report usage; those are estimated from text length
+(~4 characters per token) and counted under `estimated_calls`.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.ai.llm.config import CountUsageMetricsPricingConfig
+from src.backend.utils.metrics import LatencyCallbackHandler
+
+cmp = CountUsageMetricsPricingConfig()
+
+# USD per token, list prices for prompts under 200k tokens.
+PRICING = {
+    "gemini/gemini-2.5-pro": {
+        "input": 1.25 / 1_000_000,
+        "output": 10.00 / 1_000_000
+    },
+    "gemini/gemini-2.5-flash": {
+        "input": 0.30 / 1_000_000,
+        "output": 2.50 / 1_000_000
+    },
+    "gemini/gemini-2.0-flash-lite": {
+        "input": 0.075 / 1_000_000,
+        "output": 0.30 / 1_000_000
+    },
+    "groq/qwen-qwq-32b": {
+        "input": 0.29 / 1_000_000,
+        "output": 0.39 / 1_000_000
+    },
+    "azure/gpt-4.1-mini": {
+        "input": 0.40 / 1_000_000,
+        "output": 1.60 / 1_000_000
+    },
+    "azure/gpt-4.1-nano": {
+        "input": 0.100 / 1_000_000,
+        "output": 0.400 / 1_000_000
+    },
+    "azure/gpt-4o-mini": {
+        "input": 0.15 / 1_000_000,
+        "output": 0.60 / 1_000_000
+    }
+}
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "total_tokens", "token_cost", "llm_calls", "estimated_calls", "llm_seconds")
+
+
+def get_pricing(model: str) -> dict:
+    """Pricing for `model`, also matching names reported without the provider prefix."""
+    if model in PRICING:
+        return PRICING[model]
+    name = (model or "").split("/")[-1]
+    for key, pricing in PRICING.items():
+        if key.split("/")[-1] == name:
+            return pricing
+    return PRICING[cmp.MODEL]
+
+
+def token_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    pricing = get_pricing(model)
+    return pricing["input"] * input_tokens + pricing["output"] * output_tokens
+
+
+def empty_usage() -> Dict[str, Any]:
+    return {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0, "token_cost": 0.0, "llm_calls": 0, "estimated_calls": 0, "llm_seconds": 0.0}
+
+
+def _estimate_tokens(text: str) -> int:
+    return (len(text or "") + 3) // 4
+
+
+def _prompt_text(messages) -> str:
+    parts = []
+    for batch in messages or []:
+        for message in batch if isinstance(batch, list) else [batch]:
+            content = getattr(message, "content", message)
+            parts.append(content if isinstance(content, str) else str(content))
+    return "\n".join(parts)
+
+
+def _usage_from_result(response) -> Tuple[Optional[dict], str]:
+    """Reported usage of an LLMResult (None if the provider sent none) and the generated text."""
+    input_tokens = output_tokens = total_tokens = 0
+    reported = False
+    text = []
+    for generations in response.generations or []:
+        for generation in generations:
+            text.append(getattr(generation, "text", "") or "")
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage and (usage.get("input_tokens") or usage.get("output_tokens")):
+                reported = True
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+                total_tokens += usage.get("total_tokens", 0)
+
+    if not reported:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage.get("prompt_tokens") or usage.get("completion_tokens"):
+            reported = True
+            input_tokens = usage.get("prompt_tokens", 0)
+            output_tokens = usage.get("completion_tokens", 0)
+            total_tokens = usage.get("total_tokens", 0)
+
+    if not reported:
+        return None, "".join(text)
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": total_tokens or input_tokens + output_tokens}, "".join(text)
+
+
+class UsageTracker(BaseCallbackHandler):
+    """Accumulates token usage, cost and LLM time of one query, by agent and by model."""
+
+    run_inline = True
+
+    def __init__(self, agent_name: Optional[str] = None):
+        # When set, every call is attributed to this agent instead of the graph node.
+        self.agent_name = agent_name
+        self.totals = empty_usage()
+        self.by_agent: Dict[str, Dict[str, Any]] = {}
+        self.by_model: Dict[str, Dict[str, Any]] = {}
+        self._runs: Dict[UUID, Tuple[float, str, str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _agent(self, metadata: Optional[dict]) -> str:
+        if self.agent_name:
+            return self.agent_name
+        metadata = metadata or {}
+        # Subgraph calls carry "Outer Node:<id>|inner:<id>"; attribute them to the outer agent.
+        namespace = str(metadata.get("langgraph_checkpoint_ns") or "")
+        return namespace.split("|")[0].split(":")[0] or metadata.get("langgraph_node") or "unknown"
+
+    def _start(self, run_id: UUID, serialized, prompt: str, kwargs: Dict[str, Any]):
+        model = LatencyCallbackHandler._model_name(serialized, kwargs)
+        with self._lock:
+            self._runs[run_id] = (time.perf_counter(), self._agent(kwargs.get("metadata")), model, _estimate_tokens(prompt))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs):
+        self._start(run_id, serialized, _prompt_text(messages), kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs):
+        self._start(run_id, serialized, "\n".join(prompts or []), kwargs)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if not run:
+            return
+        started, agent, model, prompt_tokens = run
+        usage, text = _usage_from_result(response)
+        estimated = usage is None
+        if estimated:
+            output_tokens = _estimate_tokens(text)
+            usage = {"input_tokens": prompt_tokens, "output_tokens": output_tokens, "total_tokens": prompt_tokens + output_tokens}
+        self.record(agent, model, usage["input_tokens"], usage["output_tokens"], usage["total_tokens"],
+                    seconds=time.perf_counter() - started, estimated=estimated)
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run:
+            # Failed calls are usually retried on the alternate model; keep their time, not their tokens.
+            self.record(run[1], run[2], 0, 0, 0, seconds=time.perf_counter() - run[0])
+
+    def record(self, agent: str, model: str, input_tokens: int, output_tokens: int, total_tokens: Optional[int] = None,
+               seconds: float = 0.0, estimated: bool = False):
+        cost = token_cost(model, input_tokens, output_tokens)
+        with self._lock:
+            for usage in (self.totals, self.by_agent.setdefault(agent, empty_usage()), self.by_model.setdefault(model, empty_usage())):
+                usage["input_tokens"] += input_tokens
+                usage["output_tokens"] += output_tokens
+                usage["total_tokens"] += total_tokens if total_tokens is not None else input_tokens + output_tokens
+                usage["token_cost"] += cost
+                usage["llm_calls"] += 1
+                usage["estimated_calls"] += int(estimated)
+                usage["llm_seconds"] += seconds
+
+    def client_summary(self) -> Dict[str, int]:
+        """Token totals only; costs and the per-agent/per-model breakdown stay server-side."""
+        with self._lock:
+            return {field: self.totals[field] for field in ("input_tokens", "output_tokens", "total_tokens")}
+
+    def summary(self) -> Dict[str, Any]:
+        """Query metadata: totals plus `by_agent` / `by_model` lists (model names contain dots, so no dict keys)."""
+        def rounded(usage):
+            return {**usage, "token_cost": round(usage["token_cost"], 8), "llm_seconds": round(usage["llm_seconds"], 3)}
+
+        with self._lock:
+            by_agent: List[dict] = [{"agent": agent, **rounded(usage)} for agent, usage in self.by_agent.items()]
+            by_model: List[dict] = [{"model": model, **rounded(usage)} for model, usage in self.by_model.items()]
+            totals = rounded(self.totals)
+        return {**totals, "by_agent": by_agent, "by_model": by_model}
@@ -18,10 +18,13 @@ import ipaddress
 from zoneinfo import ZoneInfo
 # from azure.storage.blob import ContentSettings, BlobServiceClient
 # import plotly.graph_objects as go
-import matplotlib.pyplot as plt
+from src.backend.utils.lazy_imports import lazy_import
 from dotenv import load_dotenv
 from src.ai.llm.model import get_llm
 from src.ai.llm.config import CountUsageMetricsPricingConfig
+from src.backend.utils.usage import PRICING
+
+plt = lazy_import("matplotlib.pyplot")
 
 cmp = CountUsageMetricsPricingConfig()
 
@@ -34,37 +37,6 @@ cmp = CountUsageMetricsPricingConfig()
 # container_client = blob_service_client.get_container_client(CONTAINER_NAME)
 
 
-# PRICING = {
-#     "azure/gpt-4.1-mini": {
-#         "input": 0.40 / 1_000_000,
-#         "output": 1.60 / 1_000_000
-#     },
-#     "azure/gpt-4.1-nano": {
-#         "input": 0.100 / 1_000_000,
-#         "output": 0.400 / 1_000_000
-#     },
-#     "azure/gpt-4o-mini": {
-#         "input": 0.15 / 1_000_000,
-#         "output": 0.60 / 1_000_000
-#     }
-# }
-
-PRICING = {
-    cmp.MODEL: {
-        "input": 0.40 / 1_000_000,
-        "output": 1.60 / 1_000_000
-    },
-    cmp.MODEL: {
-        "input": 0.100 / 1_000_000,
-        "output": 0.400 / 1_000_000
-    },
-    cmp.MODEL: {
-        "input": 0.15 / 1_000_000,
-        "output": 0.60 / 1_000_000
-    }
-}
-
-
 def is_private_ip(ip: str) -> bool:
     """Check if an IP address is private"""
     try:
@@ -253,8 +225,8 @@ def get_tool_call_title(tool_call: Dict):
 
 
 def get_token_usage_data(msg: AIMessage):
-    if msg.get('usage_metadata'):
-        return {'model': msg.response_metadata.get('model_name', 'azure/gpt-4.1-mini'), **msg.usage_metadata}
+    if msg.usage_metadata:
+        return {'model': msg.response_metadata.get('model_name', cmp.MODEL), **msg.usage_metadata}
 
 
 async def format_tool_calling_agent_update(agent_name, stream_mode, update):
@@ -1080,6 +1052,16 @@ async def format_response_generator_agent_update(agent_name, stream_mode, update
             if isinstance(msg, AIMessageChunk):
                 response_list.append({'type': 'response-chunk', 'agent_name': agent_name, 'content': msg.content, 'id': msg.id})
 
+        elif stream_mode == "custom":
+            # Streamed report: text chunks, charts filling earlier placeholders, then the full report.
+            value = update.get('Response Generator Agent', {})
+            if 'response_chunk' in value:
+                response_list.append({'type': 'response-chunk', 'agent_name': agent_name, 'content': value['response_chunk'], 'id': value['id']})
+            elif 'response_chart' in value:
+                response_list.append({'type': 'response-chart', 'agent_name': agent_name, 'placeholder': value['placeholder'], 'content': value['response_chart'], 'id': value['id']})
+            elif 'response' in value:
+                response_list.append({'type': 'response', 'agent_name': agent_name, 'content': value['response'], 'id': value['id']})
+
         return response_list
     except Exception as e:
         # print(f"Error in format_response_generator_agent_update : {str(e)}")
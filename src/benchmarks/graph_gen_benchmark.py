@@ -0,0 +1,111 @@
+"""
+Accuracy and latency of the local table parser against the LLM chart path.
+
+    python -m src.benchmarks.graph_gen_benchmark            # local parser only
+    python -m src.benchmarks.graph_gen_benchmark --llm      # also run the LLM path
+    python -m src.benchmarks.graph_gen_benchmark --corpus my_tables.json
+
+Corpus entries: {"name", "table", "expected"} where expected is either null
+(table should be handed to the LLM) or {"chart_type", "series": {label: [y values]}}.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+from src.ai.tools.table_chart_parser import table_to_chart_collection
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "data", "graph_tables.json")
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def score_chart(chart_collection, expected):
+    """Returns (chart_type_ok, values_ok) for one generated chart_collection dict."""
+    if not chart_collection or not chart_collection.get("chart_collection"):
+        return False, False
+    chart = chart_collection["chart_collection"][0]
+    chart_type_ok = chart.get("chart_type") == expected["chart_type"]
+
+    generated = {d["legend_label"].strip().lower(): [round(float(y), 4) for y in d["y_axis_data"]] for d in chart.get("data", [])}
+    wanted = {label.strip().lower(): [round(float(y), 4) for y in ys] for label, ys in expected["series"].items()}
+    values_ok = sorted(generated.values()) == sorted(wanted.values())
+    return chart_type_ok, values_ok
+
+
+def run_local(corpus, repeats):
+    timings = []
+    rows = []
+    for entry in corpus:
+        output = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            output = table_to_chart_collection(entry["table"])
+            timings.append((time.perf_counter() - start) * 1000)
+
+        expected = entry.get("expected")
+        if expected is None:
+            rows.append((entry["name"], "fallback" if output is None else "handled (expected fallback)", output is None))
+        elif output is None:
+            rows.append((entry["name"], "fallback (expected local)", False))
+        else:
+            type_ok, values_ok = score_chart(output, expected)
+            rows.append((entry["name"], f"type={'ok' if type_ok else 'WRONG'} values={'ok' if values_ok else 'WRONG'}", type_ok and values_ok))
+    return rows, timings
+
+
+def run_llm(corpus):
+    from src.ai.tools.graph_gen_tool import generate_graphs_llm
+
+    timings = []
+    rows = []
+    for entry in corpus:
+        expected = entry.get("expected")
+        if expected is None:
+            continue
+        start = time.perf_counter()
+        output_string = generate_graphs_llm(entry["table"])
+        timings.append((time.perf_counter() - start) * 1000)
+        output = None if output_string == "NO_CHART_GENERATED" else json.loads(output_string)
+        type_ok, values_ok = score_chart(output, expected)
+        rows.append((entry["name"], f"type={'ok' if type_ok else 'WRONG'} values={'ok' if values_ok else 'WRONG'}", type_ok and values_ok))
+    return rows, timings
+
+
+def report(title, rows, timings):
+    print(f"\n== {title} ==")
+    for name, status, ok in rows:
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}: {status}")
+    passed = sum(1 for _, _, ok in rows if ok)
+    print(f"  accuracy: {passed}/{len(rows)}")
+    if timings:
+        print(f"  latency ms: p50={statistics.median(timings):.3f} p95={percentile(timings, 95):.3f} max={max(timings):.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local vs LLM table-to-chart conversion")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--llm", action="store_true", help="also run the LLM path (needs model credentials)")
+    args = parser.parse_args()
+
+    with open(args.corpus, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    rows, timings = run_local(corpus, args.repeats)
+    report("local table parser", rows, timings)
+
+    if args.llm:
+        rows, timings = run_llm(corpus)
+        report("LLM structured output", rows, timings)
+
+
+if __name__ == "__main__":
+    main()
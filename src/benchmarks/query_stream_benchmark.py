@@ -0,0 +1,195 @@
+"""
+Time-to-first-token and total latency of the /query-stream pipelines, replayed offline.
+
+    python -m src.benchmarks.query_stream_benchmark --mode record           # live services, writes cassettes
+    python -m src.benchmarks.query_stream_benchmark                         # replay, no network
+    python -m src.benchmarks.query_stream_benchmark --concurrency 8 --iterations 5 --speed 1.0
+
+Drives InsightAgentGraph (process_agent_input_functional) and the fast agent
+(process_fast_agent_input) with the workload file, against mongomock/fakeredis
+stand-ins and the LLM, HTTP and yfinance cassettes from src.benchmarks.replay.
+--speed scales the recorded upstream latencies: 0 measures only our own overhead,
+1 reproduces the latencies seen while recording.
+
+No cassettes are committed: they hold full LLM and API responses and go stale as
+prompts change. Run --mode record once, with the API keys from .env and network
+access, to write src/benchmarks/data/cassettes/; replay runs fail fast until then.
+
+Workload entries: {"name", "agent": "graph" | "fast", "query", "realtime_info", "reasoning", "timezone"}.
+The stand-ins need the packages in src/benchmarks/requirements.txt.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+
+from src.benchmarks.graph_gen_benchmark import percentile
+from src.benchmarks.replay import replay_session
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DEFAULT_WORKLOAD = os.path.join(DATA_DIR, "query_workload.json")
+DEFAULT_CASSETTES = os.path.join(DATA_DIR, "cassettes")
+BENCHMARK_USER_ID = "benchmark-user"
+FIRST_TOKEN_TYPES = ("response-chunk", "response")
+
+
+async def install_standins():
+    """Points the Mongo clients and the Redis manager at in-memory stand-ins."""
+    import fakeredis
+    import mongomock
+    from mongomock_motor import AsyncMongoMockClient
+
+    import src.backend.db.mongodb as mongodb
+    from src.backend.utils.api_utils import redis_manager
+
+    sync_client = mongomock.MongoClient()
+    async_client = AsyncMongoMockClient()
+    mongodb.MongoClient = lambda *args, **kwargs: sync_client
+    mongodb.AsyncIOMotorClient = lambda *args, **kwargs: async_client
+    mongodb._sync_fmp_client = None
+    await mongodb.init_db()
+
+    redis_manager.client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+
+def configure_caches(warm: bool):
+    """Response caches would turn every repeat into a cache hit; keep them off unless asked."""
+    import src.ai.agents.fast_agent as fast_agent
+    from src.ai.agents.intent_detector import intent_cache
+
+    if not warm:
+        fast_agent.FAST_AGENT_CACHE_ENABLED = False
+        intent_cache.max_size = 0
+
+
+async def run_query(entry):
+    from src.ai.agents.fast_agent import process_fast_agent_input
+    from src.backend.utils.agent_comm import process_agent_input_functional
+
+    session_id = str(uuid.uuid4())
+    message_id = str(uuid.uuid4())
+    timezone = entry.get("timezone", "UTC")
+    if entry.get("agent", "graph") == "fast":
+        events = process_fast_agent_input(
+            user_id=BENCHMARK_USER_ID, session_id=session_id, user_query=entry["query"], message_id=message_id,
+            prev_message_id=None, timezone=timezone, ip_address="", doc_ids=[], realtime_info=entry.get("realtime_info", False)
+        )
+    else:
+        events = process_agent_input_functional(
+            user_id=BENCHMARK_USER_ID, session_id=session_id, user_query=entry["query"], message_id=message_id,
+            prev_message_id=None, realtime_info=entry.get("realtime_info", False), pro_reasoning=entry.get("reasoning", False),
+            retry_response=False, timezone=timezone, ip_address="", doc_ids=[]
+        )
+
+    start = time.perf_counter()
+    first_token = None
+    error = None
+    async for event in events:
+        if not isinstance(event, dict):
+            continue
+        if first_token is None and event.get("type") in FIRST_TOKEN_TYPES and event.get("content"):
+            first_token = time.perf_counter() - start
+        if "error" in event and not error:
+            error = str(event["error"]).strip().splitlines()[-1]
+    return {"name": entry["name"], "agent": entry.get("agent", "graph"), "ttft": first_token,
+            "total": time.perf_counter() - start, "error": error}
+
+
+async def run_workload(workload, iterations, concurrency, warmup):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(entry):
+        async with semaphore:
+            return await run_query(entry)
+
+    for entry in workload:
+        for _ in range(warmup):
+            await run_query(entry)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(bounded(entry) for _ in range(iterations) for entry in workload))
+    return results, time.perf_counter() - start
+
+
+def summarize(values):
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    return {"p50": statistics.median(values), "p95": percentile(values, 95), "p99": percentile(values, 99), "max": max(values)}
+
+
+def report(results, wall_time):
+    summary = {}
+    for agent in sorted({r["agent"] for r in results}):
+        runs = [r for r in results if r["agent"] == agent]
+        summary[agent] = {
+            "runs": len(runs),
+            "errors": sum(1 for r in runs if r["error"]),
+            "no_first_token": sum(1 for r in runs if r["ttft"] is None),
+            "ttft": summarize([r["ttft"] for r in runs if r["ttft"] is not None]),
+            "total": summarize([r["total"] for r in runs]),
+        }
+
+    def fmt(stats):
+        return " ".join(f"{k}={v * 1000:.1f}ms" if v is not None else f"{k}=n/a" for k, v in stats.items())
+
+    print(f"\n== query stream latency ({len(results)} runs, {wall_time:.2f}s wall, {len(results) / wall_time:.2f} runs/s) ==")
+    for agent, stats in summary.items():
+        print(f"  [{agent}] runs={stats['runs']} errors={stats['errors']} no_first_token={stats['no_first_token']}")
+        print(f"    ttft  {fmt(stats['ttft'])}")
+        print(f"    total {fmt(stats['total'])}")
+    for r in results:
+        if r["error"]:
+            print(f"  [ERROR] {r['name']}: {r['error']}")
+    return summary
+
+
+async def main_async(args):
+    with open(args.workload, "r", encoding="utf-8") as f:
+        workload = json.load(f)
+    if args.agent != "all":
+        workload = [entry for entry in workload if entry.get("agent", "graph") == args.agent]
+
+    if args.mode == "replay" and not os.path.exists(os.path.join(args.cassettes, "llm.json")):
+        print(f"No cassettes in {args.cassettes}; run once with --mode record (live services and API keys) first.")
+        return 2
+
+    with replay_session(args.cassettes, mode=args.mode, speed=args.speed) as cassettes:
+        await install_standins()
+        configure_caches(args.warm_caches)
+        if args.mode == "record":
+            results, wall_time = await run_workload(workload, 1, 1, 0)
+        else:
+            results, wall_time = await run_workload(workload, args.iterations, args.concurrency, args.warmup)
+
+    summary = report(results, wall_time)
+    misses = {name: cassette.misses for name, cassette in cassettes.items() if cassette.misses}
+    if misses:
+        print(f"  cassette misses: {misses} (re-record with --mode record)")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "summary": summary, "cassette_misses": misses, "runs": results}, f, indent=2)
+    return 1 if misses else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /query-stream pipelines against recorded upstream calls")
+    parser.add_argument("--workload", default=DEFAULT_WORKLOAD)
+    parser.add_argument("--cassettes", default=DEFAULT_CASSETTES, help="directory of llm/http/yfinance cassettes")
+    parser.add_argument("--mode", choices=["replay", "record"], default="replay")
+    parser.add_argument("--agent", choices=["all", "graph", "fast"], default="all")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per workload entry")
+    parser.add_argument("--speed", type=float, default=0.0, help="scale for recorded upstream latencies")
+    parser.add_argument("--warm-caches", action="store_true", help="keep the fast agent and intent caches enabled")
+    parser.add_argument("--output", help="write the summary and per-run timings as JSON")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
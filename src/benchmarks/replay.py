@@ -0,0 +1,350 @@
+"""
+Record/replay of the external calls made while answering a query, so the agent
+pipeline can be benchmarked offline and deterministically.
+
+Three kinds of traffic are captured, each into its own JSON file in a cassette directory:
+    llm.json        ChatLiteLLM completions (both invoke and token streams, with chunk timings)
+    http.json       requests traffic (FMP, Tavily, ...); api keys are stripped from keys and URLs
+    yfinance.json   yf.download / Ticker.history frames
+
+Request keys are normalised (timestamps, uuids and object ids masked) so a cassette
+recorded today still matches tomorrow's prompts. In replay mode a miss raises
+CassetteMiss instead of going to the network.
+"""
+import base64
+import contextvars
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+VOLATILE_PATTERNS = [
+    re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?([+-]\d{2}:?\d{2}|Z)?"),
+    re.compile(r"\d{4}-\d{2}-\d{2}"),
+    re.compile(r"\b\d{1,2}:\d{2}(:\d{2})?\s?(AM|PM|am|pm)?\b"),
+    re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"),
+    re.compile(r"\b[0-9a-f]{24}\b"),
+    re.compile(r"\b(run|call|toolu|chatcmpl)[-_][A-Za-z0-9_-]+"),
+]
+SECRET_PARAMS = {"apikey", "api_key", "token", "access_token", "key"}
+
+
+class CassetteMiss(KeyError):
+    pass
+
+
+def normalize_text(text: str) -> str:
+    for pattern in VOLATILE_PATTERNS:
+        text = pattern.sub("<*>", text)
+    return text
+
+
+def request_key(*parts: Any) -> str:
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(normalize_text(raw).encode("utf-8")).hexdigest()
+
+
+def strip_secrets(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: ("<secret>" if str(k).lower() in SECRET_PARAMS else strip_secrets(v)) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [strip_secrets(v) for v in value]
+    if isinstance(value, str):
+        return re.sub(r"((?:api_?key|token|key)=)[^&\s\"']+", r"\1<secret>", value, flags=re.IGNORECASE)
+    return value
+
+
+class Cassette:
+    """One JSON file of key -> [recorded entries]; repeated keys replay in recorded order."""
+
+    def __init__(self, path: str, mode: str):
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Any]] = {}
+        self._cursor: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    def get(self, key: str, description: str = "") -> Any:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.misses += 1
+                raise CassetteMiss(f"{os.path.basename(self.path)} has no entry for {description or key}")
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+            self.hits += 1
+            return entries[min(index, len(entries) - 1)]
+
+    def put(self, key: str, entry: Any):
+        with self._lock:
+            self._entries.setdefault(key, []).append(entry)
+
+    def save(self):
+        if not self.recording:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock:
+            with open(f"{self.path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=1, default=str)
+            os.replace(f"{self.path}.tmp", self.path)
+
+
+# Set while a recorded call runs so nested patched calls (e.g. _generate -> _stream) are not recorded twice.
+_inside_recording: contextvars.ContextVar = contextvars.ContextVar("_inside_recording", default=False)
+
+
+def _message_key(messages) -> list:
+    key = []
+    for message in messages:
+        key.append({
+            "type": message.type,
+            "content": message.content,
+            "tool_calls": [(call.get("name"), call.get("args")) for call in getattr(message, "tool_calls", None) or []],
+        })
+    return key
+
+
+def install_llm_replay(cassette: Cassette, speed: float = 0.0):
+    """Patches ChatLiteLLM; speed scales recorded latencies (0 replays instantly)."""
+    import asyncio
+    from langchain_community.chat_models import ChatLiteLLM
+    from langchain_core.messages import message_to_dict, messages_from_dict
+    from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+    originals = {name: getattr(ChatLiteLLM, name) for name in ("_generate", "_agenerate", "_stream", "_astream")}
+
+    def key_for(llm, kind, messages, stop, kwargs):
+        tools = kwargs.get("tools")
+        options = {k: v for k, v in kwargs.items() if k != "tools"}
+        return request_key("llm", kind, llm.model_name or llm.model, _message_key(messages), stop,
+                           [tool.get("function", {}).get("name") for tool in tools or []], options)
+
+    def to_result(entry):
+        message = messages_from_dict([entry["message"]])[0]
+        return ChatResult(generations=[ChatGeneration(message=message)], llm_output=entry.get("llm_output"))
+
+    def to_chunks(entry):
+        return [(delay, ChatGenerationChunk(message=messages_from_dict([chunk])[0])) for delay, chunk in entry["chunks"]]
+
+    def _generate(self, messages, stop=None, run_manager=None, stream=None, **kwargs):
+        if _inside_recording.get():
+            return originals["_generate"](self, messages, stop=stop, run_manager=run_manager, stream=stream, **kwargs)
+        key = key_for(self, "generate", messages, stop, kwargs)
+        if cassette.recording:
+            token = _inside_recording.set(True)
+            start = time.perf_counter()
+            try:
+                result = originals["_generate"](self, messages, stop=stop, run_manager=run_manager, stream=stream, **kwargs)
+            finally:
+                _inside_recording.reset(token)
+            cassette.put(key, {"latency": time.perf_counter() - start, "message": message_to_dict(result.generations[0].message), "llm_output": result.llm_output})
+            return result
+        entry = cassette.get(key, f"{self.model_name or self.model} generate")
+        time.sleep(entry["latency"] * speed)
+        return to_result(entry)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, stream=None, **kwargs):
+        if _inside_recording.get():
+            return await originals["_agenerate"](self, messages, stop=stop, run_manager=run_manager, stream=stream, **kwargs)
+        key = key_for(self, "generate", messages, stop, kwargs)
+        if cassette.recording:
+            token = _inside_recording.set(True)
+            start = time.perf_counter()
+            try:
+                result = await originals["_agenerate"](self, messages, stop=stop, run_manager=run_manager, stream=stream, **kwargs)
+            finally:
+                _inside_recording.reset(token)
+            cassette.put(key, {"latency": time.perf_counter() - start, "message": message_to_dict(result.generations[0].message), "llm_output": result.llm_output})
+            return result
+        entry = cassette.get(key, f"{self.model_name or self.model} generate")
+        await asyncio.sleep(entry["latency"] * speed)
+        return to_result(entry)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        if _inside_recording.get():
+            yield from originals["_stream"](self, messages, stop=stop, run_manager=run_manager, **kwargs)
+            return
+        key = key_for(self, "stream", messages, stop, kwargs)
+        if cassette.recording:
+            chunks = []
+            last = time.perf_counter()
+            for chunk in originals["_stream"](self, messages, stop=stop, run_manager=run_manager, **kwargs):
+                now = time.perf_counter()
+                chunks.append((now - last, message_to_dict(chunk.message)))
+                last = now
+                yield chunk
+            cassette.put(key, {"chunks": chunks})
+            return
+        for delay, chunk in to_chunks(cassette.get(key, f"{self.model_name or self.model} stream")):
+            time.sleep(delay * speed)
+            if run_manager:
+                run_manager.on_llm_new_token(str(chunk.message.content), chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        if _inside_recording.get():
+            async for chunk in originals["_astream"](self, messages, stop=stop, run_manager=run_manager, **kwargs):
+                yield chunk
+            return
+        key = key_for(self, "stream", messages, stop, kwargs)
+        if cassette.recording:
+            chunks = []
+            last = time.perf_counter()
+            async for chunk in originals["_astream"](self, messages, stop=stop, run_manager=run_manager, **kwargs):
+                now = time.perf_counter()
+                chunks.append((now - last, message_to_dict(chunk.message)))
+                last = now
+                yield chunk
+            cassette.put(key, {"chunks": chunks})
+            return
+        for delay, chunk in to_chunks(cassette.get(key, f"{self.model_name or self.model} stream")):
+            await asyncio.sleep(delay * speed)
+            if run_manager:
+                await run_manager.on_llm_new_token(str(chunk.message.content), chunk=chunk)
+            yield chunk
+
+    ChatLiteLLM._generate = _generate
+    ChatLiteLLM._agenerate = _agenerate
+    ChatLiteLLM._stream = _stream
+    ChatLiteLLM._astream = _astream
+
+    def restore():
+        for name, original in originals.items():
+            setattr(ChatLiteLLM, name, original)
+    return restore
+
+
+def install_http_replay(cassette: Cassette, speed: float = 0.0):
+    """Patches requests.Session.request, which requests.get/post and the Tavily client go through."""
+    import requests
+    from requests.structures import CaseInsensitiveDict
+
+    original = requests.Session.request
+
+    def request(session, method, url, **kwargs):
+        key = request_key("http", method.upper(), strip_secrets(url), strip_secrets(kwargs.get("params")),
+                          strip_secrets(kwargs.get("json")), strip_secrets(kwargs.get("data")))
+        if cassette.recording:
+            start = time.perf_counter()
+            response = original(session, method, url, **kwargs)
+            cassette.put(key, {
+                "latency": time.perf_counter() - start,
+                "status": response.status_code,
+                "headers": {k: v for k, v in response.headers.items() if k.lower() in ("content-type", "content-encoding-original")},
+                "url": strip_secrets(response.url),
+                "body": base64.b64encode(response.content).decode("ascii"),
+            })
+            return response
+
+        entry = cassette.get(key, f"{method.upper()} {strip_secrets(url)}")
+        time.sleep(entry["latency"] * speed)
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.url = entry["url"]
+        response.encoding = "utf-8"
+        response._content = base64.b64decode(entry["body"])
+        return response
+
+    requests.Session.request = request
+
+    def restore():
+        requests.Session.request = original
+    return restore
+
+
+def frame_to_dict(df) -> Optional[Dict[str, Any]]:
+    if df is None:
+        return None
+    columns = [list(c) if isinstance(c, tuple) else c for c in df.columns]
+    index = [i.isoformat() if hasattr(i, "isoformat") else i for i in df.index]
+    return {"columns": columns, "index": index, "index_name": df.index.name,
+            "data": json.loads(df.to_json(orient="values", date_format="iso"))}
+
+
+def frame_from_dict(entry: Optional[Dict[str, Any]]):
+    import pandas as pd
+
+    if entry is None:
+        return None
+    columns = entry["columns"]
+    if columns and isinstance(columns[0], list):
+        columns = pd.MultiIndex.from_tuples([tuple(c) for c in columns])
+    index = entry["index"]
+    try:
+        index = pd.DatetimeIndex(pd.to_datetime(index))
+    except (ValueError, TypeError):
+        pass
+    df = pd.DataFrame(entry["data"] or None, index=index, columns=columns)
+    df.index.name = entry.get("index_name")
+    return df
+
+
+def install_yfinance_replay(cassette: Cassette, speed: float = 0.0):
+    import yfinance as yf
+
+    original_download = yf.download
+    original_history = yf.Ticker.history
+
+    def download(tickers, *args, **kwargs):
+        key = request_key("yf.download", tickers, args, kwargs)
+        if cassette.recording:
+            start = time.perf_counter()
+            df = original_download(tickers, *args, **kwargs)
+            cassette.put(key, {"latency": time.perf_counter() - start, "frame": frame_to_dict(df)})
+            return df
+        entry = cassette.get(key, f"yf.download {tickers}")
+        time.sleep(entry["latency"] * speed)
+        return frame_from_dict(entry["frame"])
+
+    def history(ticker, *args, **kwargs):
+        key = request_key("yf.history", ticker.ticker, args, kwargs)
+        if cassette.recording:
+            start = time.perf_counter()
+            df = original_history(ticker, *args, **kwargs)
+            cassette.put(key, {"latency": time.perf_counter() - start, "frame": frame_to_dict(df)})
+            return df
+        entry = cassette.get(key, f"yf.history {ticker.ticker}")
+        time.sleep(entry["latency"] * speed)
+        return frame_from_dict(entry["frame"])
+
+    yf.download = download
+    yf.Ticker.history = history
+
+    def restore():
+        yf.download = original_download
+        yf.Ticker.history = original_history
+    return restore
+
+
+@contextmanager
+def replay_session(cassette_dir: str, mode: str = "replay", speed: float = 0.0):
+    """Installs LLM, HTTP and yfinance record/replay; cassettes are written on exit when recording."""
+    if mode not in ("record", "replay"):
+        raise ValueError(f"Unknown cassette mode: {mode}")
+    cassettes = {name: Cassette(os.path.join(cassette_dir, f"{name}.json"), mode) for name in ("llm", "http", "yfinance")}
+    restores = [
+        install_llm_replay(cassettes["llm"], speed),
+        install_http_replay(cassettes["http"], speed),
+        install_yfinance_replay(cassettes["yfinance"], speed),
+    ]
+    try:
+        yield cassettes
+    finally:
+        for restore in reversed(restores):
+            restore()
+        for cassette in cassettes.values():
+            cassette.save()
@@ -0,0 +1,114 @@
+"""
+Cold-start cost of the API: import time of the app module and, optionally,
+time until a fresh uvicorn process answers /health.
+
+    python -m src.benchmarks.startup_benchmark                  # import time, 5 fresh interpreters
+    python -m src.benchmarks.startup_benchmark --top 25         # also list the slowest imports
+    python -m src.benchmarks.startup_benchmark --serve          # time to first 200 from /health
+
+Every sample runs in a new interpreter so module caches from earlier runs do not
+hide the cost. --serve needs Mongo and Redis reachable, as the app connects to
+both during startup.
+"""
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from src.benchmarks.graph_gen_benchmark import percentile
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+APP_MODULE = "src.backend.app"
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import {module}; "
+    "print('IMPORT_SECONDS', time.perf_counter() - start)"
+)
+
+
+def run_python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True)
+
+
+def measure_import(module: str) -> float:
+    result = run_python(IMPORT_SNIPPET.format(module=module))
+    match = re.search(r"IMPORT_SECONDS ([0-9.]+)", result.stdout)
+    if not match:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return float(match.group(1))
+
+
+def slowest_imports(module: str, top: int):
+    """Cumulative import time per package from `python -X importtime`."""
+    result = run_python(f"import {module}", "-X", "importtime")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)", line)
+        if match:
+            rows.append((int(match.group(2)) / 1e6, len(match.group(3)), match.group(4)))
+    # Only top-level and first nested level, otherwise parents and children are counted twice.
+    rows = [row for row in rows if row[1] <= 3]
+    return sorted(rows, reverse=True)[:top]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_health(timeout: float) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{APP_MODULE}:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.05)
+        raise TimeoutError(f"/health did not answer within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def report(title, samples):
+    print(f"\n== {title} ({len(samples)} runs) ==")
+    print(f"  seconds: p50={statistics.median(samples):.3f} p95={percentile(samples, 95):.3f} "
+          f"min={min(samples):.3f} max={max(samples):.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API cold-start time")
+    parser.add_argument("--module", default=APP_MODULE)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0, help="list the N slowest imports")
+    parser.add_argument("--serve", action="store_true", help="also time uvicorn start to first /health response")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    report(f"import {args.module}", [measure_import(args.module) for _ in range(args.runs)])
+
+    if args.top:
+        print(f"\n== slowest imports ==")
+        for seconds, _, name in slowest_imports(args.module, args.top):
+            print(f"  {seconds:8.3f}s  {name}")
+
+    if args.serve:
+        report("uvicorn start to /health", [measure_health(args.timeout) for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()